@@ -0,0 +1,1462 @@
+"""The Tk window. Started by `python project.py` (see project.py)."""
+import time
+STARTED = time.perf_counter()  # before the other imports, for --startup-time
+import json
+import os
+import sys
+import tkinter as tk
+from tkinter import messagebox, ttk, simpledialog, filedialog
+from datetime import date, datetime, timedelta
+import threading
+import queue
+import bisect
+from task_store import (TaskStore, DeadlineClassifier, DATE_FORMAT, ARCHIVE_BATCH, ARCHIVE_DAYS, PERIODS,
+                        REPORT_GROUPS, period_range, to_display)
+from executor import QueryExecutor
+from virtual_list import VirtualList
+from timer_engine import TimerEngine
+from task_io import import_csv, export_tasks
+from reminders import ReminderScheduler
+from task_model import TaskModel, TaskPages, PAGE_SIZE
+from task_filter import FilterError, is_filter
+from profiler import Profiler
+
+SEARCH_DEBOUNCE_MS = 150
+
+# Methods timed when profiling is on. Spans of actions that open a dialog
+# include the time the dialog is open; the refreshes they trigger are timed too.
+PROFILED_ACTIONS = [
+    "add_task", "task_action", "edit_deadline", "set_task_duration", "set_task_priority", "bulk_edit",
+    "toggle_timer", "stop_timer", "update_timer", "export_csv", "import_csv", "load_tasks", "run_search",
+    "show_search", "show_filter", "render_tasks", "sort_by_color", "install_pages", "extend_pages", "refresh_task",
+    "refresh_tasks", "toggle_view", "update_calendar_view", "show_calendar", "check_reminders",
+    "on_focus", "toggle_theme", "run_maintenance",
+]
+PROFILED_LIST_METHODS = ["fill", "update_row", "insert_row", "delete_row"]
+
+STARTUP_ENV = "TODO_STARTUP_TIME"
+PAGE_SIZE_ENV = "TODO_PAGE_SIZE"
+FIRST_LOAD_FALLBACK_MS = 500  # load even if the window is never exposed (e.g. starts minimized)
+ARCHIVE_DAYS_ENV = "TODO_ARCHIVE_DAYS"  # 0 turns archiving off
+MAINTENANCE_INTERVAL_MS = 10 * 60 * 1000
+IDLE_SECONDS = 60  # no key or mouse presses for this long before maintenance runs
+
+
+def tkcalendar():
+    # Imported on first use: tkcalendar loads babel's locale data, which is slow
+    import tkcalendar
+    return tkcalendar
+
+
+class ToDoApp:
+    def __init__(self, root, profiler=None, measure_startup=False, page_size=PAGE_SIZE, started=STARTED,
+                 archive_days=ARCHIVE_DAYS):
+        self.root = root
+        self.profiler = profiler
+        self.started = started  # perf_counter() when the process began importing
+        self.startup_marks = {} if measure_startup else None
+        self.startup_mark("imported")
+        self.root.title("To-Do List")
+        self.root.geometry("800x600")
+        self.root.minsize(800, 600)
+
+        # Add timer related variables
+        self.timer_after_id = None
+        self.last_timer_id = None
+
+        self.theme = "light"
+        self.colors = {
+            "light": {"bg": "#f0f4f7", "fg": "#000", "entry_bg": "#fff", "entry_fg": "#000",
+                     "button_bg": "#dbe9f4", "listbox_bg": "#fff", "placeholder": "#999"},
+            "dark": {"bg": "#121212", "fg": "#fff", "entry_bg": "#1f1f1f", "entry_fg": "#fff",
+                    "button_bg": "#333", "listbox_bg": "#1f1f1f", "placeholder": "#aaa"}
+        }
+
+        self.store = TaskStore(profiler=profiler)
+        # Queries that can take a while, and every write, run on its threads
+        self.executor = QueryExecutor(self.store, self.root.after)
+        self.page_size = page_size
+        self.pages = None      # the list's TaskPages, in list_order
+        self.reloading = None  # tasks refreshed while a reload is in flight
+        self.reloaded = []     # callbacks waiting for it
+        self.classifier = DeadlineClassifier()
+        self.timer = TimerEngine(self.store, write=self.timer_write)
+        self.model = TaskModel(self.store, self.classifier)
+        self.reminders = ReminderScheduler(self.store)
+        self.reminder_after_id = None
+        self.archive_days = archive_days
+        self.maintenance_after_id = None
+        self.last_input = time.monotonic()
+
+        self.task_var, self.deadline_var = tk.StringVar(), tk.StringVar()
+        self.priority_var, self.search_var = tk.StringVar(value="Medium"), tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.schedule_search() if not self.search_is_placeholder else None)
+        self.search_after_id = None
+        self.search_results = None  # (term, rows) of the last completed search
+        self.include_archived = tk.BooleanVar(value=False)
+        self.list_where = None  # the compiled filter expression the list is showing, if any
+        self.views = {}         # saved view name -> filter expression
+        self.view_var = tk.StringVar()
+        self.default_date = datetime.today().strftime("%d-%m-%Y")
+        self.deadline_var.set(self.default_date)
+        self.date_format = DATE_FORMAT
+        self.list_order = "deadline"
+        self.legend_visible = False
+
+        if profiler:
+            profiler.instrument(self, PROFILED_ACTIONS)
+            profiler.instrument(self, ["format_rows"], category="render")
+        self.build_ui()
+        if profiler:
+            profiler.instrument(self.task_list, PROFILED_LIST_METHODS, category="tk", prefix="task_list.")
+            profiler.watch(self.root.after)
+        self.apply_theme()
+        self.startup_mark("ui_built")
+
+        # The window paints first; tasks are loaded right after the first expose
+        self.loaded = False
+        self.timer_label.config(text="Loading tasks...")
+        self.root.bind("<Expose>", self.on_first_expose)
+        self.root.after(FIRST_LOAD_FALLBACK_MS, self.first_load)
+        # Persist a running timer when the window is closed
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def build_ui(self):
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        self.main_frame = ttk.Frame(self.root, padding=10)
+        self.main_frame.grid(row=0, column=0, sticky="nsew")
+        self.main_frame.columnconfigure(0, weight=1)
+
+        theme_frame = ttk.Frame(self.main_frame)
+        theme_frame.grid(row=0, column=0, pady=(0,5))
+        self.theme_button = ttk.Button(theme_frame, text="🌙 Dark mode", command=self.toggle_theme)
+        self.theme_button.pack()
+
+        input_frame = ttk.Frame(self.main_frame, padding=5)
+        input_frame.grid(row=1, column=0, pady=5, sticky="nsew")
+        for i in range(4): input_frame.columnconfigure(i, weight=1 if i in [0,3] else 0)
+        
+        ttk.Label(input_frame, text="Task:", anchor="center", width=20).grid(row=0, column=1, pady=3)
+        self.task_entry = ttk.Entry(input_frame, textvariable=self.task_var, width=40)
+        self.task_entry.grid(row=0, column=2, pady=3)
+        
+        ttk.Label(input_frame, text="Deadline:", anchor="center", width=20).grid(row=1, column=1, pady=3)
+        self.date_frame = ttk.Frame(input_frame)
+        self.date_frame.grid(row=1, column=2, pady=3)
+        # A plain entry until the date picker is built, after the first paint
+        self.date_picker_ready = False
+        self.deadline_entry = ttk.Entry(self.date_frame, textvariable=self.deadline_var, width=40)
+        self.deadline_entry.pack(fill='x')
+        
+        ttk.Label(input_frame, text="Priority:", anchor="center", width=20).grid(row=2, column=1, pady=3)
+        self.priority_menu = tk.OptionMenu(input_frame, self.priority_var, "Low", "Medium", "High")
+        self.priority_menu.config(width=36)
+        self.priority_menu.grid(row=2, column=2, pady=3)
+
+        add_task_frame = ttk.Frame(self.main_frame)
+        add_task_frame.grid(row=3, column=0, pady=5)
+        ttk.Button(add_task_frame, text="Add Task", command=self.add_task).pack()
+
+        sort_frame = ttk.Frame(self.main_frame)
+        sort_frame.grid(row=4, column=0, pady=5)
+        ttk.Button(sort_frame, text="Sort by Color", command=self.sort_by_color).grid(row=0, column=0, padx=3)
+        ttk.Button(sort_frame, text="Sort by Deadline", command=self.load_tasks).grid(row=0, column=1, padx=3)
+        self.view_button = ttk.Button(sort_frame, text="Show Calendar View", command=self.toggle_view)
+        self.view_button.grid(row=0, column=2, padx=3)
+
+        self.search_frame = ttk.Frame(self.main_frame)
+        self.search_frame.grid(row=5, column=0, sticky="we", pady=5)
+        self.search_frame.columnconfigure(0, weight=1)
+        self.search_entry = ttk.Entry(self.search_frame, textvariable=self.search_var, width=40)
+        self.search_entry.grid(row=0, column=0, sticky="we")
+        ttk.Checkbutton(self.search_frame, text="Include archived", variable=self.include_archived,
+                        command=self.toggle_archived).grid(row=0, column=1, padx=(5, 0))
+        self.view_menu = ttk.Combobox(self.search_frame, textvariable=self.view_var, state="readonly", width=16)
+        self.view_menu.grid(row=0, column=2, padx=(5, 0))
+        self.view_menu.bind("<<ComboboxSelected>>", self.open_view)
+        ttk.Button(self.search_frame, text="Save View", command=self.save_view).grid(row=0, column=3, padx=(5, 0))
+        # Match counts, and what is wrong with a filter expression being typed
+        self.match_label = ttk.Label(self.search_frame, text="")
+        self.match_label.grid(row=1, column=0, columnspan=4, sticky="w")
+        self.search_is_placeholder = True
+        self.search_entry.insert(0, "Search task...")
+        self.search_entry.bind("<FocusIn>", lambda e: self.set_search_placeholder(False))
+        self.search_entry.bind("<FocusOut>", lambda e: self.set_search_placeholder(True) if not self.search_var.get() else None)
+
+        # The list view; the calendar view is built the first time it is shown
+        self.list_frame = ttk.Frame(self.main_frame)
+        self.list_frame.grid(row=6, column=0, sticky="nsew", pady=5)
+
+        # Shift/Ctrl-click selects several tasks; the actions below apply to all of them
+        self.task_list = VirtualList(self.list_frame, self.format_rows, height=10, font=("TkDefaultFont", 12),
+                                     selectmode=tk.EXTENDED)
+        self.task_list.pack(fill=tk.BOTH, expand=True)
+        self.listbox = self.task_list.listbox
+        self.displayed_task_ids = self.task_list.ids
+        
+        self.calendar_frame = ttk.Frame(self.main_frame)
+        self.calendar_frame.grid(row=6, column=0, sticky="nsew", pady=5)
+        self.calendar_frame.grid_remove()
+        self.calendar = None
+        self.calendar_events = {}  # deadline -> (event id, text, color)
+        self.calendar_tags = set()
+        self.current_view = "list"
+
+        self.legend_text = "Color Legend:\nGray – Completed\nPurple – Deadline passed\nRed – Deadline today & priority High/Medium\n" + \
+                         "Orange – Deadline today & Low OR tomorrow/the day after & High/Medium\n" + \
+                         "Green – Tomorrow/the day after & Low OR after the day after & High/Medium\n" + \
+                         "Black – All other cases"
+        self.legend_label = ttk.Label(self.main_frame, text=self.legend_text, justify="left", anchor="w")
+        self.legend_label.grid(row=7, column=0, sticky="w", pady=(5, 0))
+        self.legend_label.grid_remove()
+        self.legend_button = ttk.Button(self.main_frame, text="Show Color Legend", 
+                                     command=lambda: self.toggle_widget(self.legend_label, self.legend_button))
+        self.legend_button.grid(row=8, column=0, pady=5)
+
+        btn_frame = ttk.Frame(self.main_frame)
+        btn_frame.grid(row=9, column=0, pady=5)
+        actions = [
+            ("Delete Task", self.delete_task),
+            ("Task Completed", self.complete_task),
+            ("Edit Task", self.edit_task),
+            ("Edit Deadline", self.edit_deadline),
+            ("Set Priority", self.set_task_priority),
+            ("Set Duration", self.set_task_duration),
+            ("Start/Stop Timer", self.toggle_timer),
+            ("Bulk Edit", self.bulk_edit),
+            ("Export CSV", self.export_csv),
+            ("Import CSV", self.import_csv),
+            ("Time Report", self.show_time_report),
+        ]
+        if self.profiler:
+            actions.append(("Stats", self.show_stats))
+        for i, (text, cmd) in enumerate(actions):
+            ttk.Button(btn_frame, text=text, command=cmd).grid(row=0, column=i, padx=5)
+
+        # Add timer label
+        self.timer_label = ttk.Label(self.main_frame, text="No active timer", font=("TkDefaultFont", 10))
+        self.timer_label.grid(row=10, column=0, pady=5)
+
+        # Reminders show up here instead of in a modal dialog
+        self.reminder_frame = ttk.Frame(self.main_frame)
+        self.reminder_frame.grid(row=11, column=0, pady=5, sticky="we")
+        self.reminder_frame.columnconfigure(0, weight=1)
+        self.reminder_label = ttk.Label(self.reminder_frame, text="", justify="left", anchor="w", wraplength=650)
+        self.reminder_label.grid(row=0, column=0, sticky="we")
+        ttk.Button(self.reminder_frame, text="Dismiss", command=self.reminder_frame.grid_remove).grid(row=0, column=1, padx=5)
+        self.reminder_frame.grid_remove()
+
+    def toggle_widget(self, widget, button):
+        if widget.winfo_viewable():
+            widget.grid_remove()
+            button.config(text=button["text"].replace("Hide", "Show"))
+        else:
+            widget.grid()
+            button.config(text=button["text"].replace("Show", "Hide"))
+
+    def set_search_placeholder(self, show_placeholder):
+        if show_placeholder and not self.search_var.get():
+            self.search_is_placeholder = True
+            self.search_var.set("Search task...")
+        elif not show_placeholder and self.search_is_placeholder:
+            self.search_is_placeholder = False
+            self.search_var.set("")
+        ttk.Style().configure("TEntry", foreground=self.colors[self.theme]["placeholder" if self.search_is_placeholder else "entry_fg"])
+
+    def apply_theme(self):
+        c = self.colors[self.theme]
+        self.root.configure(bg=c["bg"])
+        style = ttk.Style()
+        style.theme_use("clam")
+        for widget, props in {
+            "TFrame": {"background": c["bg"]},
+            "TLabel": {"background": c["bg"], "foreground": c["fg"]},
+            "TEntry": {"fieldbackground": c["entry_bg"], "foreground": c["entry_fg"]},
+            "TButton": {"background": c["button_bg"], "foreground": c["fg"]}
+        }.items():
+            style.configure(widget, **props)
+        style.map("TButton", background=[("active", c["button_bg"])])
+        
+        if self.date_picker_ready:
+            self.deadline_entry.configure(
+                background=c["entry_bg"] if self.theme == "light" else "#333",
+                foreground=c["entry_fg"], selectbackground="#6aa6d6" if self.theme == "light" else "#555"
+            )
+        self.listbox.configure(bg=c["listbox_bg"], fg=c["fg"], 
+                             selectbackground="#6aa6d6", selectforeground=c["entry_fg"])
+        self.priority_menu.config(bg=c["entry_bg"], fg=c["entry_fg"], activebackground=c["button_bg"], 
+                                activeforeground=c["fg"], highlightbackground=c["bg"], highlightthickness=1)
+        self.theme_button.config(text="🌙 Dark mode" if self.theme == "light" else "☀ Light mode")
+        
+        if self.search_is_placeholder:
+            style.configure("TEntry", foreground=c["placeholder"])
+
+    def on_first_expose(self, event):
+        # The redraws this expose queued run as idle callbacks ahead of this one,
+        # so the load starts once the window is on screen
+        self.root.unbind("<Expose>")
+        self.root.after_idle(self.root.after, 0, self.first_load)
+
+    def first_load(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        self.startup_mark("first_paint")
+        self.executor.write(self.prepare_database, callback=self.database_prepared, error=self.show_error)
+
+    def prepare_database(self, conn):
+        # Writer thread: the startup writes, then the data_version baseline. The
+        # app's own writes all go through this connection, so only other
+        # programs' commits move it.
+        recovered = self.store.recover_timers(conn)
+        return recovered, self.store.data_version(conn)
+
+    def database_prepared(self, result):
+        recovered, data_version = result
+        self.timer_label.config(text="No active timer")
+        self.show_recovered_timers(recovered)
+        self.reload(data_version=data_version, then=self.tasks_ready)
+
+    def tasks_ready(self):
+        self.startup_mark("tasks_loaded")
+        self.seed_reminders()
+        # Pick up changes other programs made to todo.db while the window was in the background
+        self.root.bind("<FocusIn>", self.on_focus)
+        for sequence in ("<Any-KeyPress>", "<Any-ButtonPress>"):
+            self.root.bind_all(sequence, self.note_input, add="+")
+        self.schedule_maintenance()
+        self.executor.read(self.store.views, callback=self.show_views, error=self.show_error)
+        self.root.after_idle(self.build_date_picker)
+
+    def build_date_picker(self):
+        placeholder = self.deadline_entry
+        self.deadline_entry = tkcalendar().DateEntry(self.date_frame, width=38,
+                                                   background='darkblue', foreground='white',
+                                                   borderwidth=2, date_pattern='dd-mm-yyyy',
+                                                   textvariable=self.deadline_var)
+        self.deadline_entry.pack(fill='x')
+        placeholder.destroy()
+        self.date_picker_ready = True
+        self.apply_theme()
+        self.startup_mark("date_picker")
+        if self.startup_marks is not None:
+            # Startup measurement mode: report and quit
+            print(json.dumps({"startup_ms": self.startup_marks}), file=sys.stderr)
+            self.on_close()
+
+    def startup_mark(self, name):
+        if self.startup_marks is not None:
+            self.startup_marks[name] = round((time.perf_counter() - self.started) * 1000, 1)
+
+    def toggle_theme(self):
+        self.theme = "dark" if self.theme == "light" else "light"
+        self.apply_theme()
+
+    def add_task(self):
+        task = self.task_var.get().strip()
+        deadline = self.deadline_var.get().strip()
+        priority = self.priority_var.get()
+        
+        if not task:
+            return messagebox.showwarning("ERROR", "Add a task!")
+            
+        try:
+            deadline_date = datetime.strptime(deadline, self.date_format).date()
+            if deadline_date < datetime.today().date():
+                return messagebox.showerror("Invalid Date", "Deadline cannot be in the past!")
+                
+            read_back = self.read_back()
+            self.executor.write(
+                lambda conn: read_back([self.store.add_task(task, deadline_date.isoformat(), priority, conn)], conn),
+                callback=self.refresh_tasks, error=self.show_error)
+            self.task_var.set("")
+            self.deadline_var.set(datetime.today().strftime(self.date_format))
+        except ValueError as e:
+            messagebox.showwarning("ERROR", f"Date format issue: {str(e)}")
+
+    def format_time(self, seconds):
+        if seconds is None:
+            return ""
+        hours = seconds // 3600
+        minutes = (seconds % 3600) // 60
+        secs = seconds % 60
+        if hours > 0:
+            return f"{hours}h{minutes:02d}m{secs:02d}s"
+        elif minutes > 0:
+            return f"{minutes}m{secs:02d}s"
+        return f"{secs}s"
+
+    def get_search_term(self):
+        return "" if self.search_is_placeholder else self.search_var.get().lower()
+
+    def load_tasks(self):
+        # Tasks may have changed, so earlier search results can't be narrowed any more
+        self.search_results = None
+        search_term = self.get_search_term()
+
+        if search_term and self.list_where is None:
+            self.start_search(search_term)
+        else:
+            self.show_list("deadline")
+
+        if self.current_view == "calendar":
+            self.update_calendar_view()
+
+    def show_list(self, order):
+        # The loaded pages are reused while they are in this order; otherwise the
+        # list reopens at its first page
+        if (self.pages is not None and self.pages.order == order and self.pages.where == self.list_where
+                and not self.pages.stale()):
+            self.render_tasks(self.pages, order)
+        else:
+            self.reload(order)
+
+    def reload(self, order=None, data_version=None, then=None):
+        # The count and the first page are read on a reader thread; further pages
+        # follow as the list scrolls, so this costs the same at any table size
+        order = order or self.list_order
+        if data_version is None:
+            data_version = self.model.data_version
+        if then:
+            self.reloaded.append(then)
+        pages = TaskPages(self.model, order, self.page_size, prefetch=self.prefetch_page, where=self.list_where)
+        self.reloading = set()
+        self.executor.read(pages.fetch_first, key="reload", error=self.show_error,
+                           callback=lambda first: self.install_pages(pages, first, data_version))
+
+    def install_pages(self, pages, first, data_version):
+        refreshed, self.reloading = self.reloading, None
+        if data_version != self.model.data_version:
+            # Another program changed the tasks, so cached records may be stale
+            self.model.clear()
+            self.model.data_version = data_version
+        pages.start(first)
+        self.pages = pages
+        search_term = self.get_search_term()
+        if search_term and pages.where is None and pages.order == "deadline":
+            self.start_search(search_term)
+        else:
+            self.render_tasks(pages, pages.order)
+        # Writes that committed after the page was read are re-applied on top
+        if refreshed:
+            self.read_tasks_back(refreshed)
+        if self.current_view == "calendar":
+            self.update_calendar_view()
+        callbacks, self.reloaded = self.reloaded, []
+        for then in callbacks:
+            then()
+
+    def prefetch_page(self, pages):
+        # Called by the pages as the list nears the end of what is loaded
+        after = pages.last_key()
+
+        def failed(error):
+            pages.prefetching = False
+            self.show_error(error)
+        self.executor.read(lambda conn: pages.fetch(conn, after), key="page", error=failed,
+                           callback=lambda rows: self.extend_pages(pages, rows, after))
+
+    def extend_pages(self, pages, rows, after):
+        if pages.extend(rows, after) and self.task_list.rows is pages:
+            self.task_list.update_scrollbar()
+
+    def schedule_search(self):
+        # Coalesce keystrokes: only the last one inside the debounce window runs a query
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self.run_search)
+
+    def run_search(self):
+        self.search_after_id = None
+        self.executor.cancel("search")
+        search_term = self.get_search_term()
+
+        if not search_term:
+            self.search_results = None
+            self.list_where = None
+            self.show_list("deadline")
+            return
+
+        if is_filter(search_term):
+            self.show_filter(search_term)
+            return
+        self.list_where = None
+
+        # A longer query can only match a subset of what the shorter one matched
+        if self.search_results and search_term.startswith(self.search_results[0]):
+            tasks = [task for task in self.search_results[1] if search_term in (task.title or "").lower()]
+            self.search_results = (search_term, tasks)
+            self.render_tasks(tasks)
+            return
+
+        self.start_search(search_term)
+
+    def start_search(self, search_term):
+        # A newer search supersedes this one: its query is interrupted and its results dropped
+        archived = self.include_archived.get()
+        self.executor.read(lambda conn: self.store.search_tasks(search_term, conn, archived), key="search",
+                           callback=lambda rows: self.show_search(search_term, rows), error=self.show_error)
+
+    def show_filter(self, text):
+        # A filter expression pages through the matching tasks like the full list,
+        # in the current order
+        try:
+            where = self.store.compile_filter(text)
+        except FilterError as e:
+            self.match_label.config(text=str(e))
+            return
+        self.search_results = None
+        self.list_where = where
+        self.show_list(self.list_order)
+
+    def visible(self, tasks, shown):
+        # The changed tasks that still belong in the list under its search or
+        # filter; `shown` holds the ids the filter matched, read with the write
+        if self.list_where is not None:
+            return [task for task in tasks if task.id in shown]
+        search_term = self.get_search_term()
+        return [task for task in tasks if not search_term or search_term in (task.title or "").lower()]
+
+    def show_views(self, views):
+        self.views = dict(views)
+        self.view_menu.config(values=list(self.views))
+
+    def open_view(self, event):
+        self.set_search_placeholder(False)
+        self.search_var.set(self.views.get(self.view_var.get(), ""))
+
+    def save_view(self):
+        query = "" if self.search_is_placeholder else self.search_var.get().strip()
+        if not query:
+            messagebox.showinfo("Save View", "Type a search or filter first, e.g. priority:high status:open due<=+7d")
+            return
+        name = simpledialog.askstring("Save View", "Name this view:", initialvalue=self.view_var.get())
+        if not name:
+            return
+
+        def save(conn):
+            self.store.save_view(name, query, conn)
+            return self.store.views(conn)
+        self.view_var.set(name)
+        self.executor.write(save, callback=self.show_views, error=self.show_error)
+
+    def toggle_archived(self):
+        # Archived tasks are only ever shown as search results
+        self.search_results = None
+        search_term = self.get_search_term()
+        if search_term and self.list_where is None:
+            self.start_search(search_term)
+
+    def show_search(self, search_term, rows):
+        tasks = self.model.from_rows(rows)
+        self.search_results = (search_term, tasks)
+        self.render_tasks(tasks)
+
+    def render_tasks(self, tasks, order="deadline"):
+        self.list_order = order
+        self.task_list.set_rows(tasks)
+        filtered = self.list_where is not None or not isinstance(tasks, TaskPages)
+        self.match_label.config(text=f"{len(tasks):,} matching" if filtered and self.get_search_term() else "")
+
+    def format_rows(self, tasks):
+        # Called by the task list only for the rows it is about to show; the
+        # text is cached on each record until the record changes
+        colors = self.classifier.classify_rows(tasks)
+        order = self.list_order
+        return [(task.rendered(order, self.task_text), color) for task, color in zip(tasks, colors)]
+
+    def task_text(self, task):
+        status = "✔" if task.completed else "✘"
+        time_info = ""
+        duration = task.duration
+        if duration is not None:
+            elapsed = task.elapsed_time or 0
+            if self.list_order == "color":
+                if elapsed > 0:
+                    hours = elapsed // 3600
+                    minutes = (elapsed % 3600) // 60
+                    time_info = f", Time: {hours}h{minutes}m"
+                    if duration > 0:
+                        percentage = min(100, int((elapsed / duration) * 100))
+                        time_info += f" ({percentage}%)"
+            else:
+                duration_str = self.format_time(duration)
+                elapsed_str = self.format_time(elapsed)
+                time_info = f", Duration: {duration_str}"
+                if elapsed > 0:
+                    percentage = min(100, int((elapsed / duration) * 100))
+                    time_info += f" (Progress: {elapsed_str} - {percentage}%)"
+
+        return f"{status} {task.title} (Deadline: {to_display(task.deadline)}, Priority: {task.priority}{time_info})"
+
+    def sort_by_color(self):
+        self.show_list("color")
+
+    def on_focus(self, event):
+        if event.widget is not self.root:
+            return
+
+        def check(data_version):
+            if data_version != self.model.data_version:
+                self.reload(data_version=data_version)
+        # Read on the writer's connection, the one the baseline came from
+        self.executor.write(self.store.data_version, callback=check, key="data_version")
+
+    def write_tasks(self, task_ids, fn):
+        # Runs fn(conn) on the writer thread, then patches the rows with what was committed
+        task_ids = list(task_ids)
+        archived = self.include_archived.get()
+        read_back = self.read_back()
+
+        def job(conn):
+            if archived:
+                # Archived search results are moved back before they are changed
+                self.store.restore_tasks(task_ids, conn)
+            fn(conn)
+            return read_back(task_ids, conn)
+        self.executor.write(job, callback=self.refresh_tasks, error=self.show_error)
+
+    def timer_write(self, fn, task_ids):
+        # The timer engine's writes; the rows they change are refreshed once committed
+        task_ids = list(task_ids)
+        read_back = self.read_back()
+
+        def job(conn):
+            fn(conn)
+            return read_back(task_ids, conn)
+        self.executor.write(job, callback=self.refresh_tasks, error=self.show_error)
+
+    def list_pages(self):
+        # The TaskPages the list is showing, None while it shows search results
+        rows = self.task_list.rows
+        return rows if isinstance(rows, TaskPages) else None
+
+    def read_back(self):
+        # A job step for the writer, run after a write: everything refresh_tasks
+        # needs to patch the list without querying on the Tk thread, read in the
+        # write's own transaction. That is the tasks as committed (None if
+        # deleted), the ids among them the list's filter matches and the list's
+        # new total, for the filter and pages the list has now.
+        where, pages = self.list_where, self.list_pages()
+
+        def read(task_ids, conn):
+            rows = self.store.get_tasks(task_ids, conn)
+            shown = None
+            if where is not None:
+                shown = self.store.matching_ids([task_id for task_id, row in rows.items() if row], where, conn)
+            total = pages.count(conn) if pages is not None and not pages.exhausted else None
+            return rows, where, pages, shown, total
+        return read
+
+    def read_tasks_back(self, task_ids):
+        # Queued behind the writes, so it reads what they committed
+        read_back, task_ids = self.read_back(), list(task_ids)
+        self.executor.write(lambda conn: read_back(task_ids, conn), callback=self.refresh_tasks,
+                            error=self.show_error)
+
+    def show_error(self, error):
+        messagebox.showerror("Error", str(error))
+
+    def refresh_task(self, task_id, row, shown, total):
+        # Patches the one row that changed instead of reloading the whole list;
+        # `row` is the task as just committed
+        self.search_results = None
+        if self.reloading is not None:
+            self.reloading.add(task_id)
+        rows = self.task_list.rows
+        sort_key = self.model.sort_key(self.list_order)
+        index = self.task_list.index_of(task_id)
+        old_key = sort_key(rows[index]) if index is not None else None
+        old_deadline, task = self.model.invalidate(task_id, row)
+        paged = isinstance(rows, TaskPages)
+        if paged:
+            rows.recount(total)
+        if self.reminders.task_changed(task):
+            self.schedule_reminders()
+        # The task's old and new dates are the only ones whose calendar entry can change
+        changed_dates = {deadline for deadline in (old_deadline, task and task.deadline) if deadline}
+        if task is not None and not self.visible([task], shown):
+            task = None
+
+        if task is None:
+            if index is not None:
+                self.task_list.delete_row(index)
+        elif index is not None and old_key == sort_key(task):
+            self.task_list.update_row(index, task)
+        else:
+            if index is not None:
+                self.task_list.delete_row(index)
+            if paged:
+                index = rows.position(task, sort_key)
+            else:
+                index = bisect.bisect_right(rows, sort_key(task), key=sort_key)
+            if index is not None:
+                self.task_list.insert_row(index, task)
+                self.task_list.see(index)
+
+        if self.current_view == "calendar":
+            self.update_calendar_view(changed_dates)
+
+    def refresh_tasks(self, result):
+        # Bulk counterpart of refresh_task for what read_back returned: every
+        # row is patched in the model, then the list is redrawn once
+        rows, where, pages, shown, total = result
+        if where != self.list_where or pages is not self.list_pages():
+            # The list changed filter or reloaded since the write was queued:
+            # its matches and total are read again for the list as it is now
+            return self.read_tasks_back(rows)
+        if len(rows) <= 1:
+            for task_id, row in rows.items():
+                self.refresh_task(task_id, row, shown, total)
+            return
+        self.search_results = None
+        if self.reloading is not None:
+            self.reloading.update(rows)
+        changed_dates = set()
+        records = []
+        reschedule = False
+        for task_id, row in rows.items():
+            old_deadline, task = self.model.invalidate(task_id, row)
+            reschedule = self.reminders.task_changed(task) or reschedule
+            changed_dates.update(deadline for deadline in (old_deadline, task and task.deadline) if deadline)
+            if task is None:
+                self.task_list.selected.discard(task_id)
+            else:
+                records.append(task)
+        records = self.visible(records, shown)
+        if reschedule:
+            self.schedule_reminders()
+
+        tasks = self.task_list.rows
+        sort_key = self.model.sort_key(self.list_order)
+        kept = [task for task in tasks if task.id not in rows]
+        if isinstance(tasks, TaskPages):
+            tasks.merge(kept, records, sort_key, total)
+        else:
+            tasks = sorted(kept + records, key=sort_key)
+        self.task_list.set_rows(tasks)
+
+        if self.current_view == "calendar":
+            self.update_calendar_view(changed_dates)
+
+    def selected_task_ids(self, action):
+        sel = self.task_list.curselection()
+        if not sel:
+            messagebox.showwarning("ERROR", f"Select a task to {action}!")
+            return []
+        return [self.displayed_task_ids[index] for index in sel]
+
+    def task_action(self, action_type):
+        task_ids = self.selected_task_ids(action_type)
+        if not task_ids:
+            return
+        if action_type == "delete":
+            if len(task_ids) > 1 and not messagebox.askyesno("Delete tasks", f"Delete {len(task_ids)} tasks?"):
+                return
+            self.write_tasks(task_ids, lambda conn: self.store.delete_tasks(task_ids, conn))
+        elif action_type == "complete":
+            self.write_tasks(task_ids, lambda conn: self.store.update_tasks(task_ids, {"completed": 1}, conn))
+        elif action_type == "edit":
+            # Titles are edited one at a time: the first selected task
+            task_id = task_ids[0]
+            self.executor.read(lambda conn: self.store.get_title(task_id, conn),
+                               callback=lambda title: self.ask_title(task_id, title), error=self.show_error)
+
+    def ask_title(self, task_id, current_title):
+        new_title = simpledialog.askstring("Edit the task", "Modify the task:", initialvalue=current_title)
+        if new_title:
+            self.write_tasks([task_id], lambda conn: self.store.update_title(task_id, new_title, conn))
+
+    def delete_task(self): self.task_action("delete")
+    def complete_task(self): self.task_action("complete")
+    def edit_task(self): self.task_action("edit")
+
+    def edit_deadline(self):
+        task_ids = self.selected_task_ids("edit deadline")
+        if task_ids:
+            # Create a top-level window for the date picker
+            top = tk.Toplevel(self.root)
+            top.title("Edit Deadline")
+            top.geometry("300x150")
+            
+            # Add a date entry widget
+            date_label = ttk.Label(top, text="Select new deadline:")
+            date_label.pack(pady=10)
+            date_picker = tkcalendar().DateEntry(top, width=12, background='darkblue',
+                                                 foreground='white', borderwidth=2,
+                                                 date_pattern='dd-mm-yyyy')
+            date_picker.pack(pady=10)
+            
+            def update_deadline():
+                new_deadline = date_picker.get_date()
+                if new_deadline < datetime.today().date():
+                    messagebox.showerror("Invalid Date", "Deadline cannot be in the past!")
+                    return
+                self.write_tasks(task_ids, lambda conn: self.store.update_tasks(
+                    task_ids, {"deadline": new_deadline.isoformat()}, conn))
+                top.destroy()
+            
+            # Add confirmation button
+            ttk.Button(top, text="Update Deadline", command=update_deadline).pack(pady=10)
+            
+            # Center the window
+            top.transient(self.root)
+            top.grab_set()
+            self.root.wait_window(top)
+
+    def export_csv(self):
+        path = filedialog.asksaveasfilename(
+            title="Export tasks", initialfile="tasks.csv", defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines", "*.jsonl"),
+                       ("Gzipped CSV", "*.csv.gz"), ("Gzipped JSON Lines", "*.jsonl.gz")])
+        if not path:
+            return
+        filters = self.ask_export_filters()
+        if filters is None:
+            return
+
+        def done(written):
+            messagebox.showinfo("Success", f"Exported {written} tasks successfully!")
+
+        self.run_with_progress(
+            "Exporting tasks",
+            lambda progress, cancel, conn: export_tasks(self.store, path, progress=progress, cancel=cancel,
+                                                        conn=conn, **filters),
+            done, "Exported")
+
+    def filter_form(self, top):
+        # Status, priority and deadline range inputs; returns a function that reads
+        # them as TaskStore.filter_sql keywords, raising ValueError on a bad date
+        form = ttk.Frame(top)
+        form.pack(pady=10)
+
+        status_var = tk.StringVar(value="All")
+        ttk.Label(form, text="Status:").grid(row=0, column=0, padx=5, pady=3, sticky="w")
+        ttk.Combobox(form, textvariable=status_var, values=["All", "Open", "Overdue", "Completed"],
+                     state="readonly", width=12).grid(row=0, column=1, columnspan=3, pady=3, sticky="w")
+
+        ttk.Label(form, text="Priority:").grid(row=1, column=0, padx=5, pady=3, sticky="w")
+        priority_vars = {}
+        for i, priority in enumerate(("Low", "Medium", "High")):
+            priority_vars[priority] = tk.BooleanVar(value=True)
+            ttk.Checkbutton(form, text=priority, variable=priority_vars[priority]).grid(row=1, column=1 + i, sticky="w")
+
+        from_var, to_var = tk.StringVar(), tk.StringVar()
+        ttk.Label(form, text="From (DD-MM-YYYY):").grid(row=2, column=0, padx=5, pady=3, sticky="w")
+        ttk.Entry(form, textvariable=from_var, width=12).grid(row=2, column=1, columnspan=3, pady=3, sticky="w")
+        ttk.Label(form, text="To (DD-MM-YYYY):").grid(row=3, column=0, padx=5, pady=3, sticky="w")
+        ttk.Entry(form, textvariable=to_var, width=12).grid(row=3, column=1, columnspan=3, pady=3, sticky="w")
+
+        def read():
+            start, end = [datetime.strptime(var.get().strip(), self.date_format).date().isoformat()
+                          if var.get().strip() else None for var in (from_var, to_var)]
+            status = status_var.get()
+            return dict(
+                status=None if status == "All" else status.lower(),
+                start=start, end=end,
+                priorities=[p for p, var in priority_vars.items() if var.get()]
+            )
+        return read
+
+    def ask_export_filters(self):
+        top = tk.Toplevel(self.root)
+        top.title("Export Filter")
+        top.geometry("300x230")
+        read_filters = self.filter_form(top)
+        filters = {}
+
+        def accept():
+            try:
+                chosen = read_filters()
+            except ValueError as e:
+                return messagebox.showerror("Invalid Date", str(e))
+            if not chosen["priorities"]:
+                return messagebox.showerror("Invalid Input", "Select at least one priority", parent=top)
+            filters.update(chosen)
+            top.destroy()
+
+        button_frame = ttk.Frame(top)
+        button_frame.pack(pady=10)
+        ttk.Button(button_frame, text="Export", command=accept).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Cancel", command=top.destroy).pack(side=tk.LEFT, padx=5)
+
+        top.transient(self.root)
+        top.grab_set()
+        self.root.wait_window(top)
+        return filters or None
+
+    def set_task_priority(self):
+        task_ids = self.selected_task_ids("set priority")
+        if not task_ids:
+            return
+        top = tk.Toplevel(self.root)
+        top.title("Set Priority")
+        top.geometry("250x120")
+        priority_var = tk.StringVar(value="Medium")
+        tk.OptionMenu(top, priority_var, "Low", "Medium", "High").pack(pady=10)
+
+        def update_priority():
+            priority = priority_var.get()
+            self.write_tasks(task_ids, lambda conn: self.store.update_tasks(task_ids, {"priority": priority}, conn))
+            top.destroy()
+
+        ttk.Button(top, text="Update Priority", command=update_priority).pack(pady=10)
+        top.transient(self.root)
+        top.grab_set()
+        self.root.wait_window(top)
+
+    def bulk_edit(self):
+        # One change applied to every task matching a filter, as a single SQL
+        # statement, e.g. completing every overdue Low task
+        top = tk.Toplevel(self.root)
+        top.title("Bulk Edit")
+        top.geometry("340x300")
+        read_filters = self.filter_form(top)
+
+        action_frame = ttk.Frame(top)
+        action_frame.pack(pady=5)
+        action_var, value_var = tk.StringVar(value="Complete"), tk.StringVar()
+        ttk.Label(action_frame, text="Action:").grid(row=0, column=0, padx=5, pady=3, sticky="w")
+        ttk.Combobox(action_frame, textvariable=action_var, state="readonly", width=16,
+                     values=["Complete", "Delete", "Set priority", "Reschedule", "Set duration"]
+                     ).grid(row=0, column=1, pady=3, sticky="w")
+        ttk.Label(action_frame, text="Value:").grid(row=1, column=0, padx=5, pady=3, sticky="w")
+        ttk.Entry(action_frame, textvariable=value_var, width=18).grid(row=1, column=1, pady=3, sticky="w")
+        ttk.Label(action_frame, text="Priority: Low/Medium/High, deadline: DD-MM-YYYY, duration: minutes",
+                  wraplength=300).grid(row=2, column=0, columnspan=2, pady=3)
+
+        def apply():
+            action = action_var.get()
+            try:
+                filters = read_filters()
+                values = self.bulk_values(action, value_var.get().strip())
+            except ValueError as e:
+                return messagebox.showerror("Invalid Input", str(e), parent=top)
+            if not filters["priorities"]:
+                return messagebox.showerror("Invalid Input", "Select at least one priority", parent=top)
+            self.executor.read(lambda conn: self.store.count_tasks(conn, **filters), key="bulk_count",
+                               callback=lambda count: confirm(action, filters, values, count),
+                               error=self.show_error)
+
+        def confirm(action, filters, values, count):
+            if not top.winfo_exists():
+                return  # cancelled while counting
+            if not count:
+                return messagebox.showinfo("Bulk Edit", "No tasks match the filter.", parent=top)
+            if not messagebox.askyesno("Bulk Edit", f"{action} {count} tasks?", parent=top):
+                return
+            top.destroy()
+            if values is None:
+                job = lambda conn: self.store.delete_matching(conn, **filters)
+            else:
+                job = lambda conn: self.store.update_matching(values, conn, **filters)
+            self.executor.write(job, callback=lambda count: self.bulk_done(count, values), error=self.show_error)
+
+        button_frame = ttk.Frame(top)
+        button_frame.pack(pady=10)
+        ttk.Button(button_frame, text="Apply", command=apply).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Cancel", command=top.destroy).pack(side=tk.LEFT, padx=5)
+        top.transient(self.root)
+        top.grab_set()
+        self.root.wait_window(top)
+
+    def bulk_values(self, action, value):
+        # The {column: value} a bulk action sets; None for Delete
+        if action == "Delete":
+            return None
+        if action == "Complete":
+            return {"completed": 1}
+        if action == "Set priority":
+            priority = value.capitalize()
+            if priority not in ("Low", "Medium", "High"):
+                raise ValueError("Priority must be Low, Medium or High")
+            return {"priority": priority}
+        if action == "Reschedule":
+            deadline = datetime.strptime(value, self.date_format).date()
+            if deadline < datetime.today().date():
+                raise ValueError("Deadline cannot be in the past!")
+            return {"deadline": deadline.isoformat()}
+        minutes = int(value)
+        if minutes < 0:
+            raise ValueError("Duration cannot be negative")
+        return {"duration": minutes * 60}
+
+    def bulk_done(self, count, values):
+        # Too many rows may have changed to patch one by one: the cached records
+        # are dropped and the list reopens at its first page
+        self.model.clear()
+        if values and "deadline" in values:
+            self.reminders.recheck(date.fromisoformat(values["deadline"]))
+        self.reload(then=self.seed_reminders)
+        messagebox.showinfo("Bulk Edit", f"Changed {count} tasks.")
+
+    def import_csv(self):
+        path = filedialog.askopenfilename(title="Import tasks", initialfile="tasks.csv",
+                                          filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not path:
+            return
+
+        def done(result):
+            if result.imported:
+                # Imported tasks may be due or overdue already
+                self.reminders.recheck()
+            self.reload(then=self.seed_reminders)
+            text = f"Imported {result.imported} tasks."
+            if result.cancelled:
+                text = f"Import cancelled after {result.imported} tasks."
+            if result.rejected:
+                text += f"\n{result.rejected} invalid rows were written to {result.reject_path}"
+            messagebox.showinfo("Success", text)
+
+        self.run_with_progress(
+            "Importing tasks",
+            lambda progress, cancel, conn: import_csv(self.store, path, progress=progress, cancel=cancel, conn=conn),
+            done, "Imported", write=True)
+
+    def run_with_progress(self, title, work, on_done, verb, write=False):
+        # Runs work(progress, cancel, conn) on the executor's writer or a reader
+        # behind a progress window with a Cancel button; on_done(result) is
+        # called back on the Tk thread
+        top = tk.Toplevel(self.root)
+        top.title(title)
+        top.geometry("320x130")
+        status_label = ttk.Label(top, text=f"{title}...")
+        status_label.pack(pady=10)
+        progress_bar = ttk.Progressbar(top, length=280, maximum=1.0)
+        progress_bar.pack(pady=5)
+        cancel = threading.Event()
+        ttk.Button(top, text="Cancel", command=cancel.set).pack(pady=5)
+        top.protocol("WM_DELETE_WINDOW", cancel.set)
+        top.transient(self.root)
+
+        updates = queue.Queue()
+        finished = []
+
+        def poll():
+            if finished:
+                return
+            update = None
+            while True:
+                try:
+                    update = updates.get_nowait()
+                except queue.Empty:
+                    break
+            if update:
+                progress_bar["value"] = update[0]
+                status_label.config(text=f"{verb} {update[1]} tasks...")
+            self.root.after(100, poll)
+
+        def done(result):
+            finished.append(True)
+            top.destroy()
+            on_done(result)
+
+        def failed(error):
+            finished.append(True)
+            top.destroy()
+            messagebox.showerror("Error", f"{title} failed: {error}")
+
+        submit = self.executor.write if write else self.executor.read
+        submit(lambda conn: work(lambda fraction, count: updates.put((fraction, count)), cancel, conn),
+               callback=done, error=failed)
+        self.root.after(100, poll)
+
+    def seed_reminders(self):
+        # The deadline days are read on a reader and merged into the heap
+        self.executor.read(self.reminders.deadline_days, error=self.show_error,
+                           callback=lambda deadlines: (self.reminders.add_deadlines(deadlines),
+                                                       self.schedule_reminders()))
+
+    def check_reminders(self):
+        self.reminder_after_id = None
+        if self.pages is not None and self.pages.stale():
+            self.reload()
+        due = self.reminders.due()
+        if due:
+            self.executor.read(lambda conn: self.reminders.read_notice(due, conn), callback=self.show_reminder,
+                               error=self.show_error)
+        self.schedule_reminders()
+
+    def show_reminder(self, notice):
+        if notice:
+            self.reminder_label.config(text=notice.message())
+            self.reminder_frame.grid()
+            self.root.bell()
+
+    def schedule_reminders(self):
+        # Sleep until the next deadline boundary; the extra second lands the wake-up past midnight
+        if self.reminder_after_id is not None:
+            self.root.after_cancel(self.reminder_after_id)
+        delay = int(self.reminders.seconds_until_next() * 1000) + 1000
+        self.reminder_after_id = self.root.after(delay, self.check_reminders)
+
+    # Idle maintenance: completed tasks older than archive_days move to the
+    # archive a batch per write, so the list, calendar and reminders only read
+    # the working set; then freed pages are vacuumed and statistics refreshed
+
+    def note_input(self, event):
+        self.last_input = time.monotonic()
+
+    def schedule_maintenance(self, delay=MAINTENANCE_INTERVAL_MS):
+        self.maintenance_after_id = self.root.after(delay, self.run_maintenance)
+
+    def run_maintenance(self, archived=0):
+        self.maintenance_after_id = None
+        if time.monotonic() - self.last_input < IDLE_SECONDS:
+            self.schedule_maintenance(IDLE_SECONDS * 1000)
+            return
+        if self.archive_days <= 0:
+            self.archive_done(0, 0)
+            return
+        before = (date.today() - timedelta(days=self.archive_days)).isoformat()
+        self.executor.write(lambda conn: self.store.archive_completed(before, conn=conn),
+                            callback=lambda moved: self.archive_done(archived + moved, moved),
+                            error=self.show_error)
+
+    def archive_done(self, archived, moved):
+        if moved >= ARCHIVE_BATCH:
+            # A full batch, so there may be more; input queued meanwhile goes first
+            self.maintenance_after_id = self.root.after_idle(lambda: self.run_maintenance(archived))
+            return
+        if archived:
+            # Archived rows may be among the loaded pages
+            self.model.clear()
+            self.reload()
+        self.executor.write(lambda conn: self.store.compact(conn=conn),
+                            callback=lambda free: self.schedule_maintenance(), error=self.show_error)
+
+    def build_calendar(self):
+        self.calendar = tkcalendar().Calendar(self.calendar_frame, selectmode='none', date_pattern='dd-mm-yyyy')
+        self.calendar.pack(fill=tk.BOTH, expand=True)
+        self.calendar.bind("<<CalendarMonthChanged>>", lambda e: self.update_calendar_view())
+
+    def toggle_view(self):
+        if self.current_view == "list":
+            if self.calendar is None:
+                self.build_calendar()
+            self.list_frame.grid_remove()
+            self.calendar_frame.grid()
+            self.current_view = "calendar"
+            self.view_button.config(text="Show List View")
+            self.update_calendar_view()
+        else:
+            self.calendar_frame.grid_remove()
+            self.list_frame.grid()
+            self.current_view = "list"
+            self.view_button.config(text="Show Calendar View")
+            self.load_tasks()
+    
+    def calendar_range(self):
+        # The displayed month plus one month either side
+        month, year = self.calendar.get_displayed_month()
+        first_day = (date(year, month, 1) - timedelta(days=1)).replace(day=1)
+        last_day = (date(year, month, 1) + timedelta(days=62)).replace(day=1) - timedelta(days=1)
+        return first_day.isoformat(), last_day.isoformat()
+
+    def update_calendar_view(self, dates=None):
+        # The displayed range is summarized on a reader thread; a newer full
+        # refresh (e.g. the month changed again) supersedes a pending one
+        if dates is None:
+            first_day, last_day = self.calendar_range()
+            self.executor.read(lambda conn: self.store.calendar_summary(first_day, last_day, conn),
+                               callback=self.show_calendar, error=self.show_error, key="calendar")
+        else:
+            dates = set(dates)
+            self.executor.read(lambda conn: [entry for deadline in dates
+                                             for entry in self.store.calendar_summary(deadline, deadline, conn)],
+                               callback=lambda summary: self.show_calendar(summary, dates), error=self.show_error)
+
+    def show_calendar(self, summary, dates=None):
+        # Only dates whose summary changed get their calevent replaced
+        if dates is None:
+            stale = set(self.calendar_events)
+        else:
+            stale = dates & set(self.calendar_events)
+
+        for deadline, highest_priority, combined_title in summary:
+            stale.discard(deadline)
+            try:
+                deadline_date = date.fromisoformat(deadline)
+            except ValueError:
+                continue
+            # Determine color based on highest priority task
+            all_completed = highest_priority is None
+            color = self.classifier.classify(deadline, highest_priority or "Low", all_completed)
+            event = self.calendar_events.get(deadline)
+            if event and event[1:] == (combined_title, color):
+                continue
+            if event:
+                self.calendar.calevent_remove(event[0])
+
+            # One tag per color, configured the first time it is used
+            tag = f"color_{color}"
+            if tag not in self.calendar_tags:
+                self.calendar.tag_config(tag, background=color)
+                self.calendar_tags.add(tag)
+            event_id = self.calendar.calevent_create(deadline_date, combined_title, tags=[tag])
+            self.calendar_events[deadline] = (event_id, combined_title, color)
+
+        for deadline in stale:
+            self.calendar.calevent_remove(self.calendar_events.pop(deadline)[0])
+
+    def set_task_duration(self):
+        task_ids = self.selected_task_ids("set duration")
+        if task_ids:
+            # Create a top-level window for duration input
+            top = tk.Toplevel(self.root)
+            top.title("Set Task Duration")
+            top.geometry("300x200")
+            
+            # Add input fields for hours, minutes, and seconds
+            input_frame = ttk.Frame(top)
+            input_frame.pack(pady=10)
+            
+            hours_var = tk.StringVar(value="0")
+            minutes_var = tk.StringVar(value="0")
+            seconds_var = tk.StringVar(value="0")
+            
+            # Hours
+            ttk.Label(input_frame, text="Hours:").grid(row=0, column=0, padx=5)
+            ttk.Entry(input_frame, textvariable=hours_var, width=10).grid(row=0, column=1, padx=5)
+            
+            # Minutes
+            ttk.Label(input_frame, text="Minutes:").grid(row=1, column=0, padx=5, pady=5)
+            ttk.Entry(input_frame, textvariable=minutes_var, width=10).grid(row=1, column=1, padx=5, pady=5)
+            
+            # Seconds
+            ttk.Label(input_frame, text="Seconds:").grid(row=2, column=0, padx=5)
+            ttk.Entry(input_frame, textvariable=seconds_var, width=10).grid(row=2, column=1, padx=5)
+            
+            def set_duration():
+                try:
+                    hours = int(hours_var.get())
+                    minutes = int(minutes_var.get())
+                    seconds = int(seconds_var.get())
+                    
+                    if hours < 0 or minutes < 0 or seconds < 0:
+                        raise ValueError("Time values cannot be negative")
+                    if minutes >= 60 or seconds >= 60:
+                        raise ValueError("Minutes and seconds must be less than 60")
+                        
+                    total_seconds = hours * 3600 + minutes * 60 + seconds
+                    self.write_tasks(task_ids, lambda conn: self.store.update_tasks(
+                        task_ids, {"duration": total_seconds}, conn))
+                    top.destroy()
+                except ValueError as e:
+                    messagebox.showerror("Invalid Input", str(e))
+            
+            def set_unknown():
+                self.write_tasks(task_ids, lambda conn: self.store.update_tasks(task_ids, {"duration": None}, conn))
+                top.destroy()
+            
+            # Add buttons
+            button_frame = ttk.Frame(top)
+            button_frame.pack(pady=10)
+            ttk.Button(button_frame, text="Set Duration", command=set_duration).pack(side=tk.LEFT, padx=5)
+            ttk.Button(button_frame, text="Unknown Duration", command=set_unknown).pack(side=tk.LEFT, padx=5)
+            ttk.Button(button_frame, text="Cancel", command=top.destroy).pack(side=tk.LEFT, padx=5)
+            
+            # Center the window
+            top.transient(self.root)
+            top.grab_set()
+            self.root.wait_window(top)
+
+    def toggle_timer(self):
+        task_ids = self.selected_task_ids("toggle timer")
+        if not task_ids:
+            return
+
+        # Selected timers that run are stopped together, the others started;
+        # timers of tasks that aren't selected keep running
+        running = [task_id for task_id in task_ids if self.timer.is_running(task_id)]
+        if running:
+            self.stop_timer(*running)
+        starting = [task_id for task_id in task_ids if task_id not in running]
+        if not starting:
+            return self.update_timer_label()
+        # Read on the writer, behind any timer write still queued for these tasks
+        self.executor.write(lambda conn: {task_id: self.store.timer_task(task_id, conn) for task_id in starting},
+                            callback=self.start_timers, error=self.show_error)
+
+    def start_timers(self, tasks):
+        # {id: timer_task row, None if the task is gone}
+        started = False
+        for task_id, task in tasks.items():
+            if self.timer.start(task_id, task):
+                self.last_timer_id = task_id
+                started = True
+        if started and self.timer_after_id is None:
+            self.update_timer()
+        else:
+            self.update_timer_label()
+
+    def stop_timer(self, *task_ids):
+        stopped = self.timer.stop_many(task_ids)
+        if not len(self.timer):
+            self.cancel_timer_tick()
+        self.update_timer_label()
+        titles = ", ".join(session.title for session, elapsed, finished in stopped if finished)
+        if titles:
+            messagebox.showinfo("Congratulations!", f"You have completed the task: {titles}!")
+        # The tasks' rows are refreshed once the engine's write has committed
+
+    def cancel_timer_tick(self):
+        if self.timer_after_id is not None:
+            self.root.after_cancel(self.timer_after_id)
+            self.timer_after_id = None
+
+    def update_timer(self):
+        # One tick drives every running timer, from memory; the engine only writes at checkpoints
+        self.timer_after_id = None
+        completed = self.timer.tick()
+
+        # Only rows currently materialized in the list need new progress text;
+        # other records catch up when the timer's writes refresh them
+        task_list = self.task_list
+        for index in range(task_list.start, task_list.end):
+            task = task_list.rows[index]
+            if self.timer.is_running(task.id):
+                self.model.set_elapsed(task.id, self.timer.elapsed(task.id))
+                task_list.update_row(index, task)
+
+        self.update_timer_label()
+        if len(self.timer):
+            self.timer_after_id = self.root.after(1000, self.update_timer)
+
+        # Show congratulations message when tasks are completed
+        if completed:
+            titles = ", ".join(session.title for session in completed)
+            messagebox.showinfo("Congratulations!", f"You have completed the task: {titles}!")
+
+    def update_timer_label(self):
+        running = len(self.timer)
+        if not running:
+            self.timer_label.config(text="No active timer")
+            return
+        session = self.timer.sessions.get(self.last_timer_id) or next(iter(self.timer.sessions.values()))
+        total_elapsed = self.timer.elapsed(session.task_id)
+        hours = total_elapsed // 3600
+        minutes = (total_elapsed % 3600) // 60
+        seconds = total_elapsed % 60
+        timer_text = f"Timer for '{session.title}': {hours:02d}:{minutes:02d}:{seconds:02d}"
+        if session.duration:
+            percentage = min(100, int((total_elapsed / session.duration) * 100))
+            timer_text += f" ({percentage}%)"
+        if running > 1:
+            timer_text += f" and {running - 1} more running"
+        self.timer_label.config(text=timer_text)
+
+    def show_recovered_timers(self, recovered):
+        if recovered:
+            names = ", ".join(f"'{title}' ({self.format_time(elapsed)})" for task_id, title, elapsed in recovered)
+            self.timer_label.config(text=f"Recovered interrupted timer: {names}")
+
+    def show_time_report(self):
+        # Time tracked per day, week or priority; read from the rollup tables,
+        # so it costs the same however many timer sessions there have been
+        top = tk.Toplevel(self.root)
+        top.title("Time Report")
+        top.geometry("520x420")
+        period_var, group_var = tk.StringVar(value="week"), tk.StringVar(value="day")
+        options = ttk.Frame(top)
+        options.pack(pady=5)
+        ttk.Label(options, text="Period:").pack(side=tk.LEFT)
+        period_menu = ttk.Combobox(options, textvariable=period_var, values=PERIODS, state="readonly", width=8)
+        period_menu.pack(side=tk.LEFT, padx=5)
+        ttk.Label(options, text="By:").pack(side=tk.LEFT)
+        group_menu = ttk.Combobox(options, textvariable=group_var, values=REPORT_GROUPS, state="readonly", width=8)
+        group_menu.pack(side=tk.LEFT, padx=5)
+        columns = [("when", 120), ("priority", 100), ("time", 120), ("sessions", 80)]
+        tree = ttk.Treeview(top, columns=[name for name, width in columns], show="headings")
+        for name, width in columns:
+            tree.heading(name, text=name.title())
+            tree.column(name, width=width, anchor="w" if name in ("when", "priority") else "e")
+        tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        total_label = ttk.Label(top)
+        total_label.pack(pady=5)
+
+        def show(rows):
+            if not top.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            for key, priority, seconds, sessions in rows:
+                tree.insert("", tk.END, values=(to_display(key) if key else "", priority or "(none)",
+                                                self.format_time(seconds), sessions))
+            total_label.config(text=f"Total: {self.format_time(sum(row[2] for row in rows))}")
+
+        def refresh(event=None):
+            group = group_var.get()
+            first, last = period_range(period_var.get())
+            self.executor.read(lambda conn: self.store.time_report(group, first, last, conn), key="time_report",
+                               callback=show, error=self.show_error)
+
+        period_menu.bind("<<ComboboxSelected>>", refresh)
+        group_menu.bind("<<ComboboxSelected>>", refresh)
+        ttk.Button(top, text="Refresh", command=refresh).pack(pady=5)
+        refresh()
+
+    def show_stats(self):
+        top = tk.Toplevel(self.root)
+        top.title("Performance Stats")
+        top.geometry("800x420")
+        columns = [("category", 70), ("name", 340), ("count", 60), ("total ms", 80),
+                   ("mean ms", 70), ("max ms", 70), ("slow", 50)]
+        tree = ttk.Treeview(top, columns=[name for name, width in columns], show="headings")
+        for name, width in columns:
+            tree.heading(name, text=name.title())
+            tree.column(name, width=width, anchor="w" if name in ("category", "name") else "e")
+        tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        lag_label = ttk.Label(top)
+        lag_label.pack(pady=5)
+
+        def refresh():
+            tree.delete(*tree.get_children())
+            for category, name, count, total, mean, max_ms, slow in self.profiler.summary():
+                tree.insert("", tk.END, values=(category, name, count, f"{total:.1f}", f"{mean:.2f}",
+                                                f"{max_ms:.1f}", slow))
+            lag_label.config(text=f"Main loop: worst delay {self.profiler.lag_max:.0f} ms, "
+                                  f"{self.profiler.lag_late} stalls over {self.profiler.slow_ms:.0f} ms")
+
+        def reset():
+            self.profiler.reset()
+            refresh()
+
+        def save():
+            path = filedialog.asksaveasfilename(title="Save trace", initialfile="trace.json",
+                                                defaultextension=".json", filetypes=[("Chrome trace", "*.json")])
+            if path:
+                self.profiler.dump(path)
+                messagebox.showinfo("Success", f"Trace saved to {path}")
+
+        button_frame = ttk.Frame(top)
+        button_frame.pack(pady=5)
+        ttk.Button(button_frame, text="Refresh", command=refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Reset", command=reset).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Save Trace", command=save).pack(side=tk.LEFT, padx=5)
+        refresh()
+
+    def on_close(self):
+        # The timers' final write is queued before the executor drains the writer
+        self.timer.shutdown()
+        if self.maintenance_after_id is not None:
+            self.root.after_cancel(self.maintenance_after_id)
+        self.executor.shutdown()
+        self.store.close()
+        if self.profiler and self.profiler.trace_path:
+            self.profiler.dump()
+        self.root.destroy()
+
+
+def main(argv, started=STARTED):
+    profiler = Profiler.from_environment(argv)
+    measure_startup = "--startup-time" in argv or bool(os.environ.get(STARTUP_ENV))
+    page_size = int(os.environ.get(PAGE_SIZE_ENV) or PAGE_SIZE)
+    archive_days = int(os.environ.get(ARCHIVE_DAYS_ENV) or ARCHIVE_DAYS)
+    root = tk.Tk()
+    ToDoApp(root, profiler, measure_startup, page_size, started, archive_days)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,291 @@
+"""Headless benchmarks for the task engine.
+
+Generates synthetic todo.db files and times the store and page reads behind
+the UI's hot paths at each size. Every size runs in its own process, so
+peak RSS is per size. Results are written as JSON, and --compare prints the
+ratio to an earlier run. The run fails if CSV imports fall below
+--min-import-rate tasks per second.
+
+    python benchmark.py                          # 10k, 100k and 1M tasks
+    python benchmark.py --sizes 10000 --output bench.json
+    python benchmark.py --compare bench.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from task_store import TaskStore, DeadlineClassifier
+from task_model import TaskModel, TaskPages, PAGE_SIZE
+from reminders import ReminderScheduler
+from timer_engine import TimerEngine
+from task_io import import_csv, export_tasks
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+GENERATE_BATCH = 20000
+TIMERS_RUNNING = 10
+# Tasks per second a CSV import has to sustain; below it the run fails, so a
+# trigger or index that makes imports row-at-a-time again doesn't go unnoticed
+MIN_IMPORT_RATE = 15000
+
+WORDS = ["report", "email", "invoice", "meeting", "review", "draft", "call", "budget", "slides", "backup",
+         "deploy", "refactor", "tests", "docs", "groceries", "gym", "dentist", "taxes", "garden", "car"]
+VERBS = ["Write", "Send", "Prepare", "Finish", "Check", "Plan", "Fix", "Book", "Update", "Clean"]
+SEARCH_TERMS = ["budget", "fix the"]  # a trigram search and a two-word phrase
+
+
+class CountingStore(TaskStore):
+    """A TaskStore whose connections count the statements they run."""
+
+    def __init__(self, *args, **kwargs):
+        self.queries = 0
+        self.queries_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def connect(self):
+        conn = super().connect()
+        conn.set_trace_callback(self.count_query)
+        return conn
+
+    def count_query(self, sql):
+        # Statements run by triggers are reported as "-- TRIGGER ..." and aren't counted;
+        # executemany reports, and so counts, every row it executes
+        if not sql.startswith("--"):
+            with self.queries_lock:
+                self.queries += 1
+
+
+def synthetic_tasks(count, seed, today):
+    # Deadlines cluster around today with a long tail either side; past tasks are
+    # mostly done, about half have a duration and some of those have tracked time
+    rng = random.Random(seed)
+    for _ in range(count):
+        offset = int(rng.gauss(20, 60))
+        deadline = (today + timedelta(days=offset)).isoformat()
+        priority = rng.choices(("Low", "Medium", "High"), (3, 5, 2))[0]
+        completed = int(rng.random() < (0.85 if offset < 0 else 0.1))
+        duration = elapsed = None
+        if rng.random() < 0.5:
+            duration = rng.choice((15, 30, 45, 60, 90, 120, 240, 480)) * 60
+            elapsed = int(duration * rng.random()) if rng.random() < 0.4 else 0
+        title = f"{rng.choice(VERBS)} the {rng.choice(WORDS)} {rng.randrange(10000)}"
+        yield title, deadline, priority, completed, duration, elapsed or 0
+
+
+def generate(path, count, seed):
+    store = TaskStore(path)
+    tasks = synthetic_tasks(count, seed, date.today())
+    with store.bulk_load(store.conn):
+        while True:
+            batch = [task for _, task in zip(range(GENERATE_BATCH), tasks)]
+            if not batch:
+                break
+            store.insert_tasks(batch)
+    store.conn.execute("PRAGMA optimize")
+    store.close()
+
+
+def measure(store, fn, repeat, setup=None):
+    samples, queries = [], []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        before = store.queries
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+        queries.append(store.queries - before)
+    samples.sort()
+    return {
+        "runs": repeat,
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+        "min_ms": round(samples[0] * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+        "queries": round(sum(queries) / repeat, 1),
+    }
+
+
+def run_size(count, args):
+    # Runs in a child process: one size, one fresh copy of the generated database
+    os.makedirs(args.workdir, exist_ok=True)
+    source = os.path.join(args.workdir, f"bench-{count}-{args.seed}.db")
+    generate_s = None
+    if args.fresh or not os.path.exists(source):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(source + suffix):
+                os.remove(source + suffix)
+        start = time.perf_counter()
+        generate(source, count, args.seed)
+        generate_s = round(time.perf_counter() - start, 3)
+
+    scratch = tempfile.mkdtemp(dir=args.workdir)
+    path = os.path.join(scratch, "todo.db")
+    shutil.copyfile(source, path)
+    store = CountingStore(path)
+    classifier = DeadlineClassifier()
+    model = TaskModel(store, classifier)
+    ops = {}
+    light, heavy = args.repeat, args.heavy_repeat
+
+    # load_tasks / sort_by_color: what the UI's reload reads, a count and the
+    # first page, then the rows on screen. Cold starts from an empty model;
+    # afterwards the model already holds those records.
+    def open_list(order, model):
+        pages = TaskPages(model, order)
+        pages.start(pages.fetch_first())
+        return pages[:50]
+    ops["load_tasks_cold"] = measure(store, lambda: open_list("deadline", TaskModel(store, classifier)), heavy)
+    ops["load_tasks"] = measure(store, lambda: open_list("deadline", model), light)
+    for term in SEARCH_TERMS:
+        ops[f"load_tasks_search[{term}]"] = measure(
+            store, lambda: model.from_rows(store.search_tasks(term)), light)
+    ops["sort_by_color_cold"] = measure(store, lambda: open_list("color", TaskModel(store, classifier)), heavy)
+    ops["sort_by_color"] = measure(store, lambda: open_list("color", model), light)
+
+    # Scrolling: ten pages read one after another, as the list asks for them
+    def scroll(order):
+        pages = TaskPages(model, order)
+        pages.start(pages.fetch_first())
+        return pages[:PAGE_SIZE * 10]
+    ops["scroll_list"] = measure(store, lambda: scroll("deadline"), light)
+    ops["scroll_list_color"] = measure(store, lambda: scroll("color"), light)
+    middle = store.conn.execute("""
+        SELECT deadline, priority, id FROM tasks ORDER BY deadline ASC, priority DESC, id ASC LIMIT 1 OFFSET ?
+    """, (count // 2,)).fetchone()
+    ops["deadline_page_middle"] = measure(store, lambda: store.deadline_page(middle, PAGE_SIZE), light)
+
+    month = date.today().replace(day=1)
+    first_day = (month - timedelta(days=1)).replace(day=1).isoformat()
+    last_day = ((month + timedelta(days=62)).replace(day=1) - timedelta(days=1)).isoformat()
+    ops["update_calendar_view"] = measure(store, lambda: store.calendar_summary(first_day, last_day), light)
+
+    reminders = ReminderScheduler(store)
+
+    def check_reminders():
+        reminders.checked = None
+        reminders.seed()
+        reminders.collect()
+    ops["check_reminders"] = measure(store, check_reminders, light)
+
+    # update_timer: one tick with several timers running, on a simulated clock
+    now = [0.0]
+    engine = TimerEngine(store, clock=lambda: now[0])
+    for task_id, in store.conn.execute("SELECT id FROM tasks WHERE completed=0 AND duration IS NULL LIMIT ?",
+                                       (TIMERS_RUNNING,)):
+        engine.start(task_id)
+
+    def tick():
+        now[0] += 1
+        engine.tick()
+        for task_id in engine.sessions:
+            model.set_elapsed(task_id, engine.elapsed(task_id))
+    ops["update_timer"] = measure(store, tick, max(light, 60))
+    engine.shutdown()
+
+    export_path = os.path.join(scratch, "export.csv")
+    ops["export_csv"] = measure(store, lambda: export_tasks(store, export_path), heavy)
+    import_path = os.path.join(scratch, "import.db")
+
+    def fresh_import_db():
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(import_path + suffix):
+                os.remove(import_path + suffix)
+
+    def import_into_fresh_db():
+        target = CountingStore(import_path)
+        import_csv(target, export_path)
+        store.queries += target.queries
+        target.close()
+    ops["import_csv"] = measure(store, import_into_fresh_db, heavy, setup=fresh_import_db)
+    ops["import_csv"]["tasks_per_s"] = round(count / (ops["import_csv"]["p50_ms"] / 1000))
+
+    store.close()
+    shutil.rmtree(scratch, ignore_errors=True)
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return {"tasks": count, "generate_s": generate_s, "peak_rss_mb": round(peak_mb, 1), "ops": ops}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(report, baseline):
+    for size, result in report["sizes"].items():
+        old = baseline.get("sizes", {}).get(size)
+        if not old:
+            continue
+        print(f"{size} tasks (p50, this run / baseline):")
+        for name, stats in result["ops"].items():
+            before = old["ops"].get(name)
+            if before and before["p50_ms"]:
+                print(f"  {name:32} {stats['p50_ms']:10.3f} ms  x{stats['p50_ms'] / before['p50_ms']:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the task engine on synthetic databases")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=20, help="runs of each fast operation")
+    parser.add_argument("--heavy-repeat", type=int, default=3, help="runs of loads, imports and exports")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "todo-bench"),
+                        help="where generated databases are cached")
+    parser.add_argument("--fresh", action="store_true", help="regenerate cached databases")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--min-import-rate", type=int, default=MIN_IMPORT_RATE,
+                        help="fail unless CSV imports reach this many tasks per second (0 to skip)")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        json.dump(run_size(args.child, args), sys.stdout)
+        return
+
+    report = {
+        "commit": git_commit(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "sqlite": sqlite3.sqlite_version,
+        "sizes": {},
+    }
+    child_args = ["--repeat", str(args.repeat), "--heavy-repeat", str(args.heavy_repeat),
+                  "--seed", str(args.seed), "--workdir", args.workdir] + (["--fresh"] if args.fresh else [])
+    for count in args.sizes:
+        print(f"benchmarking {count} tasks...", file=sys.stderr)
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), *child_args, "--child", str(count)],
+                             stdout=subprocess.PIPE, check=True).stdout
+        report["sizes"][str(count)] = json.loads(out)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    slow = [size for size, result in report["sizes"].items()
+            if result["ops"]["import_csv"]["tasks_per_s"] < args.min_import_rate]
+    if slow:
+        sys.exit(f"import_csv below {args.min_import_rate} tasks/s at: {', '.join(slow)} tasks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""Command-line interface to the same todo.db, without Tk.
+
+    python project.py add "Write report" --deadline 24-12-2026 --priority High
+    python project.py add < tasks.jsonl          # one JSON object or CSV row per line
+    python project.py list --status overdue --format csv
+    python project.py list --where "priority:high status:open due<=+7d elapsed>1h"
+    python project.py views save "Due soon" "status:open due:today..+7d"
+    python project.py list --view "Due soon" --count
+    python project.py complete 12 15 18
+    python project.py complete --status overdue --priority Low
+    python project.py import tasks.csv
+    python project.py export open.jsonl --status open
+    python project.py stats
+    python project.py report --period month --by priority   # time tracked, from the rollups
+    python project.py sync /media/usb/todo.db      # two-way, only the changes since the last sync
+    python project.py archive --days 30 --vacuum  # move old completed tasks out of the working set
+    python project.py serve --port 8765           # the JSON API in server.py
+
+Results are written to stdout as JSON (`list` writes JSON Lines by default);
+errors as a JSON object on stderr with exit status 1.
+
+Each command imports what it needs when it runs, so a command only pays for
+its own modules at start-up.
+"""
+import argparse
+import json
+import sqlite3
+import sys
+
+COMMANDS = ("add", "list", "complete", "import", "export", "stats", "report", "views", "sync", "archive", "serve")
+DEFAULT_PRIORITY = "Medium"  # what the window's priority menu starts on
+MAX_REJECTS_SHOWN = 100
+
+
+def emit(value, stream=sys.stdout):
+    stream.write(json.dumps(value, ensure_ascii=False) + "\n")
+
+
+def positive_int(text):
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive number, not {text}")
+    return value
+
+
+def add_filter_arguments(parser, statuses=("open", "overdue", "completed")):
+    parser.add_argument("--status", choices=statuses)
+    parser.add_argument("--from", dest="start", metavar="DATE", help="earliest deadline (DD-MM-YYYY or YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", metavar="DATE", help="latest deadline")
+    parser.add_argument("--priority", dest="priorities", nargs="+", metavar="PRIORITY")
+    parser.add_argument("--where", metavar="EXPR", help="filter expression, e.g. 'priority:high due<=+7d'")
+    parser.add_argument("--view", help="a saved view (see `views`)")
+
+
+def filters(args, normalizer, store):
+    # The command line's filters as TaskStore.filter_sql keywords
+    from task_io import PRIORITIES, RowError
+    expressions = [args.where]
+    if args.view:
+        expressions.append(store.view_query(args.view))
+        if expressions[-1] is None:
+            raise RowError(f"no view {args.view!r}")
+    expressions = [f"({expression})" for expression in expressions if expression]
+    priorities = None
+    if args.priorities:
+        priorities = [PRIORITIES.get(p.lower()) for p in args.priorities]
+        if None in priorities:
+            raise RowError(f"invalid priority {args.priorities[priorities.index(None)]!r}")
+    return {
+        "status": args.status,
+        "start": normalizer.deadline(args.start) if args.start else None,
+        "end": normalizer.deadline(args.end) if args.end else None,
+        "priorities": priorities,
+        "where": store.compile_filter(" ".join(expressions)) if expressions else None,
+    }
+
+
+# Batch input
+
+def parse_line(line, columns):
+    # One JSON object or one CSV row -> (columns, values) for RowNormalizer
+    import csv
+    from task_io import HEADER_COLUMNS, RowError
+    if line.startswith("{"):
+        try:
+            task = json.loads(line)
+        except ValueError as e:
+            raise RowError(f"invalid JSON: {e}")
+        if not isinstance(task, dict):
+            raise RowError("expected a JSON object")
+        fields = {"priority": DEFAULT_PRIORITY}
+        for name, value in task.items():
+            column = HEADER_COLUMNS.get(name.strip().lower().replace(" ", "_"))
+            if column is not None:
+                fields[column] = "" if value is None else str(int(value) if isinstance(value, bool) else value)
+        if "title" not in fields or "deadline" not in fields:
+            raise RowError("missing title or deadline")
+        return list(fields), list(fields.values())
+    return columns, next(csv.reader([line]))
+
+
+def read_tasks(lines, normalizer, rejected):
+    # Normalized task tuples from stdin; a CSV header line, if any, sets the column order
+    import csv
+    from task_io import DEFAULT_COLUMNS, RowError, header_columns
+    columns = DEFAULT_COLUMNS
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if number == 1 and not line.startswith("{"):
+            header = header_columns(next(csv.reader([line])))
+            if header:
+                columns = header
+                continue
+        try:
+            yield normalizer.normalize(*parse_line(line, columns))
+        except RowError as e:
+            rejected.append({"line": number, "error": str(e)})
+
+
+def add_batch(store, lines, batch_size=None):
+    from task_io import IMPORT_BATCH_SIZE, RowNormalizer
+    batch_size = batch_size or IMPORT_BATCH_SIZE
+    normalizer = RowNormalizer()
+    rejected = []
+    added = 0
+    batch = []
+    with store.bulk_load(store.conn):
+        for task in read_tasks(lines, normalizer, rejected):
+            batch.append(task)
+            if len(batch) >= batch_size:
+                added += store.insert_tasks(batch)
+                batch = []
+        if batch:
+            added += store.insert_tasks(batch)
+    return {"added": added, "rejected": len(rejected), "errors": rejected[:MAX_REJECTS_SHOWN]}
+
+
+def read_ids(lines):
+    from task_io import RowError
+    ids = []
+    for line in lines:
+        for word in line.replace(",", " ").split():
+            try:
+                ids.append(int(word))
+            except ValueError:
+                raise RowError(f"invalid task id {word!r}")
+    return ids
+
+
+# Commands
+
+def cmd_add(store, args):
+    if args.title in (None, "-"):
+        return add_batch(store, sys.stdin)
+    from datetime import date
+    from task_io import RowNormalizer
+    normalizer = RowNormalizer()
+    title, deadline, priority, _, duration, _ = normalizer.normalize(
+        ["title", "deadline", "priority", "duration"],
+        [args.title, args.deadline or date.today().isoformat(), args.priority, args.duration or ""])
+    with store.transaction() as conn:
+        task_id = store.add_task(title, deadline, priority, conn)
+        if duration is not None:
+            store.set_duration(task_id, duration, conn)
+    return {"added": 1, "id": task_id}
+
+
+def cmd_list(store, args):
+    from task_io import EXPORT_HEADER, EXPORT_KEYS, RowNormalizer
+    task_filters = filters(args, RowNormalizer(), store)
+    if args.count:
+        return {"count": store.count_tasks(**task_filters)}
+    rows = store.list_tasks(args.limit, **task_filters)
+    out = sys.stdout
+    if args.format == "csv":
+        import csv
+        from task_store import to_display
+        writer = csv.writer(out)
+        writer.writerow(EXPORT_HEADER)
+        for task_id, title, deadline, priority, completed, duration, elapsed in rows:
+            writer.writerow((task_id, title, to_display(deadline), priority, int(bool(completed)),
+                             "" if duration is None else duration, elapsed or 0))
+    elif args.format == "json":
+        emit([dict(zip(EXPORT_KEYS, row)) for row in rows], out)
+    else:
+        for row in rows:
+            emit(dict(zip(EXPORT_KEYS, row)), out)
+    return None
+
+
+def cmd_complete(store, args):
+    from task_io import RowError, RowNormalizer
+    task_filters = filters(args, RowNormalizer(), store)
+    if args.ids:
+        ids = read_ids(sys.stdin) if args.ids == ["-"] else read_ids(args.ids)
+        return {"completed": store.update_tasks(ids, {"completed": 1})}
+    if not any(task_filters.values()):
+        raise RowError("give task ids, '-' to read them from stdin, or a filter")
+    task_filters["status"] = task_filters["status"] or "open"
+    return {"completed": store.update_matching({"completed": 1}, **task_filters)}
+
+
+def cmd_import(store, args):
+    from task_io import import_csv
+    result = import_csv(store, args.path, conn=store.conn)
+    return {"imported": result.imported, "rejected": result.rejected, "reject_path": result.reject_path}
+
+
+def cmd_export(store, args):
+    from task_io import RowNormalizer, export_tasks
+    written = export_tasks(store, args.path, fmt=args.format, conn=store.conn,
+                           **filters(args, RowNormalizer(), store))
+    return {"exported": written, "path": args.path}
+
+
+def cmd_stats(store, args):
+    from datetime import date
+    today = date.today().isoformat()
+    return {
+        "total": store.task_count(),
+        "open": store.task_count(completed=False),
+        "completed": store.task_count(completed=True),
+        "overdue": store.count_tasks(status="overdue"),
+        "due_today": store.count_tasks(status="open", start=today, end=today),
+        "archived": store.archived_count(),
+    }
+
+
+def cmd_report(store, args):
+    from task_io import RowNormalizer
+    from task_store import period_range
+    normalizer = RowNormalizer()
+    first, last = period_range(args.period)
+    first = normalizer.deadline(args.start) if args.start else first
+    last = normalizer.deadline(args.end) if args.end else last
+    rows = store.time_report(args.by, first, last)
+    bucket = args.by if args.by != "priority" else None
+    return {
+        "from": first,
+        "to": last,
+        "by": args.by,
+        "seconds": sum(seconds for _, _, seconds, _ in rows),
+        "rows": [{**({bucket: key} if bucket else {}), "priority": priority, "seconds": seconds,
+                  "hours": round(seconds / 3600, 2), "sessions": sessions}
+                 for key, priority, seconds, sessions in rows],
+    }
+
+
+def cmd_views(store, args):
+    from task_io import RowError
+    if args.action == "save":
+        if not args.name or not args.query:
+            raise RowError("views save NAME EXPR")
+        store.save_view(args.name, args.query)
+        return {"saved": args.name, "count": store.view_count(args.name)}
+    if args.action == "delete":
+        if not store.delete_view(args.name):
+            raise RowError(f"no view {args.name!r}")
+        return {"deleted": args.name}
+    # Counts are stored with the views and only recounted once the tasks change
+    return [{"name": name, "query": query, "count": store.view_count(name)} for name, query in store.views()]
+
+
+def cmd_sync(store, args):
+    from sync import SyncResult, sync
+    from task_store import TaskStore
+    other = TaskStore(args.path)
+    try:
+        result = sync(store, other)
+    finally:
+        other.close()
+    return {name: getattr(result, name) for name in SyncResult.__slots__}
+
+
+def cmd_archive(store, args):
+    import time
+    from datetime import date, timedelta
+    start = time.perf_counter()
+    before = (date.today() - timedelta(days=args.days)).isoformat()
+    archived = 0
+    while True:
+        # One transaction per batch, so the app and server can write in between
+        moved = store.archive_completed(before, args.batch)
+        archived += moved
+        if moved == 0 or moved < args.batch:
+            break
+    if args.vacuum:
+        # A full VACUUM also switches databases created before auto_vacuum to incremental
+        store.conn.execute("VACUUM")
+    free_pages = store.compact()
+    return {"archived": archived, "total_archived": store.archived_count(), "free_pages": free_pages,
+            "ms": round((time.perf_counter() - start) * 1000, 1)}
+
+
+def serve(args):
+    import server
+    server.serve(args.db, args.host, args.port, args.verbose,
+                 ready=lambda url, recovered: (emit({"listening": url, "recovered_timers": len(recovered)}),
+                                               sys.stdout.flush()))
+
+
+def command_name(argv):
+    # The subcommand in argv, found without building the parser
+    args = iter(argv)
+    for arg in args:
+        if arg == "--db":
+            next(args, None)
+        elif not arg.startswith("-"):
+            return arg if arg in COMMANDS else None
+    return None
+
+
+def parser(command=None):
+    # With a command, only its subparser is built: each one costs about a
+    # millisecond of argparse set-up. Without, e.g. for --help, all of them.
+    from task_store import DB_PATH, ARCHIVE_BATCH, ARCHIVE_DAYS, PERIODS, REPORT_GROUPS
+    parser = argparse.ArgumentParser(prog="project.py", description="Manage todo.db from the command line")
+    parser.add_argument("--db", default=DB_PATH, help="database file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    if command in (None, "add"):
+        add = commands.add_parser("add", help="add one task, or many from stdin")
+        add.add_argument("title", nargs="?", help="omit or '-' to read JSON objects or CSV rows from stdin")
+        add.add_argument("--deadline", help="DD-MM-YYYY or YYYY-MM-DD (default: today)")
+        add.add_argument("--priority", default=DEFAULT_PRIORITY)
+        add.add_argument("--duration", help="expected duration in seconds")
+        add.set_defaults(run=cmd_add)
+
+    if command in (None, "list"):
+        listing = commands.add_parser("list", help="print tasks in deadline order")
+        add_filter_arguments(listing)
+        listing.add_argument("--limit", type=int)
+        listing.add_argument("--format", choices=("jsonl", "json", "csv"), default="jsonl")
+        listing.add_argument("--count", action="store_true", help="print how many tasks match instead")
+        listing.set_defaults(run=cmd_list)
+
+    if command in (None, "complete"):
+        complete = commands.add_parser("complete", help="complete tasks by id or by filter")
+        complete.add_argument("ids", nargs="*", help="task ids, or '-' to read them from stdin")
+        add_filter_arguments(complete, ("open", "overdue"))
+        complete.set_defaults(run=cmd_complete)
+
+    if command in (None, "import"):
+        imports = commands.add_parser("import", help="import a CSV file")
+        imports.add_argument("path")
+        imports.set_defaults(run=cmd_import)
+
+    if command in (None, "export"):
+        export = commands.add_parser("export", help="export tasks to CSV or JSON Lines (.gz compresses)")
+        export.add_argument("path")
+        export.add_argument("--format", choices=("csv", "jsonl"))
+        add_filter_arguments(export)
+        export.set_defaults(run=cmd_export)
+
+    if command in (None, "stats"):
+        stats = commands.add_parser("stats", help="task counts")
+        stats.set_defaults(run=cmd_stats)
+
+    if command in (None, "report"):
+        report = commands.add_parser("report", help="time tracked per day, week or priority")
+        report.add_argument("--period", choices=PERIODS, default="week")
+        report.add_argument("--from", dest="start", metavar="DATE", help="first day, instead of the period's")
+        report.add_argument("--to", dest="end", metavar="DATE", help="last day")
+        report.add_argument("--by", choices=REPORT_GROUPS, default="day")
+        report.set_defaults(run=cmd_report)
+
+    if command in (None, "views"):
+        views = commands.add_parser("views", help="list, save or delete named filter expressions")
+        views.add_argument("action", nargs="?", choices=("list", "save", "delete"), default="list")
+        views.add_argument("name", nargs="?")
+        views.add_argument("query", nargs="?", help="filter expression to save")
+        views.set_defaults(run=cmd_views)
+
+    if command in (None, "sync"):
+        syncing = commands.add_parser("sync", help="exchange changes with another todo.db")
+        syncing.add_argument("path")
+        syncing.set_defaults(run=cmd_sync)
+
+    if command in (None, "archive"):
+        archive = commands.add_parser("archive", help="move old completed tasks to the archive and compact")
+        archive.add_argument("--days", type=int, default=ARCHIVE_DAYS,
+                             help="archive tasks completed more than this many days ago (default: %(default)s)")
+        archive.add_argument("--batch", type=positive_int, default=ARCHIVE_BATCH, help="tasks moved per transaction")
+        archive.add_argument("--vacuum", action="store_true", help="rebuild the file with a full VACUUM")
+        archive.set_defaults(run=cmd_archive)
+
+    if command in (None, "serve"):
+        serving = commands.add_parser("serve", help="serve the JSON API on localhost")
+        serving.add_argument("--host", default="127.0.0.1")
+        serving.add_argument("--port", type=int, default=8765)
+        serving.add_argument("--verbose", action="store_true", help="log every request")
+    return parser
+
+
+def main(argv):
+    args = parser(command_name(argv)).parse_args(argv)
+    if args.command == "serve":
+        serve(args)
+        return 0
+    from task_store import TaskStore
+    store = None
+    try:
+        store = TaskStore(args.db)
+        result = args.run(store, args)
+    except (ValueError, OSError, sqlite3.Error) as e:
+        emit({"error": str(e)}, sys.stderr)
+        return 1
+    finally:
+        if store is not None:
+            store.close()
+    if result is not None:
+        emit(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,179 @@
+"""Runs database work off the Tk thread.
+
+Reads go to a small pool of reader threads and writes to one writer thread,
+each with its own connection. In WAL mode readers see the last committed
+state while a write is in progress, so a search or a reload never waits
+behind an import. Jobs are `fn(conn)` callables; their results are handed
+back on the Tk thread by a poll scheduled with `after`.
+"""
+import queue
+import sqlite3
+import sys
+import threading
+import traceback
+
+READERS = 2
+POLL_MS = 20
+
+_STOP = object()
+
+
+class Job:
+    __slots__ = ("fn", "callback", "error", "key", "interruptible", "cancelled", "conn")
+
+    def __init__(self, fn, callback, error, key, interruptible):
+        self.fn = fn
+        self.callback = callback
+        self.error = error
+        self.key = key
+        self.interruptible = interruptible
+        self.cancelled = False
+        self.conn = None  # the worker's connection while the job runs
+
+
+class QueryExecutor:
+    """Reader and writer threads whose results are delivered through `after`.
+
+    A job submitted with a `key` supersedes the previous job with that key:
+    if it is still queued it is skipped, if it is a read that is running its
+    query is interrupted, and either way its callback is never called. Writes
+    that have started are left to commit. Callbacks run on the Tk thread in
+    completion order, so every write's callback sees the writes before it.
+    """
+
+    def __init__(self, store, after, readers=READERS, poll_ms=POLL_MS):
+        self.store = store
+        self.after = after
+        self.poll_ms = poll_ms
+        self.reads = queue.Queue()
+        self.writes = queue.Queue()
+        self.results = queue.Queue()
+        self.latest = {}      # key -> newest job with that key
+        self.running = set()
+        self.lock = threading.Lock()
+        self.outstanding = 0  # submitted jobs whose results haven't been polled
+        self.polling = False
+        self.closed = False
+        self.threads = [threading.Thread(target=self.worker, args=(self.writes,), name="db-writer", daemon=True)]
+        self.threads += [threading.Thread(target=self.worker, args=(self.reads,), name=f"db-reader-{i}", daemon=True)
+                         for i in range(readers)]
+        for thread in self.threads:
+            thread.start()
+
+    # Tk thread
+
+    def read(self, fn, callback=None, error=None, key=None):
+        return self.submit(self.reads, Job(fn, callback, error, key, True))
+
+    def write(self, fn, callback=None, error=None, key=None):
+        return self.submit(self.writes, Job(fn, callback, error, key, False))
+
+    def submit(self, jobs, job):
+        if self.closed:
+            raise RuntimeError("executor is shut down")
+        if job.key is not None:
+            self.cancel(job.key)
+            self.latest[job.key] = job
+        self.outstanding += 1
+        jobs.put(job)
+        if not self.polling:
+            self.polling = True
+            self.after(self.poll_ms, self.poll)
+        return job
+
+    def cancel(self, key):
+        # Drops the pending job with this key, if any
+        job = self.latest.pop(key, None)
+        if job is not None:
+            self.cancel_job(job)
+
+    def cancel_job(self, job):
+        with self.lock:
+            job.cancelled = True
+            if job.interruptible and job.conn is not None:
+                job.conn.interrupt()
+
+    def poll(self):
+        self.polling = False
+        while True:
+            try:
+                job, result, failure = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.outstanding -= 1
+            if job.cancelled:
+                continue
+            if job.key is not None and self.latest.get(job.key) is job:
+                del self.latest[job.key]
+            if failure is None:
+                if job.callback:
+                    job.callback(result)
+            elif job.error:
+                job.error(failure)
+            else:
+                traceback.print_exception(type(failure), failure, failure.__traceback__, file=sys.stderr)
+        if self.outstanding and not self.closed:
+            self.polling = True
+            self.after(self.poll_ms, self.poll)
+
+    def shutdown(self, timeout=None):
+        # Queued writes still run and commit; queued reads are dropped and running
+        # ones interrupted. No more callbacks are delivered.
+        self.closed = True
+        while True:
+            try:
+                self.cancel_job(self.reads.get_nowait())
+            except queue.Empty:
+                break
+        with self.lock:
+            for job in self.running:
+                if job.interruptible:
+                    job.cancelled = True
+                    job.conn.interrupt()
+        for thread in self.threads:
+            (self.writes if thread.name == "db-writer" else self.reads).put(_STOP)
+        for thread in self.threads:
+            thread.join(timeout)
+
+    # Worker threads
+
+    def worker(self, jobs):
+        # Every job gets a result. A connection that fails to open or to roll
+        # back fails that job only, and the next job gets a new connection.
+        conn = None
+        try:
+            while True:
+                job = jobs.get()
+                if job is _STOP:
+                    return
+                result = failure = None
+                if conn is None and not job.cancelled:
+                    try:
+                        conn = self.store.connect()
+                    except sqlite3.Error as e:
+                        failure = e
+                with self.lock:
+                    skip = job.cancelled or conn is None
+                    if not skip:
+                        job.conn = conn
+                        self.running.add(job)
+                if not skip:
+                    try:
+                        result = job.fn(conn)
+                    except Exception as e:
+                        failure = e
+                    finally:
+                        with self.lock:
+                            job.conn = None
+                            self.running.discard(job)
+                    try:
+                        if conn.in_transaction:
+                            conn.execute("ROLLBACK")
+                    except sqlite3.Error as e:
+                        failure = failure or e
+                        conn.close()
+                        conn = None
+                self.results.put((job, result, failure))
+        finally:
+            if conn is not None:
+                conn.close()
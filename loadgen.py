@@ -0,0 +1,165 @@
+"""Load generator for the JSON API (server.py).
+
+Runs client threads, each with one keep-alive connection, issuing a mix of
+reads and writes for a fixed time, then reports requests per second and
+p50/p95/p99/max latency per operation as JSON.
+
+    python project.py serve &
+    python loadgen.py --clients 16 --seconds 10 --writes 0.2
+    python loadgen.py --output after.json --compare before.json
+"""
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+WORDS = ["report", "email", "invoice", "meeting", "review", "draft", "call", "budget", "slides", "backup"]
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+class Client:
+    def __init__(self, url, seed, write_ratio, timeout=30):
+        parts = urlsplit(url)
+        self.conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+        self.rng = random.Random(seed)
+        self.write_ratio = write_ratio
+        self.ids = []  # tasks this client added, for gets, completes and timers
+        self.samples = {}
+        self.errors = {}
+
+    def request(self, method, path, body=None):
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        try:
+            self.conn.request(method, path, data, headers)
+            response = self.conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()  # reconnects on the next request
+            raise
+        return response.status, payload
+
+    def operation(self):
+        # (name, method, path, body); writes are adds, completes and timer toggles
+        rng = self.rng
+        if rng.random() < self.write_ratio:
+            pick = rng.random()
+            if pick < 0.6 or not self.ids:
+                deadline = (date.today() + timedelta(days=rng.randint(-10, 60))).isoformat()
+                title = f"Load {rng.choice(WORDS)} {rng.randrange(100000)}"
+                return "add", "POST", "/tasks", {"title": title, "deadline": deadline,
+                                                 "priority": rng.choice(("Low", "Medium", "High"))}
+            task_id = rng.choice(self.ids)
+            if pick < 0.8:
+                return "complete", "POST", "/tasks/complete", {"ids": [task_id]}
+            return "timer", "POST", f"/tasks/{task_id}/timer/{rng.choice(('start', 'stop'))}", None
+        pick = rng.random()
+        if pick < 0.4:
+            return "list", "GET", f"/tasks?status=open&limit=50&from={date.today().isoformat()}", None
+        if pick < 0.6:
+            return "search", "GET", f"/tasks?q={rng.choice(WORDS)}&limit=50", None
+        if pick < 0.9 and self.ids:
+            return "get", "GET", f"/tasks/{rng.choice(self.ids)}", None
+        return "stats", "GET", "/stats", None
+
+    def run(self, deadline):
+        while time.perf_counter() < deadline:
+            name, method, path, body = self.operation()
+            start = time.perf_counter()
+            try:
+                status, payload = self.request(method, path, body)
+            except (OSError, http.client.HTTPException) as e:
+                self.errors[type(e).__name__] = self.errors.get(type(e).__name__, 0) + 1
+                continue
+            self.samples.setdefault(name, []).append(time.perf_counter() - start)
+            if status >= 500 or (status >= 400 and name != "timer"):
+                # A timer stop for a timer that isn't running is an expected 404
+                self.errors[str(status)] = self.errors.get(str(status), 0) + 1
+            elif name == "add":
+                self.ids.append(json.loads(payload)["id"])
+        self.conn.close()
+
+
+def report(clients, elapsed):
+    merged = {}
+    errors = {}
+    for client in clients:
+        for name, samples in client.samples.items():
+            merged.setdefault(name, []).extend(samples)
+        for kind, count in client.errors.items():
+            errors[kind] = errors.get(kind, 0) + count
+    everything = sorted(sample for samples in merged.values() for sample in samples)
+
+    def summary(samples):
+        samples.sort()
+        return {
+            "requests": len(samples),
+            "rps": round(len(samples) / elapsed, 1),
+            "p50_ms": round(percentile(samples, 0.5) * 1000, 3),
+            "p95_ms": round(percentile(samples, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+            "max_ms": round(samples[-1] * 1000, 3),
+        }
+    return {
+        "clients": len(clients),
+        "seconds": round(elapsed, 2),
+        "total": summary(everything) if everything else None,
+        "ops": {name: summary(samples) for name, samples in sorted(merged.items())},
+        "errors": errors,
+    }
+
+
+def compare(result, baseline):
+    print("p50 / p99 / rps, this run / baseline:")
+    for name, stats in {"total": result["total"], **result["ops"]}.items():
+        before = baseline["ops"].get(name) if name != "total" else baseline.get("total")
+        if stats and before and before["p50_ms"] and before["p99_ms"]:
+            print(f"  {name:10} x{stats['p50_ms'] / before['p50_ms']:.2f}  x{stats['p99_ms'] / before['p99_ms']:.2f}"
+                  f"  x{stats['rps'] / before['rps']:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the todo JSON API")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--writes", type=float, default=0.2, help="fraction of requests that write")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args()
+
+    clients = [Client(args.url, args.seed + i, args.writes) for i in range(args.clients)]
+    start = time.perf_counter()
+    deadline = start + args.seconds
+    threads = [threading.Thread(target=client.run, args=(deadline,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = report(clients, time.perf_counter() - start)
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+    if not result["total"]:
+        print("no requests completed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""Opt-in instrumentation: timing spans, SQL tracing and main loop lag.
+
+Enabled with `python project.py --profile [trace.json]` or the TODO_PROFILE
+environment variable ("1", or a path to write the trace to on exit). Spans
+are kept in a bounded buffer and can be saved in Chrome trace format
+(chrome://tracing, Perfetto).
+"""
+import functools
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+PROFILE_ENV = "TODO_PROFILE"
+SLOW_MS_ENV = "TODO_PROFILE_SLOW_MS"
+SLOW_MS = 100          # spans at least this long are flagged
+MAX_EVENTS = 200000    # oldest trace events are dropped past this
+WATCH_INTERVAL_MS = 100
+SQL_PREVIEW = 120      # characters of a statement kept as its span name
+
+
+class SpanStats:
+    __slots__ = ("count", "total", "max", "slow")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+
+
+class Profiler:
+    def __init__(self, slow_ms=SLOW_MS, trace_path=None, max_events=MAX_EVENTS):
+        self.slow_ms = slow_ms
+        self.trace_path = trace_path
+        self.origin = time.perf_counter()
+        self.events = deque(maxlen=max_events)
+        self.stats = {}  # (category, name) -> SpanStats
+        self.slow = deque(maxlen=50)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.pid = os.getpid()
+        self.lag_max = 0.0
+        self.lag_late = 0
+
+    @classmethod
+    def from_environment(cls, argv):
+        # Returns a Profiler when --profile or TODO_PROFILE asks for one, else None;
+        # the flag and its optional path are removed from argv
+        path = None
+        enabled = False
+        if "--profile" in argv:
+            i = argv.index("--profile")
+            enabled = True
+            del argv[i]
+            if i < len(argv) and not argv[i].startswith("-"):
+                path = argv.pop(i)
+        value = os.environ.get(PROFILE_ENV, "")
+        if value and value != "0":
+            enabled = True
+            path = path or (None if value == "1" else value)
+        if not enabled:
+            return None
+        return cls(slow_ms=float(os.environ.get(SLOW_MS_ENV, SLOW_MS)), trace_path=path)
+
+    # Spans
+
+    def record(self, category, name, start, duration, args=None):
+        ms = duration * 1000
+        event = {"name": name, "cat": category, "ph": "X", "pid": self.pid, "tid": threading.get_ident(),
+                 "ts": round((start - self.origin) * 1e6, 1), "dur": round(duration * 1e6, 1)}
+        if args:
+            event["args"] = args
+        with self.lock:
+            stats = self.stats.get((category, name))
+            if stats is None:
+                stats = self.stats[(category, name)] = SpanStats()
+            stats.count += 1
+            stats.total += ms
+            stats.max = max(stats.max, ms)
+            if ms >= self.slow_ms:
+                stats.slow += 1
+                self.slow.append((category, name, ms))
+                event.setdefault("args", {})["slow"] = True
+            self.events.append(event)
+        if ms >= self.slow_ms:
+            print(f"[profile] slow {category} {name}: {ms:.1f} ms", file=sys.stderr)
+
+    @contextmanager
+    def span(self, name, category="action", **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(category, name, start, time.perf_counter() - start, args)
+
+    def wrap(self, fn, name, category="action"):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(category, name, start, time.perf_counter() - start)
+        return wrapper
+
+    def instrument(self, obj, names, category="action", prefix=""):
+        # Replaces the named methods on this instance with timed wrappers; must run
+        # before the methods are handed out as callbacks
+        for name in names:
+            setattr(obj, name, self.wrap(getattr(obj, name), prefix + name, category))
+
+    # SQL
+
+    def connect(self, *args, **kwargs):
+        # sqlite3.connect returning a connection whose statements are timed
+        conn = sqlite3.connect(*args, factory=ProfiledConnection, **kwargs)
+        conn.profiler = self
+        conn.set_trace_callback(self.count_statement)
+        return conn
+
+    def count_statement(self, sql):
+        # Every statement SQLite runs, including trigger bodies and each executemany row
+        self.local.statements = getattr(self.local, "statements", 0) + 1
+
+    def statements(self):
+        return getattr(self.local, "statements", 0)
+
+    # Main loop
+
+    def watch(self, after, interval_ms=WATCH_INTERVAL_MS):
+        # A heartbeat on the Tk `after` queue: however late it fires is how long
+        # the main loop was blocked by something else
+        expected = time.perf_counter() + interval_ms / 1000
+
+        def beat():
+            nonlocal expected
+            now = time.perf_counter()
+            late = now - expected
+            if late * 1000 >= self.slow_ms:
+                self.lag_late += 1
+                self.record("loop", "mainloop blocked", expected, late)
+            self.lag_max = max(self.lag_max, late * 1000)
+            expected = now + interval_ms / 1000
+            after(interval_ms, beat)
+        after(interval_ms, beat)
+
+    # Reports
+
+    def summary(self):
+        # (category, name, count, total ms, mean ms, max ms, slow count), slowest total first
+        with self.lock:
+            rows = [(category, name, s.count, s.total, s.total / s.count, s.max, s.slow)
+                    for (category, name), s in self.stats.items()]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+    def reset(self):
+        with self.lock:
+            self.events.clear()
+            self.stats.clear()
+            self.slow.clear()
+            self.lag_max = 0.0
+            self.lag_late = 0
+
+    def dump(self, path=None):
+        path = path or self.trace_path
+        with self.lock:
+            events = list(self.events)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Times each statement's execute and fetch calls and counts the rows it returns.
+
+    The span is recorded once the result set is exhausted, the cursor is
+    reused or closed, or it is garbage collected.
+    """
+
+    sql = None
+
+    def begin(self, sql):
+        self.finish()
+        self.sql = sql
+        self.started = time.perf_counter()
+        self.busy = 0.0
+        self.rows = 0
+        self.statements_before = self.connection.profiler.statements()
+
+    def timed(self, call, *args):
+        start = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            self.busy += time.perf_counter() - start
+
+    def execute(self, sql, parameters=()):
+        self.begin(sql)
+        self.timed(super().execute, sql, parameters)
+        if self.description is None:
+            self.rows = self.rowcount
+            self.finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self.begin(sql)
+        self.timed(super().executemany, sql, seq_of_parameters)
+        self.rows = self.rowcount
+        self.finish()
+        return self
+
+    def fetchone(self):
+        row = self.timed(super().fetchone)
+        if row is None:
+            self.finish()
+        elif self.sql:
+            self.rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self.timed(super().fetchmany, self.arraysize if size is None else size)
+        if not rows:
+            self.finish()
+        elif self.sql:
+            self.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self.timed(super().fetchall)
+        if self.sql:
+            self.rows += len(rows)
+        self.finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self.timed(super().__next__)
+        except StopIteration:
+            self.finish()
+            raise
+        if self.sql:
+            self.rows += 1
+        return row
+
+    def close(self):
+        self.finish()
+        super().close()
+
+    def __del__(self):
+        self.finish()
+
+    def finish(self):
+        if self.sql is None:
+            return
+        sql, self.sql = self.sql, None
+        profiler = self.connection.profiler
+        name = " ".join(sql.split())[:SQL_PREVIEW]
+        profiler.record("sql", name, self.started, self.busy,
+                        {"rows": self.rows, "statements": profiler.statements() - self.statements_before})
+
+
+class ProfiledConnection(sqlite3.Connection):
+    profiler = None
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -0,0 +1,161 @@
+import heapq
+from datetime import date, datetime, time, timedelta
+
+REMINDER_SAMPLE = 5       # titles named in a notification; the rest are only counted
+MAX_SLEEP_SECONDS = 3600  # re-read the wall clock at least hourly (suspend, clock changes)
+
+
+def parse_day(deadline):
+    try:
+        return date.fromisoformat(deadline)
+    except (TypeError, ValueError):
+        return None
+
+
+def describe(count, titles, one, many):
+    if count == 1:
+        return one.format(titles[0])
+    names = ", ".join(f"'{title}'" for title in titles)
+    if count > len(titles):
+        names += f" and {count - len(titles)} more"
+    return many.format(count, names)
+
+
+class ReminderNotice:
+    """Everything that became due or overdue at one wake-up, coalesced."""
+    __slots__ = ("due_count", "due_titles", "missed_count", "missed_titles")
+
+    def __init__(self, due_count, due_titles, missed_count, missed_titles):
+        self.due_count = due_count
+        self.due_titles = due_titles
+        self.missed_count = missed_count
+        self.missed_titles = missed_titles
+
+    def __bool__(self):
+        return bool(self.due_count or self.missed_count)
+
+    def message(self):
+        lines = []
+        if self.due_count:
+            lines.append(describe(self.due_count, self.due_titles,
+                                  "Task '{}' is due today!", "{} tasks are due today: {}"))
+        if self.missed_count:
+            lines.append(describe(self.missed_count, self.missed_titles,
+                                  "Missed deadline for task '{}'!", "Missed deadlines for {} tasks: {}"))
+        return "\n".join(lines)
+
+
+class ReminderScheduler:
+    """Wakes only when some open task becomes due or overdue.
+
+    Deadlines are whole days, so a task crosses two boundaries: the start of
+    its deadline day (due today) and the day after (missed). The distinct
+    upcoming boundaries sit in a min-heap seeded by an index skip-scan, and
+    edits push their new boundaries. A task that is already due or overdue
+    when it is added or changed has no boundary left to wait for: it makes
+    the next check immediate instead. Stale entries cost an empty check, so
+    completed and deleted tasks need no bookkeeping. Each wake-up reads the
+    affected tasks with two range queries on (completed, deadline).
+
+    The queries take a connection, so a GUI can run deadline_days and
+    read_notice on a reader thread and keep the heap on its own thread;
+    seed and collect do both at once.
+    """
+
+    def __init__(self, store, today=date.today):
+        self.store = store
+        self.today = today
+        self.boundaries = []  # dates, earliest first
+        self.queued = set()
+        self.checked = None   # last day whose reminders were delivered
+        self.late = False     # earliest deadline to report again at the next check; None for all
+
+    def seed(self, conn=None):
+        self.boundaries = []
+        self.queued = set()
+        self.add_deadlines(self.deadline_days(conn))
+
+    def deadline_days(self, conn=None):
+        # The open tasks' deadlines from yesterday on, each a boundary or two
+        yesterday = self.today() - timedelta(days=1)
+        return self.store.open_deadline_days(yesterday.isoformat(), conn)
+
+    def add_deadlines(self, deadlines):
+        # Merged into the heap: boundaries pushed since the read stay queued
+        for deadline in deadlines:
+            self.push(deadline)
+
+    def push(self, deadline):
+        day = parse_day(deadline)
+        if day is None:
+            return
+        today = self.today()
+        for boundary in (day, day + timedelta(days=1)):
+            if boundary > today and boundary not in self.queued:
+                heapq.heappush(self.boundaries, boundary)
+                self.queued.add(boundary)
+
+    def task_changed(self, task):
+        # `task` is the row as now stored, or None once deleted.
+        # Returns True when the next wake-up moved earlier.
+        if task is None or task[4]:
+            return False
+        day = parse_day(task[2])
+        if day is not None and self.recheck(day):
+            return True
+        earliest = self.boundaries[0] if self.boundaries else None
+        self.push(task[2])
+        return bool(self.boundaries) and self.boundaries[0] != earliest
+
+    def recheck(self, day=None):
+        # Tasks due on or before `day` (any day if None) appeared after the last
+        # check, so their boundaries have passed: the next check reports that
+        # range again. Returns True if a check is now pending.
+        if self.checked is None or (day is not None and day > self.today()):
+            return False  # the first check reports every overdue task anyway
+        if self.late is not None:
+            self.late = day if day is None or self.late is False else min(self.late, day)
+        return True
+
+    def seconds_until_next(self, now=None):
+        if self.checked is None or self.late is not False:
+            return 0
+        if not self.boundaries:
+            return MAX_SLEEP_SECONDS
+        now = now or datetime.now()
+        wake = datetime.combine(self.boundaries[0], time.min)
+        return max(0, min(MAX_SLEEP_SECONDS, (wake - now).total_seconds()))
+
+    def collect(self, conn=None):
+        # Returns a ReminderNotice for the boundaries passed since the last call, or None
+        due = self.due()
+        return self.read_notice(due, conn) if due else None
+
+    def due(self):
+        # Pops the boundaries passed since the last call; returns the (today,
+        # first missed day) for read_notice, or None when nothing new is due
+        today = self.today()
+        late, self.late = self.late, False
+        if self.checked == today and late is False:
+            return None
+        crossed = False
+        while self.boundaries and self.boundaries[0] <= today:
+            self.queued.discard(heapq.heappop(self.boundaries))
+            crossed = True
+        first_missed = self.checked
+        self.checked = today
+        if late is not False:
+            first_missed = None if late is None or first_missed is None else min(first_missed, late)
+        elif first_missed is not None and not crossed:
+            return None
+        return today, first_missed
+
+    def read_notice(self, due, conn=None):
+        # On the first call every overdue task is reported, later only the days just passed
+        today, first_missed = due
+        yesterday = (today - timedelta(days=1)).isoformat()
+        first_missed = first_missed.isoformat() if first_missed else None
+        notice = ReminderNotice(
+            *self.store.open_tasks_due(today.isoformat(), today.isoformat(), REMINDER_SAMPLE, conn),
+            *self.store.open_tasks_due(first_missed, yesterday, REMINDER_SAMPLE, conn))
+        return notice or None
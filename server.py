@@ -0,0 +1,504 @@
+"""Local JSON API over todo.db, for scripts and other programs.
+
+    python project.py serve --port 8765
+
+Reads run concurrently, each request on its own pooled connection (WAL lets
+them proceed while a write is in progress). Writes are queued to a single
+writer thread, which commits every write waiting in the queue in one
+transaction (group commit), so many small writes cost one commit and no
+request ever sees "database is locked" from another request.
+
+    GET  /tasks?status=open&from=2026-01-01&to=&priority=High,Low&limit=100
+    GET  /tasks?q=report                       title search
+    GET  /tasks?where=priority:high+due<=%2B7d   a filter expression (task_filter.py); view=<name> for a saved one
+    GET  /views                                saved views and their match counts
+    GET  /tasks/<id>
+    POST /tasks                                {"title", "deadline", "priority", "duration"}, or a list of them
+    POST /tasks/complete                       {"ids": [...]} or filters {"status", "from", "to", "priority", "where", "view"}
+    POST /tasks/<id>/timer/start               also /timer/stop
+    GET  /timers                               running timers and their elapsed seconds
+    POST /import                               {"path": "tasks.csv"}, a file on the server's machine
+    GET  /export?format=csv&status=open        streamed, CSV or JSON Lines
+    GET  /stats                                task counts and writer statistics
+    GET  /report?period=month&by=priority      time tracked per day, week or priority (also from=, to=)
+"""
+import io
+import json
+import queue
+import re
+import signal
+import sqlite3
+import threading
+import traceback
+from concurrent.futures import Future
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from task_store import TaskStore, DB_PATH, period_range
+from task_io import EXPORT_KEYS, PRIORITIES, RowError, RowNormalizer, import_csv, write_export
+from timer_engine import TimerEngine
+
+HOST = "127.0.0.1"
+PORT = 8765
+READERS = 8          # pooled read connections kept open
+GROUP_MAX = 256      # writes committed together at most
+LIST_LIMIT = 1000    # rows a list request returns unless it asks for fewer
+MAX_BODY = 64 * 1024 * 1024
+TICK_SECONDS = 1.0
+
+_STOP = object()
+
+
+class WriteJob:
+    __slots__ = ("fn", "future", "alone")
+
+    def __init__(self, fn, alone):
+        self.fn = fn
+        self.future = Future()
+        self.alone = alone
+
+
+class GroupCommitWriter:
+    """One writer thread and connection; every write in the database goes through it.
+
+    Jobs are `fn(conn)` callables. The writer takes whatever is queued, up to
+    `max_group` jobs, and runs them in one transaction, each inside a
+    savepoint so a failing job is rolled back alone. Futures are resolved
+    after the COMMIT, so a caller that waited on its write can read it back.
+    Jobs submitted with `alone=True` (imports, which commit in batches of
+    their own) run outside any group.
+    """
+
+    def __init__(self, store, max_group=GROUP_MAX):
+        self.store = store
+        self.max_group = max_group
+        self.jobs = queue.Queue()
+        self.held = None  # a job taken while filling a group that must run after it
+        self.commits = 0
+        self.writes = 0
+        self.thread = threading.Thread(target=self.run, name="db-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, fn, alone=False):
+        job = WriteJob(fn, alone)
+        self.jobs.put(job)
+        return job.future
+
+    def write(self, fn, alone=False):
+        # Submits and waits; returns fn's result or raises its exception
+        return self.submit(fn, alone).result()
+
+    def close(self):
+        # Queued writes still run
+        self.jobs.put(_STOP)
+        self.thread.join()
+
+    def take(self):
+        # The next group: one `alone` job, or up to max_group ordinary ones
+        job, self.held = self.held or self.jobs.get(), None
+        if job is _STOP or job.alone:
+            return job, [job]
+        group = [job]
+        while len(group) < self.max_group:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP or job.alone:
+                self.held = job
+                break
+            group.append(job)
+        return None, group
+
+    def run(self):
+        conn = self.store.connect()
+        try:
+            while True:
+                alone, group = self.take()
+                if alone is _STOP:
+                    return
+                if alone is not None:
+                    self.run_alone(conn, alone)
+                else:
+                    self.commit(conn, group)
+        finally:
+            conn.close()
+
+    def run_alone(self, conn, job):
+        try:
+            result = job.fn(conn)
+        except Exception as e:
+            job.future.set_exception(e)
+        else:
+            job.future.set_result(result)
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+        self.writes += 1
+
+    def commit(self, conn, group):
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for job in group:
+                conn.execute("SAVEPOINT job")
+                try:
+                    results.append((job, job.fn(conn), None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO job")
+                    results.append((job, None, e))
+                conn.execute("RELEASE job")
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for job in group:
+                job.future.set_exception(e)
+            return
+        self.commits += 1
+        self.writes += len(group)
+        for job, result, failure in results:
+            if failure is None:
+                job.future.set_result(result)
+            else:
+                job.future.set_exception(failure)
+
+
+class NotFound(Exception):
+    pass
+
+
+class TaskAPI:
+    """The operations the server exposes, independent of HTTP.
+
+    Timers run in a TimerEngine owned by the server; its writes go through
+    the writer like every other. A ticker thread closes timers that reach
+    their duration and checkpoints the rest.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.writer = GroupCommitWriter(store)
+        self.normalizer = RowNormalizer()
+        self.timer_lock = threading.Lock()
+        self.timer_writes = []
+        self.timer = TimerEngine(store, write=self.timer_write)
+        # Timers left marked running by a server or window that has exited without
+        # stopping them; those of a window still open on the database stay its own
+        self.recovered = self.writer.write(store.recover_timers)
+        self.ticking = threading.Event()
+        self.ticker = threading.Thread(target=self.tick, name="timer-ticker", daemon=True)
+        self.ticker.start()
+
+    def close(self):
+        self.ticking.set()
+        self.ticker.join()
+        with self.timer_lock:
+            self.timer.shutdown()
+        self.writer.close()
+
+    # Timers
+
+    def timer_write(self, fn, task_ids):
+        # Called by the engine with timer_lock held
+        self.timer_writes.append(self.writer.submit(fn))
+
+    def timer_call(self, fn):
+        # Runs an engine call under the lock, then waits for the writes it queued
+        with self.timer_lock:
+            result = fn()
+            writes, self.timer_writes = self.timer_writes, []
+        for future in writes:
+            future.result()
+        return result
+
+    def tick(self):
+        while not self.ticking.wait(TICK_SECONDS):
+            try:
+                self.timer_call(self.timer.tick)
+            except Exception:
+                traceback.print_exc()
+
+    def start_timer(self, task_id):
+        session = self.timer_call(lambda: self.timer.start(task_id))
+        if session is None:
+            raise NotFound(f"no task {task_id}")
+        return {"id": task_id, "running": True, "elapsed": self.timer.elapsed(task_id)}
+
+    def stop_timer(self, task_id):
+        stopped = self.timer_call(lambda: self.timer.stop(task_id))
+        if stopped is None:
+            raise NotFound(f"no timer running for task {task_id}")
+        session, elapsed, finished = stopped
+        return {"id": task_id, "running": False, "elapsed": elapsed, "completed": finished}
+
+    def timers(self):
+        with self.timer_lock:
+            return [{"id": task_id, "title": s.title, "elapsed": self.timer.elapsed(task_id), "duration": s.duration}
+                    for task_id, s in self.timer.sessions.items()]
+
+    # Tasks
+
+    def filters(self, query):
+        # Query parameters or JSON fields -> TaskStore.filter_sql keywords
+        status = query.get("status")
+        if status not in (None, "open", "overdue", "completed"):
+            raise RowError(f"invalid status {status!r}")
+        priorities = query.get("priority")
+        if isinstance(priorities, str):
+            priorities = priorities.split(",")
+        if priorities:
+            priorities = [PRIORITIES.get(p.strip().lower()) for p in priorities]
+            if None in priorities:
+                raise RowError("invalid priority")
+        return {
+            "status": status,
+            "start": self.normalizer.deadline(query["from"]) if query.get("from") else None,
+            "end": self.normalizer.deadline(query["to"]) if query.get("to") else None,
+            "priorities": priorities or None,
+            "where": self.where(query),
+        }
+
+    def where(self, query):
+        # `where`, a filter expression, and `view`, a saved one, compiled together
+        expressions = [query.get("where")]
+        if query.get("view"):
+            with self.store.pooled() as conn:
+                expressions.append(self.store.view_query(query["view"], conn))
+            if expressions[-1] is None:
+                raise NotFound(f"no view {query['view']!r}")
+        expressions = [f"({expression})" for expression in expressions if expression]
+        return self.store.compile_filter(" ".join(expressions)) if expressions else None
+
+    def report(self, query):
+        # Read from the time rollups, whatever the number of sessions
+        first, last = period_range(query.get("period", "week"))
+        first = self.normalizer.deadline(query["from"]) if query.get("from") else first
+        last = self.normalizer.deadline(query["to"]) if query.get("to") else last
+        group = query.get("by", "day")
+        with self.store.pooled() as conn:
+            rows = self.store.time_report(group, first, last, conn)
+        return {"from": first, "to": last, "by": group,
+                "rows": [{**({group: key} if key else {}), "priority": priority, "seconds": seconds,
+                          "sessions": sessions} for key, priority, seconds, sessions in rows]}
+
+    def views(self):
+        # Counts come from the store's cache until the tasks change
+        with self.store.pooled() as conn:
+            return [{"name": name, "query": query,
+                     "count": self.store.count_tasks(conn, where=self.store.compile_filter(query))}
+                    for name, query in self.store.views(conn)]
+
+    def list_tasks(self, query):
+        limit = min(int(query.get("limit") or LIST_LIMIT), LIST_LIMIT)
+        with self.store.pooled() as conn:
+            if query.get("q"):
+                rows = self.store.search_tasks(query["q"], conn, limit=limit)
+            else:
+                rows = self.store.list_tasks(limit, conn, **self.filters(query)).fetchall()
+        return [dict(zip(EXPORT_KEYS, row)) for row in rows]
+
+    def get_task(self, task_id):
+        with self.store.pooled() as conn:
+            row = self.store.get_task(task_id, conn)
+        if row is None:
+            raise NotFound(f"no task {task_id}")
+        return dict(zip(EXPORT_KEYS, row))
+
+    def new_task(self, task):
+        if not isinstance(task, dict):
+            raise RowError("expected a JSON object")
+        fields = {"priority": "Medium", **{k: "" if v is None else str(v) for k, v in task.items()}}
+        fields.setdefault("deadline", date.today().isoformat())
+        fields.setdefault("title", "")
+        columns = [c for c in ("title", "deadline", "priority", "duration") if c in fields]
+        return self.normalizer.normalize(columns, [fields[c] for c in columns])
+
+    def add_tasks(self, body):
+        # One task -> {"id"}; a list -> {"added"}, inserted as one write
+        if isinstance(body, list):
+            tasks = [self.new_task(task) for task in body]
+            return {"added": self.writer.write(lambda conn: self.store.insert_tasks(tasks, conn))}
+        title, deadline, priority, _, duration, _ = self.new_task(body)
+
+        def add(conn):
+            task_id = self.store.add_task(title, deadline, priority, conn)
+            if duration is not None:
+                self.store.set_duration(task_id, duration, conn)
+            return task_id
+        return {"id": self.writer.write(add)}
+
+    def complete(self, body):
+        if not isinstance(body, dict):
+            raise RowError("expected a JSON object")
+        if body.get("ids"):
+            ids = [int(task_id) for task_id in body["ids"]]
+            count = self.writer.write(lambda conn: self.store.update_tasks(ids, {"completed": 1}, conn))
+            return {"completed": count}
+        filters = self.filters(body)
+        if not any(filters.values()):
+            raise RowError("give ids or a filter")
+        filters["status"] = filters["status"] or "open"
+        return {"completed": self.writer.write(
+            lambda conn: self.store.update_matching({"completed": 1}, conn, **filters))}
+
+    def import_file(self, body):
+        path = body.get("path") if isinstance(body, dict) else None
+        if not path:
+            raise RowError("give the path of a CSV file")
+        result = self.writer.write(lambda conn: import_csv(self.store, path, conn=conn), alone=True)
+        return {"imported": result.imported, "rejected": result.rejected, "reject_path": result.reject_path}
+
+    def stats(self):
+        today = date.today().isoformat()
+        with self.store.pooled() as conn:
+            counts = {
+                "total": self.store.task_count(conn),
+                "open": self.store.task_count(conn, completed=False),
+                "completed": self.store.task_count(conn, completed=True),
+                "overdue": self.store.count_tasks(conn, status="overdue"),
+                "due_today": self.store.count_tasks(conn, status="open", start=today, end=today),
+            }
+        counts["timers"] = len(self.timer)
+        counts["writes"] = self.writer.writes
+        counts["commits"] = self.writer.commits
+        return counts
+
+
+# (method, path, TaskAPI method, what it takes after the path's ids: "query", "body" or nothing)
+ROUTES = [
+    ("GET", re.compile(r"/tasks"), "list_tasks", "query"),
+    ("GET", re.compile(r"/tasks/(\d+)"), "get_task", None),
+    ("POST", re.compile(r"/tasks"), "add_tasks", "body"),
+    ("POST", re.compile(r"/tasks/complete"), "complete", "body"),
+    ("POST", re.compile(r"/tasks/(\d+)/timer/start"), "start_timer", None),
+    ("POST", re.compile(r"/tasks/(\d+)/timer/stop"), "stop_timer", None),
+    ("GET", re.compile(r"/timers"), "timers", None),
+    ("POST", re.compile(r"/import"), "import_file", "body"),
+    ("GET", re.compile(r"/export"), "export", "query"),
+    ("GET", re.compile(r"/stats"), "stats", None),
+    ("GET", re.compile(r"/views"), "views", None),
+    ("GET", re.compile(r"/report"), "report", "query"),
+]
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so a client can reuse its connection
+    server_version = "todo"
+    # Headers and body go out as separate writes; with Nagle on, the body
+    # waits for the client's delayed ACK (~40 ms on Linux)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method):
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        api = self.server.api
+        try:
+            # Read before routing, so a rejected request's body doesn't corrupt the next one
+            body = self.body() if method == "POST" else None
+            for route_method, pattern, name, takes in ROUTES:
+                match = pattern.fullmatch(url.path.rstrip("/") or "/")
+                if route_method == method and match:
+                    break
+            else:
+                raise NotFound(f"no route for {method} {url.path}")
+            args = [int(group) for group in match.groups()]
+            if name == "export":
+                return self.export(query)
+            if takes == "body":
+                args.append(body)
+            elif takes == "query":
+                args.append(query)
+            self.respond(HTTPStatus.OK, getattr(api, name)(*args))
+        except NotFound as e:
+            self.respond(HTTPStatus.NOT_FOUND, {"error": str(e)})
+        except (ValueError, KeyError, OSError) as e:
+            self.respond(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+        except sqlite3.Error as e:
+            self.respond(HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(e)})
+        except Exception as e:
+            traceback.print_exc()
+            self.respond(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+
+    def body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            self.close_connection = True
+            raise RowError("request body too large")
+        data = self.rfile.read(length)
+        return json.loads(data) if data else None
+
+    def respond(self, status, value):
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def export(self, query):
+        # Streamed straight from a read connection; the length isn't known up
+        # front, so the connection closes at the end
+        api = self.server.api
+        fmt = query.get("format", "jsonl")
+        if fmt not in ("csv", "jsonl"):
+            raise RowError(f"invalid format {fmt!r}")
+        filters = api.filters(query)
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/csv" if fmt == "csv" else "application/x-ndjson")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        out = io.TextIOWrapper(self.wfile, encoding="utf-8", newline="", write_through=True)
+        try:
+            with api.store.pooled() as conn:
+                for _ in write_export(out, fmt, api.store.iter_tasks(conn=conn, **filters)):
+                    pass
+        except (sqlite3.Error, OSError):
+            # Too late for an error response; the client sees the stream cut short
+            traceback.print_exc()
+        finally:
+            out.detach()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class TaskServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, api, verbose=False):
+        super().__init__(address, Handler)
+        self.api = api
+        self.verbose = verbose
+
+
+def serve(path=DB_PATH, host=HOST, port=PORT, verbose=False, ready=None):
+    # Runs until interrupted or terminated, then stops running timers and drains
+    # the write queue. `ready(url, recovered)` is called once the socket is
+    # listening, with the timers recovered from a crash.
+    store = TaskStore(path, pool_size=READERS)
+    api = TaskAPI(store)
+    server = TaskServer((host, port), api, verbose)
+    # shutdown() waits for serve_forever to return, so it can't run on this thread
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    if ready:
+        ready(f"http://{server.server_address[0]}:{server.server_address[1]}", api.recovered)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        api.close()
+        store.close()
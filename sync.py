@@ -0,0 +1,71 @@
+"""Two-way sync between task databases, e.g. a laptop's todo.db and a copy on a USB stick.
+
+Each database keeps a change log (see TaskStore.create_change_log) and, per
+peer, the sequence number of the last of that peer's changes it has. A sync
+reads both sides' changes since then, which after a few edits is a few rows
+whatever the table size, and applies each one unless the receiving side has
+a newer version of that task. The sequence numbers are the ones committed
+before the sync, and each side records them in the same transaction as the
+changes it applied, so a sync cut short on one side is simply redone. The
+changes a sync applies are logged again on the receiving side and come back
+on the next sync, where their stamps are equal and they are skipped.
+
+Conflicts are settled per task by last writer wins on (updated_at, origin):
+the change made later wins, and equal timestamps go to the higher replica
+id. Every replica compares the same stamps, so all of them end up with the
+same tasks whatever order they sync in. A delete is a change like any
+other: it loses to a later edit of the same task on another replica.
+"""
+import time
+
+
+class SyncResult:
+    __slots__ = ("sent", "received", "conflicts", "renamed", "ms")
+
+    def __init__(self):
+        self.sent = 0          # changes applied to the other database
+        self.received = 0      # changes applied to this one
+        self.conflicts = 0     # tasks changed differently on both sides since they last synced
+        self.renamed = False   # the other database was a copy of this one and got a new replica id
+        self.ms = 0.0
+
+
+def newer(change, stamps):
+    # Whether a change from changes_since beats the receiver's version of the task
+    return change[1:3] > stamps.get(change[0], (-1, ""))
+
+
+def sync(store, other):
+    """Exchanges changes between two TaskStores; both are written in one transaction each."""
+    result = SyncResult()
+    start = time.perf_counter()
+    with store.transaction() as conn, other.transaction() as other_conn:
+        local_id, remote_id = store.replica_id(conn), other.replica_id(other_conn)
+        if local_id == remote_id:
+            # A copied file: until now both sides have been stamping edits as the same replica
+            remote_id = other.renew_replica_id(other_conn)
+            result.renamed = True
+        local_seq, remote_seq = store.last_change(conn), other.last_change(other_conn)
+        outgoing = store.changes_since(other.peer_seq(local_id, other_conn), conn)
+        incoming = other.changes_since(store.peer_seq(remote_id, conn), other_conn)
+
+        # Each side's current stamps are read before either is written
+        remote_stamps = other.change_stamps((c[0] for c in outgoing), other_conn)
+        local_stamps = store.change_stamps((c[0] for c in incoming), conn)
+        sent = [c for c in outgoing if newer(c, remote_stamps)]
+        received = [c for c in incoming if newer(c, local_stamps)]
+        # A conflict is a task both sides changed since they last synced, which
+        # leaves out the changes that sync applied and that come back as echoes
+        theirs = {c[0]: c[1:3] for c in incoming}
+        changed_here = store.changed_uids(store.synced_seq(remote_id, conn), conn)
+        changed_there = other.changed_uids(other.synced_seq(local_id, other_conn), other_conn)
+        result.conflicts = sum(1 for c in outgoing if c[0] in changed_here and c[0] in changed_there
+                               and theirs.get(c[0], c[1:3]) != c[1:3])
+
+        result.sent = other.apply_changes(sent, other_conn)
+        other.set_peer_seq(local_id, local_seq, other_conn)
+        result.received = store.apply_changes(received, conn)
+        store.set_peer_seq(remote_id, remote_seq, conn)
+    result.ms = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
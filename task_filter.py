@@ -0,0 +1,303 @@
+"""Filter expressions for the task list, compiled to parameterized SQL.
+
+    priority:high status:open due:today..+7d elapsed>1h
+    (priority>=medium or due<today) not status:completed report
+
+Terms are ANDed unless joined by `or`; `not` and parentheses work as usual.
+
+    priority   priority:high, priority:low,medium, priority>=medium
+    status     status:open, status:overdue, status:completed (or done)
+    due        due:today, due<=+7d, due>=2026-10-01, due:01-10-2026..31-10-2026
+               dates are YYYY-MM-DD, DD-MM-YYYY, today, tomorrow, yesterday or
+               days/weeks from today (+3d, -2w); a..b is an inclusive range
+    duration   duration>30m, duration:none; 90, 90s, 45m, 1h30m, 2d
+    elapsed    elapsed>1h, elapsed:0 (time tracked so far)
+    progress   progress>=50%, elapsed over duration for tasks with a duration
+    title      title:"weekly report"; any other word or quoted phrase is the same
+
+The SQL is laid out for the indexes TaskStore.create_views adds:
+a priority with a status and deadline range reads (priority, completed,
+deadline), a status alone (completed, deadline, priority), a deadline range
+(deadline, priority), and tracked time the partial index of tasks with any.
+Title words of three or more characters go through the trigram index.
+"""
+import re
+from datetime import date, datetime, timedelta
+
+from task_store import DATE_FORMAT
+
+
+class FilterError(ValueError):
+    pass
+
+
+PRIORITY_ORDER = ["Low", "Medium", "High"]
+PRIORITY_NAMES = {name.lower(): name for name in PRIORITY_ORDER}
+FIELDS = {
+    "priority": "priority", "p": "priority",
+    "status": "status", "is": "status",
+    "due": "due", "deadline": "due",
+    "duration": "duration",
+    "elapsed": "elapsed", "tracked": "elapsed",
+    "progress": "progress",
+    "title": "title",
+}
+KEYWORDS = ("and", "or", "not")
+OPERATORS = {":": "=", "=": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+NUMBER_COLUMNS = {"duration": "duration", "elapsed": "elapsed_time"}
+UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+RELATIVE_DAYS = {"today": 0, "tomorrow": 1, "yesterday": -1}
+
+TOKEN = re.compile(r"""\s*(?:
+    (?P<paren>[()])
+    | (?P<field>%s)(?P<op><=|>=|!=|[:=<>])(?P<value>"(?:[^"]|"")*"|[^\s()]*)
+    | (?P<text>"(?:[^"]|"")*"|[^\s()"]+)
+)""" % "|".join(sorted(FIELDS, key=len, reverse=True)), re.IGNORECASE | re.VERBOSE)
+
+
+def unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('""', '"')
+    return value
+
+
+def tokenize(text):
+    # ("(" | ")" | "and" | "or" | "not", None, None), ("term", field, (op, value)) or ("text", None, words)
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise FilterError(f"unexpected {text[position:].strip()[:20]!r}")
+        position = match.end()
+        if match["paren"]:
+            tokens.append((match["paren"], None, None))
+        elif match["field"]:
+            if not match["value"]:
+                raise FilterError(f"{match['field']}{match['op']} needs a value")
+            tokens.append(("term", FIELDS[match["field"].lower()], (OPERATORS[match["op"]], unquote(match["value"]))))
+        elif match["text"].lower() in KEYWORDS:
+            tokens.append((match["text"].lower(), None, None))
+        else:
+            tokens.append(("text", None, unquote(match["text"])))
+    return tokens
+
+
+def is_filter(text):
+    # Whether a search box entry uses the filter syntax rather than being plain title text
+    try:
+        return any(kind == "term" for kind, _, _ in tokenize(text))
+    except FilterError:
+        return False
+
+
+# Values
+
+def parse_date(value):
+    value = value.lower()
+    if value in RELATIVE_DAYS:
+        return (date.today() + timedelta(days=RELATIVE_DAYS[value])).isoformat()
+    match = re.fullmatch(r"([+-]?\d+)([dw])", value)
+    if match:
+        days = int(match[1]) * (7 if match[2] == "w" else 1)
+        return (date.today() + timedelta(days=days)).isoformat()
+    for fmt in ("%Y-%m-%d", DATE_FORMAT):
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            pass
+    raise FilterError(f"invalid date {value!r}")
+
+
+def parse_seconds(value):
+    if value.isdigit():
+        return int(value)
+    parts = re.findall(r"(\d+)([smhd])", value.lower())
+    if not parts or "".join(n + u for n, u in parts) != value.lower():
+        raise FilterError(f"invalid time {value!r} (e.g. 90, 45m, 1h30m)")
+    return sum(int(n) * UNIT_SECONDS[u] for n, u in parts)
+
+
+def parse_percent(value):
+    try:
+        return float(value.rstrip("%"))
+    except ValueError:
+        raise FilterError(f"invalid percentage {value!r}")
+
+
+def parse_priority(value):
+    priority = PRIORITY_NAMES.get(value.lower())
+    if priority is None:
+        raise FilterError(f"invalid priority {value!r}")
+    return priority
+
+
+# Terms -> (sql, params)
+
+def range_term(column, op, value, parse):
+    # `a..b` is an inclusive range; otherwise a comparison
+    if ".." in value:
+        if op != "=":
+            raise FilterError(f"a range needs ':', not {op!r}")
+        low, high = value.split("..", 1)
+        clauses, params = [], []
+        if low:
+            clauses.append(f"{column} >= ?")
+            params.append(parse(low))
+        if high:
+            clauses.append(f"{column} <= ?")
+            params.append(parse(high))
+        return " AND ".join(clauses) or "1", params
+    return f"{column} {op} ?", [parse(value)]
+
+
+def priority_term(op, value):
+    if op in ("=", "!="):
+        priorities = [parse_priority(v) for v in value.split(",")]
+        marks = ",".join("?" * len(priorities))
+        return f"priority {'NOT IN' if op == '!=' else 'IN'} ({marks})", priorities
+    # Priorities compare by rank: priority>=medium is Medium or High
+    rank = PRIORITY_ORDER.index(parse_priority(value))
+    keep = {"<": lambda r: r < rank, "<=": lambda r: r <= rank,
+            ">": lambda r: r > rank, ">=": lambda r: r >= rank}[op]
+    priorities = [name for r, name in enumerate(PRIORITY_ORDER) if keep(r)]
+    if not priorities:
+        return "0", []
+    return f"priority IN ({','.join('?' * len(priorities))})", priorities
+
+
+def status_term(op, value):
+    if op not in ("=", "!="):
+        raise FilterError("status takes ':' or '!='")
+    value = value.lower()
+    if value == "open":
+        sql, params = "completed = ?", [0]
+    elif value in ("completed", "done"):
+        sql, params = "completed = ?", [1]
+    elif value == "overdue":
+        sql, params = "completed = ? AND deadline < ?", [0, date.today().isoformat()]
+    else:
+        raise FilterError(f"invalid status {value!r} (open, overdue or completed)")
+    return (f"NOT ({sql})", params) if op == "!=" else (sql, params)
+
+
+def number_term(field, op, value):
+    column = NUMBER_COLUMNS[field]
+    if value.lower() == "none":
+        if op not in ("=", "!="):
+            raise FilterError(f"{field} none takes ':' or '!='")
+        return f"{column} IS {'NOT ' if op == '!=' else ''}NULL", []
+    sql, params = range_term(column, op, value, parse_seconds)
+    if field == "elapsed" and ".." not in value and (op == ">" and params[0] >= 0 or op == ">=" and params[0] > 0):
+        # Spelled out so the planner can use the partial index of tracked tasks
+        sql += " AND elapsed_time > 0"
+    return sql, params
+
+
+def progress_term(op, value):
+    # elapsed/duration multiplied out, for tasks with a duration
+    if ".." in value:
+        if op != "=":
+            raise FilterError(f"a range needs ':', not {op!r}")
+        low, high = value.split("..", 1)
+        bounds = [(">=", parse_percent(low)) if low else None, ("<=", parse_percent(high)) if high else None]
+    else:
+        bounds = [(op, parse_percent(value))]
+    clauses, params = ["duration > 0"], []
+    for bound_op, percent in filter(None, bounds):
+        clauses.append(f"elapsed_time * 100.0 {bound_op} ? * duration")
+        params.append(percent)
+        if bound_op == ">" and percent >= 0 or bound_op == ">=" and percent > 0:
+            # Only tracked tasks qualify, so the partial index of them can be used
+            clauses.append("elapsed_time > 0")
+    return " AND ".join(clauses), params
+
+
+def title_term(words, has_fts):
+    if has_fts and len(words) >= 3:
+        return "id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)", ['"' + words.replace('"', '""') + '"']
+    pattern = "%" + words.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return "title LIKE ? ESCAPE '\\'", [pattern]
+
+
+def term_sql(field, op, value, has_fts):
+    if field == "priority":
+        return priority_term(op, value)
+    if field == "status":
+        return status_term(op, value)
+    if field == "due":
+        return range_term("deadline", op, value, parse_date)
+    if field in NUMBER_COLUMNS:
+        return number_term(field, op, value)
+    if field == "progress":
+        return progress_term(op, value)
+    if op not in ("=", "!="):
+        raise FilterError("title takes ':' or '!='")
+    sql, params = title_term(value, has_fts)
+    return (f"NOT ({sql})", params) if op == "!=" else (sql, params)
+
+
+# Parser: or := and ("or" and)*; and := unary ("and"? unary)*; unary := "not" unary | "(" or ")" | term
+
+class Parser:
+    def __init__(self, tokens, has_fts):
+        self.tokens = tokens
+        self.position = 0
+        self.has_fts = has_fts
+
+    def peek(self):
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def take(self):
+        self.position += 1
+        return self.tokens[self.position - 1]
+
+    def parse(self):
+        sql, params = self.any_of()
+        if self.peek() is not None:
+            raise FilterError(f"unexpected {self.peek()!r}")
+        return sql, params
+
+    def any_of(self):
+        parts = [self.all_of()]
+        while self.peek() == "or":
+            self.take()
+            parts.append(self.all_of())
+        if len(parts) == 1:
+            return parts[0]
+        return " OR ".join(f"({sql})" for sql, _ in parts), [p for _, params in parts for p in params]
+
+    def all_of(self):
+        parts = [self.unary()]
+        while self.peek() not in (None, "or", ")"):
+            if self.peek() == "and":
+                self.take()
+            parts.append(self.unary())
+        if len(parts) == 1:
+            return parts[0]
+        return " AND ".join(f"({sql})" for sql, _ in parts), [p for _, params in parts for p in params]
+
+    def unary(self):
+        kind, field, value = self.take() if self.peek() is not None else (None, None, None)
+        if kind == "not":
+            sql, params = self.unary()
+            return f"NOT ({sql})", params
+        if kind == "(":
+            sql, params = self.any_of()
+            if self.peek() != ")":
+                raise FilterError("missing ')'")
+            self.take()
+            return sql, params
+        if kind == "term":
+            return term_sql(field, *value, self.has_fts)
+        if kind == "text":
+            return title_term(value, self.has_fts)
+        raise FilterError("expected a term" if kind is None else f"unexpected {kind!r}")
+
+
+def compile_filter(text, has_fts=True):
+    """(condition, params) for a filter expression; dates relative to today are resolved now."""
+    if not text.strip():
+        return "1", []
+    return Parser(tokenize(text), has_fts).parse()
@@ -0,0 +1,227 @@
+import csv
+import gzip
+import itertools
+import json
+import os
+from datetime import date
+from task_store import to_display
+
+IMPORT_BATCH_SIZE = 20000
+PRIORITIES = {"low": "Low", "medium": "Medium", "high": "High"}
+TRUE_VALUES = {"1", "true", "yes", "y", "✔", "done"}
+FALSE_VALUES = {"0", "false", "no", "n", "✘", ""}
+
+# CSV header -> task column; files without a recognised header use the old
+# Title, Deadline, Priority, Completed order
+HEADER_COLUMNS = {
+    "title": "title", "deadline": "deadline", "priority": "priority", "completed": "completed",
+    "duration": "duration", "elapsed_time": "elapsed_time", "elapsed": "elapsed_time",
+}
+DEFAULT_COLUMNS = ["title", "deadline", "priority", "completed"]
+
+
+class RowError(ValueError):
+    pass
+
+
+class ImportResult:
+    __slots__ = ("imported", "rejected", "cancelled", "reject_path")
+
+    def __init__(self):
+        self.imported = 0
+        self.rejected = 0
+        self.cancelled = False
+        self.reject_path = None
+
+
+class CsvSource:
+    """Lazily parses a CSV file, keeping track of how many bytes were consumed."""
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.bytes_read = 0
+
+    def lines(self, raw):
+        first = True
+        for line in raw:
+            self.bytes_read += len(line)
+            yield line.decode("utf-8-sig" if first else "utf-8", errors="replace")
+            first = False
+
+    def rows(self):
+        with open(self.path, "rb") as raw:
+            yield from csv.reader(self.lines(raw))
+
+    def fraction(self):
+        return self.bytes_read / self.size if self.size else 1.0
+
+
+class RowNormalizer:
+    def __init__(self):
+        self.dates = {}  # deadlines repeat a lot, so each distinct string is parsed once
+
+    def deadline(self, value):
+        value = value.strip()
+        iso = self.dates.get(value)
+        if iso is None:
+            try:
+                if len(value) == 10 and value[2] == "-" and value[5] == "-":
+                    iso = date(int(value[6:]), int(value[3:5]), int(value[:2])).isoformat()
+                elif len(value) == 10 and value[4] == "-" and value[7] == "-":
+                    iso = date(int(value[:4]), int(value[5:7]), int(value[8:])).isoformat()
+                else:
+                    raise ValueError
+            except ValueError:
+                raise RowError(f"invalid deadline {value!r}")
+            self.dates[value] = iso
+        return iso
+
+    @staticmethod
+    def seconds(value, name):
+        value = value.strip()
+        if not value:
+            return None
+        try:
+            seconds = int(value)
+        except ValueError:
+            raise RowError(f"invalid {name} {value!r}")
+        if seconds < 0:
+            raise RowError(f"negative {name}")
+        return seconds
+
+    def normalize(self, columns, row):
+        if len(row) < len(columns):
+            raise RowError(f"expected {len(columns)} fields, got {len(row)}")
+        fields = dict(zip(columns, row))
+        title = fields["title"].strip()
+        if not title:
+            raise RowError("missing title")
+        priority = PRIORITIES.get(fields.get("priority", "").strip().lower())
+        if priority is None:
+            raise RowError(f"invalid priority {fields.get('priority')!r}")
+        completed = fields.get("completed", "").strip().lower()
+        if completed not in TRUE_VALUES and completed not in FALSE_VALUES:
+            raise RowError(f"invalid completed flag {completed!r}")
+        duration = self.seconds(fields.get("duration", ""), "duration")
+        elapsed = self.seconds(fields.get("elapsed_time", ""), "elapsed time") or 0
+        return (title, self.deadline(fields["deadline"]), priority,
+                int(completed in TRUE_VALUES), duration, elapsed)
+
+
+def header_columns(row):
+    columns = [HEADER_COLUMNS.get(name.strip().lower().replace(" ", "_")) for name in row]
+    if "title" in columns and "deadline" in columns:
+        return columns
+    return None
+
+
+def import_csv(store, path, batch_size=IMPORT_BATCH_SIZE, progress=None, cancel=None, reject_path=None,
+               conn=None):
+    """Streams `path` into the store in batched transactions.
+
+    Rows that fail validation are written, with the reason, to `reject_path`
+    (default: <path>.rejected.csv). `progress(fraction, imported)` is called
+    after every batch and `cancel` is an optional threading.Event checked
+    between batches; batches already committed are kept. `conn` defaults to
+    a pooled connection.
+    """
+    result = ImportResult()
+    source = CsvSource(path)
+    normalizer = RowNormalizer()
+    reject_path = reject_path or path + ".rejected.csv"
+    reject_file = rejects = None
+    parsed = rows = source.rows()
+    batch = []
+
+    first = next(rows, None)
+    columns = header_columns(first) if first else None
+    if first is not None and columns is None:
+        columns = DEFAULT_COLUMNS
+        rows = itertools.chain([first], rows)
+
+    try:
+        with store.pooled(conn) as conn, store.bulk_load(conn):
+            for row in rows:
+                if not row:
+                    continue
+                try:
+                    batch.append(normalizer.normalize(columns, row))
+                except RowError as e:
+                    if rejects is None:
+                        reject_file = open(reject_path, "w", newline="", encoding="utf-8")
+                        rejects = csv.writer(reject_file)
+                    rejects.writerow(row + [str(e)])
+                    result.rejected += 1
+                    continue
+                if len(batch) >= batch_size:
+                    result.imported += store.insert_tasks(batch, conn)
+                    batch = []
+                    if progress:
+                        progress(source.fraction(), result.imported)
+                    if cancel is not None and cancel.is_set():
+                        result.cancelled = True
+                        break
+            if batch and not result.cancelled:
+                result.imported += store.insert_tasks(batch, conn)
+    finally:
+        parsed.close()
+        if reject_file:
+            reject_file.close()
+            result.reject_path = reject_path
+    if progress:
+        progress(1.0, result.imported)
+    return result
+
+
+EXPORT_CHUNK_SIZE = 5000
+EXPORT_HEADER = ["Id", "Title", "Deadline", "Priority", "Completed", "Duration", "Elapsed Time"]
+EXPORT_KEYS = ["id", "title", "deadline", "priority", "completed", "duration", "elapsed_time"]
+
+
+def open_export(path, compress=None):
+    if compress is None:
+        compress = path.endswith(".gz")
+    if compress:
+        return gzip.open(path, "wt", compresslevel=6, newline="", encoding="utf-8")
+    return open(path, "w", newline="", encoding="utf-8")
+
+
+def write_export(f, fmt, chunks):
+    # Writes chunks of task rows to the text file `f` as CSV or JSON Lines,
+    # yielding the running row count after each
+    written = 0
+    if fmt == "csv":
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_HEADER)
+    for chunk in chunks:
+        if fmt == "csv":
+            writer.writerows((task_id, title, to_display(deadline), priority, int(bool(completed)),
+                              "" if duration is None else duration, elapsed or 0)
+                             for task_id, title, deadline, priority, completed, duration, elapsed in chunk)
+        else:
+            f.writelines(json.dumps(dict(zip(EXPORT_KEYS, row)), ensure_ascii=False) + "\n" for row in chunk)
+        written += len(chunk)
+        yield written
+
+
+def export_tasks(store, path, fmt=None, compress=None, progress=None, cancel=None,
+                 chunk_size=EXPORT_CHUNK_SIZE, conn=None, **filters):
+    """Streams tasks matching `filters` (see TaskStore.iter_tasks) to `path`.
+
+    `fmt` is "csv" or "jsonl", guessed from the file name when omitted; a
+    ".gz" suffix compresses. Every column is written, so a re-import keeps
+    durations and tracked time. Memory use is bounded by `chunk_size`.
+    """
+    name = path[:-3] if path.endswith(".gz") else path
+    fmt = fmt or ("jsonl" if name.endswith((".jsonl", ".ndjson", ".json")) else "csv")
+    written = 0
+    with store.pooled(conn) as conn:
+        total = store.count_tasks(conn=conn, **filters)
+        with open_export(path, compress) as f:
+            for written in write_export(f, fmt, store.iter_tasks(conn=conn, chunk_size=chunk_size, **filters)):
+                if progress:
+                    progress(written / total if total else 1.0, written)
+                if cancel is not None and cancel.is_set():
+                    break
+    return written
@@ -0,0 +1,275 @@
+import bisect
+
+# Python equivalent of "ORDER BY priority DESC" for the known priorities; NULL sorts last
+PRIORITY_DESC = {"Medium": 0, "Low": 1, "High": 2}
+PAGE_SIZE = 500
+
+
+class TaskRecord:
+    __slots__ = ("id", "title", "deadline", "priority", "completed", "duration", "elapsed_time",
+                 "version", "text", "text_key")
+
+    def __init__(self, row, strings):
+        self.version = 0
+        self.text = None
+        self.text_key = None
+        self.assign(row, strings)
+
+    def assign(self, row, strings):
+        # Deadlines and priorities repeat across many rows, so they share one string object each
+        task_id, title, deadline, priority, completed, duration, elapsed_time = row
+        self.id = task_id
+        self.title = title
+        self.deadline = strings.setdefault(deadline, deadline)
+        self.priority = strings.setdefault(priority, priority)
+        self.completed = bool(completed)
+        self.duration = duration
+        self.elapsed_time = elapsed_time
+        self.version += 1
+
+    def __getitem__(self, index):
+        # Lets a record stand in for the task tuple the list widget was written for
+        if index == 0:
+            return self.id
+        return (self.id, self.title, self.deadline, self.priority, self.completed,
+                self.duration, self.elapsed_time)[index]
+
+    def rendered(self, key, render):
+        # Display text is built once per (version, format) and reused until the row changes
+        key = (self.version, key)
+        if self.text_key != key:
+            self.text = render(self)
+            self.text_key = key
+        return self.text
+
+
+def deadline_key(record):
+    # Mirrors ORDER BY deadline ASC, priority DESC, id ASC
+    return (record.deadline or "", PRIORITY_DESC.get(record.priority, 3 if record.priority else 4), record.id)
+
+
+class TaskModel:
+    """The task records the list has paged in, shared by every sort order.
+
+    TaskPages reads the list a page at a time and takes its records from
+    here, so a task has one record however many orders have loaded it.
+    Mutations go through `invalidate`, which re-reads one row and updates
+    its record in place. Changes committed by other connections (imports,
+    other processes) show up in PRAGMA data_version, and the caller then
+    clears the model.
+    """
+
+    def __init__(self, store, classifier):
+        self.store = store
+        self.classifier = classifier
+        self.records = {}
+        self.strings = {}
+        self.version = 0
+        self.data_version = None
+
+    def clear(self):
+        # Drops every cached record, e.g. after another program changed the tasks
+        self.records = {}
+        self.version += 1
+
+    def add(self, row):
+        record = TaskRecord(row, self.strings)
+        self.records[record.id] = record
+        return record
+
+    def get(self, task_id):
+        return self.records.get(task_id)
+
+    def sort_key(self, order):
+        if order == "color":
+            rank = self.classifier.rank
+            return lambda r: (rank(r.deadline, r.priority, r.completed), r.deadline or "", r.id)
+        return deadline_key
+
+    def from_rows(self, rows):
+        # Records for rows another query returned (search results), in the same order
+        return [self.records.get(row[0]) or self.add(row) for row in rows]
+
+    # Invalidation
+
+    def invalidate(self, task_id, row=False):
+        # Re-reads one task after a write, unless the caller already has its row
+        # (None when deleted); returns (old deadline or None, record or None)
+        if row is False:
+            row = self.store.get_task(task_id)
+        old = self.records.get(task_id)
+        old_deadline = old.deadline if old else None
+        self.version += 1
+
+        if row is None:
+            self.records.pop(task_id, None)
+            return old_deadline, None
+        if old is None:
+            return old_deadline, self.add(row)
+        old.assign(row, self.strings)
+        return old_deadline, old
+
+    def set_elapsed(self, task_id, elapsed):
+        # Timer ticks change no sort key, so only the record's text goes stale
+        record = self.records.get(task_id)
+        if record is not None and record.elapsed_time != elapsed:
+            record.elapsed_time = elapsed
+            record.version += 1
+        return record
+
+
+class TaskPages:
+    """One sort order of the task list, read a page at a time.
+
+    Each page is a keyset query continuing from the last row loaded, so a page
+    deep in the list costs what the first one does, and only the part of the
+    list scrolled through is in memory. The length is the task count from
+    TaskStore.task_count, so the scrollbar is sized from the first page.
+
+    Reading within half a page of the loaded end hands the next page to
+    `prefetch(pages)`, which fetches it (usually on another thread) and passes
+    it to `extend`; reading past the loaded end fetches synchronously. Rows
+    are the model's records, so `TaskModel.invalidate` keeps them current.
+    The list's row patches only touch the loaded rows: a changed task that
+    now sorts after them is left to arrive with a later page.
+
+    With `where`, a compiled filter expression (see task_filter.py), only
+    the matching tasks are paged, and the length is their cached count.
+    """
+
+    def __init__(self, model, order="deadline", page_size=PAGE_SIZE, prefetch=None, where=None):
+        self.model = model
+        self.order = order
+        self.where = where
+        self.page_size = page_size
+        self.prefetch = prefetch
+        self.rows = []
+        self.total = 0
+        self.exhausted = False
+        self.prefetching = False
+        self.day = None
+
+    def key(self, record):
+        # The keyset the store pages on for this order
+        if self.order == "color":
+            return (self.model.classifier.rank(record.deadline, record.priority, record.completed),
+                    record.deadline, record.id)
+        return (record.deadline, record.priority, record.id)
+
+    def last_key(self):
+        return self.key(self.rows[-1]) if self.rows else None
+
+    def fetch(self, conn=None, after=None):
+        # Safe on any thread with its own connection
+        store = self.model.store
+        if self.order == "color":
+            return store.color_page(self.model.classifier, after, self.page_size, conn, self.where)
+        return store.deadline_page(after, self.page_size, conn, self.where)
+
+    def count(self, conn=None):
+        store = self.model.store
+        return store.count_tasks(conn, where=self.where) if self.where else store.task_count(conn)
+
+    def fetch_first(self, conn=None):
+        return self.count(conn), self.fetch(conn)
+
+    def start(self, first):
+        # Installs what fetch_first returned
+        self.model.classifier.refresh()
+        self.day = self.model.classifier.valid_until
+        self.total, rows = first
+        self.rows = []
+        self.exhausted = False
+        self.extend(rows, None)
+
+    def extend(self, rows, after):
+        # Appends a page fetched after the key `after`; it is dropped if the
+        # loaded rows have moved on since it was requested
+        self.prefetching = False
+        if after != self.last_key():
+            return False
+        self.rows.extend(self.model.from_rows(rows))
+        if len(rows) < self.page_size:
+            self.exhausted = True
+            self.total = len(self.rows)
+        else:
+            self.total = max(self.total, len(self.rows))
+        return True
+
+    def ensure(self, count):
+        # Loads pages until `count` rows are in memory or the table ends.
+        # Prefetch normally has the pages in ahead of the scroll; reading here,
+        # on the caller's thread, is the deliberate fallback for a jump past
+        # them (a scrollbar drag), whose rows have to be shown at once.
+        while len(self.rows) < count and not self.exhausted:
+            after = self.last_key()
+            self.extend(self.fetch(after=after), after)
+        if (self.prefetch and not self.prefetching and not self.exhausted
+                and len(self.rows) - count < self.page_size // 2):
+            self.prefetching = True
+            self.prefetch(self)
+
+    def recount(self, total=None):
+        # After a write, before the list is patched: tasks can be added or
+        # removed outside the loaded part. Once every page is in, the
+        # patches themselves keep the total. `total` is count() if the
+        # caller read it with the write.
+        if not self.exhausted:
+            self.total = max(len(self.rows), self.count() if total is None else total)
+
+    def position(self, record, sort_key):
+        # Where a changed record goes among the loaded rows, or None when it
+        # sorts after them and will come with a later page
+        index = bisect.bisect_right(self.rows, sort_key(record), key=sort_key)
+        if index == len(self.rows) and not self.exhausted:
+            return None
+        return index
+
+    def merge(self, kept, records, sort_key, total=None):
+        # Bulk counterpart of the row patches: `kept` are the loaded rows that
+        # didn't change and `records` the changed tasks, merged back in order
+        # unless they now sort after the loaded rows
+        if not self.exhausted:
+            last = sort_key(kept[-1]) if kept else None
+            records = [record for record in records if last is not None and sort_key(record) < last]
+        self.rows = sorted(kept + records, key=sort_key)
+        if self.exhausted:
+            self.total = len(self.rows)
+        else:
+            self.recount(total)
+
+    def stale(self):
+        # Color ranks are relative to today, so that order is re-read after midnight
+        self.model.classifier.refresh()
+        return self.order == "color" and self.day != self.model.classifier.valid_until
+
+    # The sequence VirtualList reads and patches
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            self.ensure(index.indices(self.total)[1])
+            return self.rows[index]
+        if index < 0:
+            index += self.total
+        self.ensure(index + 1)
+        return self.rows[index]
+
+    def __setitem__(self, index, record):
+        self.rows[index] = record
+
+    def __iter__(self):
+        # The loaded rows only
+        return iter(self.rows)
+
+    def insert(self, index, record):
+        self.rows.insert(index, record)
+        if self.exhausted:
+            self.total += 1
+
+    def pop(self, index):
+        if self.exhausted:
+            self.total -= 1
+        return self.rows.pop(index)
@@ -0,0 +1,1384 @@
+import os
+import sqlite3
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+DB_PATH = "todo.db"
+TASK_COLUMNS = "id, title, deadline, priority, completed, duration, elapsed_time"
+
+# Deadlines are stored as ISO dates (YYYY-MM-DD) so they sort and range-scan
+# by date; the UI and CSV files keep using DD-MM-YYYY.
+DATE_FORMAT = "%d-%m-%Y"
+
+
+def to_iso(display_date):
+    try:
+        return datetime.strptime(display_date, DATE_FORMAT).date().isoformat()
+    except (TypeError, ValueError):
+        return display_date
+
+
+def to_display(iso_date):
+    if iso_date and len(iso_date) == 10 and iso_date[4] == "-":
+        return f"{iso_date[8:10]}-{iso_date[5:7]}-{iso_date[0:4]}"
+    return iso_date
+
+# Applied to every connection the store opens. WAL lets background readers run
+# while the UI thread writes, and synchronous=NORMAL is durable in WAL mode
+# without an fsync on every commit. auto_vacuum only takes effect on a new
+# database (it has to come before journal_mode for that) or after a VACUUM.
+PRAGMAS = {
+    "auto_vacuum": "INCREMENTAL",
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,      # ~16 MB page cache
+    "mmap_size": 268435456,    # 256 MB memory-mapped I/O
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+    "analysis_limit": 400,     # ANALYZE and PRAGMA optimize sample each index instead of reading all of it
+}
+
+
+# Colors in "Sort by Color" order; a task's color rank is its index here
+COLORS = ["purple", "red", "orange", "green", "black", "#888"]
+URGENT_PRIORITIES = ("High", "Medium")
+FAR_FUTURE_DAYS = 999
+ISO_DATE_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+OPEN_PRIORITIES = {0: None, 1: "Low", 2: "Medium", 3: "High"}
+COMPLETED_RANK = 5
+# Deadlines an open task of each color rank can have (see rank_sql); the ranks
+# left out can have any deadline. Written as ranges so SQLite merges them with
+# the keyset's lower bound into one index range.
+COLOR_RANK_BOUNDS = {
+    0: "deadline < :today",
+    1: "deadline BETWEEN :today AND :today",
+    2: "deadline BETWEEN :today AND :day_after",
+}
+
+
+class DeadlineClassifier:
+    """Color rules shared by the list, color sort and calendar views.
+
+    Day boundaries are computed once and only recomputed after midnight, and
+    deadlines are compared as integer day offsets from today.
+    """
+
+    def __init__(self):
+        self.valid_until = 0
+        self.ordinals = {}
+        self.refresh()
+
+    def refresh(self):
+        now = time.time()
+        if now < self.valid_until:
+            return False
+        today = date.today()
+        self.today_ordinal = today.toordinal()
+        self.today = today.isoformat()
+        self.tomorrow = (today + timedelta(days=1)).isoformat()
+        self.day_after = (today + timedelta(days=2)).isoformat()
+        self.valid_until = datetime.combine(today + timedelta(days=1), datetime.min.time()).timestamp()
+        return True
+
+    def day_offset(self, deadline):
+        ordinal = self.ordinals.get(deadline)
+        if ordinal is None:
+            try:
+                ordinal = date.fromisoformat(deadline).toordinal()
+            except (TypeError, ValueError):
+                return FAR_FUTURE_DAYS
+            self.ordinals[deadline] = ordinal
+        return ordinal - self.today_ordinal
+
+    def rank(self, deadline, priority, completed):
+        if completed:
+            return COMPLETED_RANK
+        days = self.day_offset(deadline)
+        urgent = priority in URGENT_PRIORITIES
+        if days < 0:
+            return 0
+        if days == 0:
+            return 1 if urgent else 2 if priority == "Low" else 4
+        if days <= 2:
+            return 2 if urgent else 3 if priority == "Low" else 4
+        return 3 if urgent else 4
+
+    def classify(self, deadline, priority, completed):
+        self.refresh()
+        return COLORS[self.rank(deadline, priority, completed)]
+
+    def classify_rows(self, rows):
+        # Rows are (id, title, deadline, priority, completed, ...) tuples
+        self.refresh()
+        rank = self.rank
+        return [COLORS[rank(row[2], row[3], row[4])] for row in rows]
+
+    def rank_sql(self):
+        # The same rules as rank(), as a CASE expression with named parameters
+        self.refresh()
+        sql = f"""CASE
+            WHEN completed THEN {COMPLETED_RANK}
+            WHEN deadline < :today AND deadline GLOB '{ISO_DATE_GLOB}' THEN 0
+            WHEN deadline = :today THEN
+                CASE WHEN priority IN ('High', 'Medium') THEN 1 WHEN priority = 'Low' THEN 2 ELSE 4 END
+            WHEN deadline IN (:tomorrow, :day_after) THEN
+                CASE WHEN priority IN ('High', 'Medium') THEN 2 WHEN priority = 'Low' THEN 3 ELSE 4 END
+            ELSE
+                CASE WHEN priority IN ('High', 'Medium') THEN 3 ELSE 4 END
+        END"""
+        return sql, {"today": self.today, "tomorrow": self.tomorrow, "day_after": self.day_after}
+
+
+# SQL for a new task uid, a new replica id and the current time in milliseconds
+NEW_UID = "lower(hex(randomblob(16)))"
+NEW_REPLICA = "lower(hex(randomblob(8)))"
+NOW_MS = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+SYNC_COLUMNS = "uid, title, deadline, priority, completed, duration, elapsed_time"
+ARCHIVE_COLUMNS = f"{TASK_COLUMNS}, uid, completed_at"
+
+ARCHIVE_DAYS = 30      # completed tasks are archived this long after completion
+ARCHIVE_BATCH = 2000   # tasks moved per transaction
+VACUUM_PAGES = 2000    # freed pages returned to the file system per incremental vacuum step
+
+BULK_CACHE_SIZE = -262144  # ~256 MB while bulk loading
+BULK_COLUMNS = ("deadline", "priority", "completed", "duration")  # what bulk edits may set
+ID_CHUNK = 500  # ids per IN (...) list, under SQLite's bound-parameter limit
+COUNT_CACHE_SIZE = 64  # filtered counts kept by count_tasks
+TIMER_LEASE = 300  # seconds without a checkpoint (one every 30 while running) before a timer's owner is taken for gone
+
+# Time report periods (see period_range) and groupings (see time_report)
+PERIODS = ("today", "week", "month", "year", "all")
+REPORT_GROUPS = ("day", "week", "priority")
+
+
+def week_start(day):
+    # The Monday of a date's week, which keys the weekly rollup
+    return day - timedelta(days=day.weekday())
+
+
+def period_range(period, today=None):
+    # (first, last) ISO dates of this day/week/month/year, or (None, None) for all
+    today = today or date.today()
+    if period == "today":
+        first = today
+    elif period == "week":
+        first = week_start(today)
+    elif period == "month":
+        first = today.replace(day=1)
+    elif period == "year":
+        first = today.replace(month=1, day=1)
+    elif period == "all":
+        return None, None
+    else:
+        raise ValueError(f"invalid period {period!r} ({', '.join(PERIODS)})")
+    return first.isoformat(), today.isoformat()
+
+
+def host_name():
+    # Imported here: socket costs the command line a few milliseconds at start-up
+    import socket
+    return socket.gethostname()
+
+
+def process_alive(pid):
+    # Whether a process with this pid runs on this machine. Windows has no
+    # harmless probe (signal 0 there is CTRL_C_EVENT), so it is taken to run
+    # and only the lease decides.
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def named_filter(where):
+    # A compiled filter (see TaskStore.compile_filter) with its ? parameters
+    # renamed, for the queries that bind named ones. The compiled SQL has no
+    # literal ? of its own: every value in it is a parameter.
+    condition, params = where
+    parts = condition.split("?")
+    sql = parts[0] + "".join(f":filter_{i}{part}" for i, part in enumerate(parts[1:]))
+    return sql, {f"filter_{i}": value for i, value in enumerate(params)}
+
+
+def set_clause(values):
+    # "col=?, ..." and its parameters for a {column: value} dict of BULK_COLUMNS
+    unknown = set(values) - set(BULK_COLUMNS)
+    if unknown:
+        raise ValueError(f"cannot bulk-set {', '.join(sorted(unknown))}")
+    return ", ".join(f"{column}=?" for column in values), list(values.values())
+
+
+class TaskStore:
+    """Owns the todo.db schema and every query the app runs; has no Tk dependency."""
+
+    def __init__(self, path=DB_PATH, pool_size=4, profiler=None):
+        self.path = path
+        self.profiler = profiler
+        self.conn = self.connect()
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._counts = {}  # (where, params) -> (count_stamp, count)
+        self._counts_lock = threading.Lock()
+        self.has_fts = False
+        self.create_schema()
+
+    def connect(self):
+        connect = self.profiler.connect if self.profiler else sqlite3.connect
+        conn = connect(self.path, isolation_level=None, check_same_thread=False)
+        for name, value in PRAGMAS.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    @contextmanager
+    def transaction(self, conn=None):
+        conn = conn or self.conn
+        if conn.in_transaction:
+            # Already inside an outer scope, which owns the commit
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def pooled(self, conn=None):
+        # Background threads borrow a connection instead of opening a new one per call;
+        # a caller that already owns one (an executor worker) passes it through
+        if conn is not None:
+            yield conn
+            return
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self.connect()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def data_version(self, conn=None):
+        # Changes whenever another connection commits to the database file; the
+        # value is only comparable with earlier reads on the same connection
+        return (conn or self.conn).execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        self.conn.close()
+
+    def migrations(self):
+        # Schema changes in the order they were introduced; PRAGMA user_version
+        # records how many of them a database has had. Append, never reorder.
+        return [
+            self.create_base_schema,
+            self.create_search_index,
+            self.create_task_counts,
+            self.create_auto_complete,
+            self.create_change_log,
+            self.create_archive,
+            self.create_views,
+            self.create_timer_sessions,
+            self.count_sessions_once,
+            self.add_timer_owners,
+            self.add_sync_marks,
+            self.defer_bulk_logging,
+        ]
+
+    def create_schema(self):
+        # An up-to-date database costs one header read here, and no write transaction
+        migrations = self.migrations()
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < len(migrations):
+            with self.transaction() as conn:
+                # Re-read under the write lock, in case another process migrated meanwhile
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                for number, migrate in enumerate(migrations[version:], version + 1):
+                    migrate(conn)
+                    conn.execute(f"PRAGMA user_version={number}")
+        self.has_fts = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name='tasks_fts'").fetchone() is not None
+        # A bulk load cut off by a crash still has to be indexed and logged
+        if self.has_fts:
+            self.resume_search_index(self.conn)
+        self.resume_bulk_load(self.conn)
+
+    def create_base_schema(self, conn):
+        # Databases from before user_version was kept may already have some of
+        # this, so every step checks first
+        conn.execute("""CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            deadline TEXT,
+            priority TEXT,
+            completed BOOLEAN
+        )""")
+
+        # Check if new columns exist and add them if they don't
+        existing_columns = [col[1] for col in conn.execute("PRAGMA table_info(tasks)").fetchall()]
+
+        if "duration" not in existing_columns:
+            conn.execute("ALTER TABLE tasks ADD COLUMN duration INTEGER DEFAULT NULL")
+
+        if "elapsed_time" not in existing_columns:
+            conn.execute("ALTER TABLE tasks ADD COLUMN elapsed_time INTEGER DEFAULT 0")
+
+        # One-time conversion of DD-MM-YYYY deadlines, done before the deadline indexes exist
+        existing_indexes = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")]
+
+        if "idx_tasks_deadline" not in existing_indexes:
+            conn.execute("""
+                UPDATE tasks
+                SET deadline = substr(deadline, 7, 4) || '-' || substr(deadline, 4, 2) || '-' || substr(deadline, 1, 2)
+                WHERE deadline GLOB '[0-9][0-9]-[0-9][0-9]-[0-9][0-9][0-9][0-9]'
+            """)
+            conn.execute("CREATE INDEX idx_tasks_deadline ON tasks(deadline ASC, priority DESC)")
+
+        if "idx_tasks_completed_deadline" not in existing_indexes:
+            conn.execute("CREATE INDEX idx_tasks_completed_deadline ON tasks(completed, deadline, priority)")
+
+        # Running timer sessions, checkpointed so they survive a crash
+        conn.execute("""CREATE TABLE IF NOT EXISTS active_timers (
+            task_id INTEGER PRIMARY KEY,
+            elapsed INTEGER NOT NULL,
+            checkpointed_at REAL NOT NULL
+        )""")
+
+    def create_search_index(self, conn):
+        # Trigram FTS5 index over title, kept in sync with tasks by triggers.
+        # Older SQLite builds without FTS5/trigram fall back to LIKE scans.
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name='tasks_fts'").fetchone()
+        if not exists:
+            try:
+                conn.execute("""CREATE VIRTUAL TABLE tasks_fts USING fts5(
+                    title, content='tasks', content_rowid='id', tokenize='trigram'
+                )""")
+            except sqlite3.OperationalError:
+                return
+            conn.execute("INSERT INTO tasks_fts(tasks_fts) VALUES('rebuild')")
+
+        # While a bulk load runs, rows above its starting id are left out of the
+        # index and added in one pass at the end (see bulk_load)
+        conn.execute("CREATE TABLE IF NOT EXISTS search_index_suspended (after_id INTEGER NOT NULL)")
+        trigger_sql = conn.execute("SELECT sql FROM sqlite_master WHERE name='tasks_fts_insert'").fetchone()
+        if trigger_sql and "search_index_suspended" not in trigger_sql[0]:
+            for name in ("tasks_fts_insert", "tasks_fts_delete", "tasks_fts_update"):
+                conn.execute(f"DROP TRIGGER {name}")
+        conn.execute("""CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks
+        WHEN NOT EXISTS (SELECT 1 FROM search_index_suspended WHERE new.id > after_id) BEGIN
+            INSERT INTO tasks_fts(rowid, title) VALUES (new.id, new.title);
+        END""")
+        conn.execute("""CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks
+        WHEN NOT EXISTS (SELECT 1 FROM search_index_suspended WHERE old.id > after_id) BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        END""")
+        conn.execute("""CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title ON tasks
+        WHEN NOT EXISTS (SELECT 1 FROM search_index_suspended WHERE old.id > after_id) BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, title) VALUES ('delete', old.id, old.title);
+            INSERT INTO tasks_fts(rowid, title) VALUES (new.id, new.title);
+        END""")
+
+    def create_task_counts(self, conn):
+        # Task totals by completed flag, kept by triggers so counting never scans tasks
+        conn.execute("""CREATE TABLE IF NOT EXISTS task_counts (
+            completed INTEGER PRIMARY KEY,
+            count INTEGER NOT NULL
+        )""")
+        conn.execute("DELETE FROM task_counts")
+        conn.execute("INSERT INTO task_counts SELECT COALESCE(completed, 0) != 0, COUNT(*) FROM tasks GROUP BY 1")
+        conn.execute("""CREATE TRIGGER IF NOT EXISTS task_counts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO task_counts VALUES (COALESCE(new.completed, 0) != 0, 1)
+            ON CONFLICT(completed) DO UPDATE SET count = count + 1;
+        END""")
+        conn.execute("""CREATE TRIGGER IF NOT EXISTS task_counts_delete AFTER DELETE ON tasks BEGIN
+            UPDATE task_counts SET count = count - 1 WHERE completed = (COALESCE(old.completed, 0) != 0);
+        END""")
+        conn.execute("""CREATE TRIGGER IF NOT EXISTS task_counts_update AFTER UPDATE OF completed ON tasks
+        WHEN (COALESCE(old.completed, 0) != 0) != (COALESCE(new.completed, 0) != 0) BEGIN
+            UPDATE task_counts SET count = count - 1 WHERE completed = (COALESCE(old.completed, 0) != 0);
+            INSERT INTO task_counts VALUES (COALESCE(new.completed, 0) != 0, 1)
+            ON CONFLICT(completed) DO UPDATE SET count = count + 1;
+        END""")
+
+    def create_auto_complete(self, conn):
+        # A task is done once its tracked time reaches its duration. Only writes
+        # to elapsed_time or duration can make that true, so triggers on those
+        # writes complete it, and no read path has to sweep the table.
+        conn.execute("""CREATE INDEX IF NOT EXISTS idx_tasks_open_duration ON tasks(id)
+            WHERE completed = 0 AND duration IS NOT NULL""")
+        conn.execute("""CREATE TRIGGER IF NOT EXISTS tasks_auto_complete_insert AFTER INSERT ON tasks
+        WHEN new.completed = 0 AND new.duration IS NOT NULL AND new.elapsed_time >= new.duration BEGIN
+            UPDATE tasks SET completed = 1 WHERE id = new.id;
+        END""")
+        conn.execute("""CREATE TRIGGER IF NOT EXISTS tasks_auto_complete_update
+        AFTER UPDATE OF elapsed_time, duration ON tasks
+        WHEN new.completed = 0 AND new.duration IS NOT NULL AND new.elapsed_time >= new.duration BEGIN
+            UPDATE tasks SET completed = 1 WHERE id = new.id;
+        END""")
+        # Tasks that finished before the triggers existed
+        self.complete_finished_tasks(conn)
+
+    def create_change_log(self, conn):
+        # Sync identity and history. Every task gets a uid that is the same in
+        # every database it is synced to, and triggers keep one change_log row
+        # per task: the newest change, stamped with when (ms) and on which
+        # replica it was made. Re-logging a task moves it to a new, higher seq,
+        # so "everything since seq N" is a range scan of the primary key.
+        # Tasks unchanged since this migration have no row; a first sync
+        # sends them from the tasks table itself (see changes_since).
+        existing_columns = [col[1] for col in conn.execute("PRAGMA table_info(tasks)").fetchall()]
+        if "uid" not in existing_columns:
+            conn.execute("ALTER TABLE tasks ADD COLUMN uid TEXT")
+        conn.execute(f"UPDATE tasks SET uid = {NEW_UID} WHERE uid IS NULL")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_uid ON tasks(uid)")
+        conn.execute("CREATE TABLE IF NOT EXISTS replica (id TEXT NOT NULL)")
+        conn.execute(f"INSERT INTO replica SELECT {NEW_REPLICA} WHERE NOT EXISTS (SELECT 1 FROM replica)")
+        conn.execute("""CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            uid TEXT NOT NULL UNIQUE,
+            updated_at INTEGER NOT NULL,
+            origin TEXT NOT NULL,
+            deleted INTEGER NOT NULL DEFAULT 0
+        )""")
+        conn.execute("CREATE TABLE IF NOT EXISTS sync_peers (peer TEXT PRIMARY KEY, seq INTEGER NOT NULL)")
+        # Inserts that didn't supply a uid get one here. The old row is deleted
+        # rather than replaced: an upsert's conflict handling would override
+        # OR REPLACE inside the trigger.
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS change_log_insert AFTER INSERT ON tasks BEGIN
+            UPDATE tasks SET uid = {NEW_UID} WHERE id = new.id AND new.uid IS NULL;
+            DELETE FROM change_log WHERE uid = new.uid;
+            INSERT INTO change_log (uid, updated_at, origin)
+            VALUES (COALESCE(new.uid, (SELECT uid FROM tasks WHERE id = new.id)), {NOW_MS}, (SELECT id FROM replica));
+        END""")
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS change_log_update
+        AFTER UPDATE OF title, deadline, priority, completed, duration, elapsed_time ON tasks BEGIN
+            DELETE FROM change_log WHERE uid = new.uid;
+            INSERT INTO change_log (uid, updated_at, origin) VALUES (new.uid, {NOW_MS}, (SELECT id FROM replica));
+        END""")
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS change_log_delete AFTER DELETE ON tasks BEGIN
+            DELETE FROM change_log WHERE uid = old.uid;
+            INSERT INTO change_log (uid, updated_at, origin, deleted)
+            VALUES (old.uid, {NOW_MS}, (SELECT id FROM replica), 1);
+        END""")
+
+    def create_archive(self, conn):
+        # Completed tasks move to archived_tasks some time after completion (see
+        # archive_completed), so the list, calendar and reminders only ever read
+        # the working set. completed_at is the local date a task was completed;
+        # tasks completed before this migration are aged by their deadline.
+        existing_columns = [col[1] for col in conn.execute("PRAGMA table_info(tasks)").fetchall()]
+        if "completed_at" not in existing_columns:
+            conn.execute("ALTER TABLE tasks ADD COLUMN completed_at TEXT")
+        conn.execute("""CREATE TRIGGER IF NOT EXISTS tasks_completed_at AFTER UPDATE OF completed ON tasks
+        WHEN (COALESCE(old.completed, 0) != 0) != (COALESCE(new.completed, 0) != 0) BEGIN
+            UPDATE tasks SET completed_at = CASE WHEN COALESCE(new.completed, 0) != 0 THEN date('now', 'localtime') END
+            WHERE id = new.id;
+        END""")
+        conn.execute("""CREATE INDEX IF NOT EXISTS idx_tasks_archivable ON tasks(COALESCE(completed_at, deadline))
+            WHERE completed = 1""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS archived_tasks (
+            id INTEGER PRIMARY KEY,
+            title TEXT,
+            deadline TEXT,
+            priority TEXT,
+            completed BOOLEAN,
+            duration INTEGER,
+            elapsed_time INTEGER,
+            uid TEXT,
+            completed_at TEXT
+        )""")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_archived_tasks_uid ON archived_tasks(uid)")
+
+        # Moving a task in or out of the archive is not a change to sync, so
+        # the change log is suspended while it happens
+        conn.execute("CREATE TABLE IF NOT EXISTS change_log_suspended (since INTEGER)")
+        trigger_sql = conn.execute("SELECT sql FROM sqlite_master WHERE name='change_log_insert'").fetchone()
+        if trigger_sql and "change_log_suspended" not in trigger_sql[0]:
+            for name in ("change_log_insert", "change_log_delete"):
+                conn.execute(f"DROP TRIGGER {name}")
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS change_log_insert AFTER INSERT ON tasks
+        WHEN NOT EXISTS (SELECT 1 FROM change_log_suspended) BEGIN
+            UPDATE tasks SET uid = {NEW_UID} WHERE id = new.id AND new.uid IS NULL;
+            DELETE FROM change_log WHERE uid = new.uid;
+            INSERT INTO change_log (uid, updated_at, origin)
+            VALUES (COALESCE(new.uid, (SELECT uid FROM tasks WHERE id = new.id)), {NOW_MS}, (SELECT id FROM replica));
+        END""")
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS change_log_delete AFTER DELETE ON tasks
+        WHEN NOT EXISTS (SELECT 1 FROM change_log_suspended) BEGIN
+            DELETE FROM change_log WHERE uid = old.uid;
+            INSERT INTO change_log (uid, updated_at, origin, deleted)
+            VALUES (old.uid, {NOW_MS}, (SELECT id FROM replica), 1);
+        END""")
+
+    def create_views(self, conn):
+        # Saved filter expressions (see task_filter.py) with the count each had
+        # when last counted, and the indexes those filters are compiled for
+        conn.execute("""CREATE TABLE IF NOT EXISTS views (
+            name TEXT PRIMARY KEY,
+            query TEXT NOT NULL,
+            count INTEGER,
+            stamp TEXT
+        )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_priority_completed ON tasks(priority, completed, deadline)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_tracked ON tasks(elapsed_time) WHERE elapsed_time > 0")
+        # Archiving isn't in the change log, so counts also go stale on this
+        conn.execute("CREATE TABLE IF NOT EXISTS archive_moves (count INTEGER NOT NULL)")
+        if conn.execute("SELECT 1 FROM archive_moves").fetchone() is None:
+            conn.execute("INSERT INTO archive_moves (count) VALUES (0)")
+        # Without statistics the planner prefers walking the deadline index
+        # even when a filter's own index would find a handful of rows
+        conn.execute("ANALYZE")
+
+    def create_timer_sessions(self, conn):
+        # Every closed timer session, appended by record_sessions, which also adds
+        # it to the rollups in the same transaction, so reports read the rollups
+        # and never the sessions. Time tracked before this has no sessions.
+        existing_columns = [col[1] for col in conn.execute("PRAGMA table_info(active_timers)").fetchall()]
+        if "started_at" not in existing_columns:
+            conn.execute("ALTER TABLE active_timers ADD COLUMN started_at REAL")
+            conn.execute("ALTER TABLE active_timers ADD COLUMN started_elapsed INTEGER")
+        conn.execute("""CREATE TABLE IF NOT EXISTS timer_sessions (
+            id INTEGER PRIMARY KEY,
+            task_id INTEGER NOT NULL,
+            priority TEXT NOT NULL,
+            started_at REAL NOT NULL,
+            seconds INTEGER NOT NULL
+        )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_timer_sessions_task ON timer_sessions(task_id, started_at)")
+        # Seconds and sessions per local day and per week (keyed by its Monday),
+        # each split by the task's priority when the session closed; a session
+        # across midnight counts towards both days
+        for table, bucket in (("time_by_day", "day"), ("time_by_week", "week")):
+            conn.execute(f"""CREATE TABLE IF NOT EXISTS {table} (
+                {bucket} TEXT NOT NULL,
+                priority TEXT NOT NULL,
+                seconds INTEGER NOT NULL,
+                sessions INTEGER NOT NULL,
+                PRIMARY KEY ({bucket}, priority)
+            ) WITHOUT ROWID""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS time_by_priority (
+            priority TEXT PRIMARY KEY,
+            seconds INTEGER NOT NULL,
+            sessions INTEGER NOT NULL
+        ) WITHOUT ROWID""")
+
+    def count_sessions_once(self, conn):
+        # Adds the sessions that started each day to the daily rollup and rebuilds
+        # the rollups from the sessions: weeks counted a session across midnight
+        # once per day it touched
+        conn.execute("ALTER TABLE time_by_day ADD COLUMN started INTEGER NOT NULL DEFAULT 0")
+        for table in ("time_by_day", "time_by_week", "time_by_priority"):
+            conn.execute(f"DELETE FROM {table}")
+        self.add_rollups(conn.execute("SELECT task_id, priority, started_at, seconds FROM timer_sessions").fetchall(),
+                         conn)
+
+    def add_timer_owners(self, conn):
+        # The process running each timer, so that a window and a server on the
+        # same database only recover each other's timers once the owner is gone
+        conn.execute("ALTER TABLE active_timers ADD COLUMN owner_pid INTEGER")
+        conn.execute("ALTER TABLE active_timers ADD COLUMN owner_host TEXT")
+
+    def add_sync_marks(self, conn):
+        # This database's own last seq when it last synced with each peer: the
+        # changes logged after it are the ones made here (or brought by other
+        # peers) since, not those the sync itself applied
+        conn.execute("ALTER TABLE sync_peers ADD COLUMN synced_seq INTEGER")
+
+    def defer_bulk_logging(self, conn):
+        # Like the search index, the change log and task counts leave rows
+        # above a bulk load's starting id to one set-based pass at its end
+        # (see resume_bulk_load) instead of triggers firing per row. Rows
+        # deleted or edited before then are simply caught up as they are.
+        conn.execute("CREATE TABLE IF NOT EXISTS bulk_load_suspended (after_id INTEGER NOT NULL)")
+        for name in ("change_log_insert", "change_log_update", "change_log_delete",
+                     "task_counts_insert", "task_counts_update", "task_counts_delete"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        loaded = "NOT EXISTS (SELECT 1 FROM bulk_load_suspended WHERE {}.id > after_id)".format
+        conn.execute(f"""CREATE TRIGGER change_log_insert AFTER INSERT ON tasks
+        WHEN NOT EXISTS (SELECT 1 FROM change_log_suspended) AND {loaded("new")} BEGIN
+            UPDATE tasks SET uid = {NEW_UID} WHERE id = new.id AND new.uid IS NULL;
+            DELETE FROM change_log WHERE uid = new.uid;
+            INSERT INTO change_log (uid, updated_at, origin)
+            VALUES (COALESCE(new.uid, (SELECT uid FROM tasks WHERE id = new.id)), {NOW_MS}, (SELECT id FROM replica));
+        END""")
+        conn.execute(f"""CREATE TRIGGER change_log_update
+        AFTER UPDATE OF title, deadline, priority, completed, duration, elapsed_time ON tasks
+        WHEN {loaded("new")} BEGIN
+            DELETE FROM change_log WHERE uid = new.uid;
+            INSERT INTO change_log (uid, updated_at, origin) VALUES (new.uid, {NOW_MS}, (SELECT id FROM replica));
+        END""")
+        conn.execute(f"""CREATE TRIGGER change_log_delete AFTER DELETE ON tasks
+        WHEN NOT EXISTS (SELECT 1 FROM change_log_suspended) AND {loaded("old")} BEGIN
+            DELETE FROM change_log WHERE uid = old.uid;
+            INSERT INTO change_log (uid, updated_at, origin, deleted)
+            VALUES (old.uid, {NOW_MS}, (SELECT id FROM replica), 1);
+        END""")
+        conn.execute(f"""CREATE TRIGGER task_counts_insert AFTER INSERT ON tasks WHEN {loaded("new")} BEGIN
+            INSERT INTO task_counts VALUES (COALESCE(new.completed, 0) != 0, 1)
+            ON CONFLICT(completed) DO UPDATE SET count = count + 1;
+        END""")
+        conn.execute(f"""CREATE TRIGGER task_counts_delete AFTER DELETE ON tasks WHEN {loaded("old")} BEGIN
+            UPDATE task_counts SET count = count - 1 WHERE completed = (COALESCE(old.completed, 0) != 0);
+        END""")
+        conn.execute(f"""CREATE TRIGGER task_counts_update AFTER UPDATE OF completed ON tasks
+        WHEN (COALESCE(old.completed, 0) != 0) != (COALESCE(new.completed, 0) != 0) AND {loaded("new")} BEGIN
+            UPDATE task_counts SET count = count - 1 WHERE completed = (COALESCE(old.completed, 0) != 0);
+            INSERT INTO task_counts VALUES (COALESCE(new.completed, 0) != 0, 1)
+            ON CONFLICT(completed) DO UPDATE SET count = count + 1;
+        END""")
+
+    def resume_bulk_load(self, conn):
+        # The catch-up for defer_bulk_logging: uids, counts and one change_log
+        # row for every task above the earliest pending bulk load's starting id
+        if conn.execute("SELECT 1 FROM bulk_load_suspended LIMIT 1").fetchone() is None:
+            return
+        with self.transaction(conn):
+            row = conn.execute("SELECT MIN(after_id) FROM bulk_load_suspended").fetchone()
+            if row[0] is not None:
+                conn.execute("DELETE FROM bulk_load_suspended")
+                conn.execute(f"UPDATE tasks SET uid = {NEW_UID} WHERE id > ? AND uid IS NULL", row)
+                conn.execute("""
+                    INSERT INTO task_counts SELECT COALESCE(completed, 0) != 0, COUNT(*) FROM tasks WHERE id > ?
+                    GROUP BY 1 ON CONFLICT(completed) DO UPDATE SET count = count + excluded.count
+                """, row)
+                conn.execute(f"""
+                    INSERT INTO change_log (uid, updated_at, origin)
+                    SELECT uid, {NOW_MS}, (SELECT id FROM replica) FROM tasks WHERE id > ? ORDER BY id
+                """, row)
+
+    def resume_search_index(self, conn):
+        if conn.execute("SELECT 1 FROM search_index_suspended LIMIT 1").fetchone() is None:
+            return
+        with self.transaction(conn):
+            row = conn.execute("SELECT MIN(after_id) FROM search_index_suspended").fetchone()
+            if row[0] is not None:
+                conn.execute("DELETE FROM search_index_suspended")
+                conn.execute("INSERT INTO tasks_fts(rowid, title) SELECT id, title FROM tasks WHERE id > ?", row)
+
+    @contextmanager
+    def bulk_load(self, conn):
+        # Large inserts: a bigger page cache, and the title index, change log
+        # and task counts brought up to date in set-based passes afterwards
+        # instead of triggers firing per row
+        cache_size = conn.execute("PRAGMA cache_size").fetchone()[0]
+        conn.execute(f"PRAGMA cache_size={BULK_CACHE_SIZE}")
+        with self.transaction(conn):
+            after_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()
+            if self.has_fts:
+                conn.execute("INSERT INTO search_index_suspended (after_id) VALUES (?)", after_id)
+            conn.execute("INSERT INTO bulk_load_suspended (after_id) VALUES (?)", after_id)
+        try:
+            yield conn
+        finally:
+            if self.has_fts:
+                self.resume_search_index(conn)
+            self.resume_bulk_load(conn)
+            conn.execute(f"PRAGMA cache_size={cache_size}")
+
+    # Task CRUD
+
+    def add_task(self, title, deadline, priority, conn=None):
+        with self.transaction(conn) as conn:
+            cur = conn.execute(
+                f"INSERT INTO tasks (title, deadline, priority, completed, uid) VALUES (?, ?, ?, ?, {NEW_UID})",
+                (title, deadline, priority, False)
+            )
+            return cur.lastrowid
+
+    def get_task(self, task_id, conn=None):
+        return (conn or self.conn).execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE id=?", (task_id,)).fetchone()
+
+    def get_tasks(self, task_ids, conn=None):
+        # {id: row} for every id asked for; None for tasks that no longer exist
+        conn = conn or self.conn
+        found = dict.fromkeys(task_ids)
+        ids = list(found)
+        for i in range(0, len(ids), ID_CHUNK):
+            chunk = ids[i:i + ID_CHUNK]
+            for row in conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE id IN ({','.join('?' * len(chunk))})",
+                                    chunk):
+                found[row[0]] = row
+        return found
+
+    def get_title(self, task_id, conn=None):
+        row = (conn or self.conn).execute("SELECT title FROM tasks WHERE id=?", (task_id,)).fetchone()
+        return row[0] if row else None
+
+    def update_title(self, task_id, title, conn=None):
+        with self.transaction(conn) as conn:
+            conn.execute("UPDATE tasks SET title=? WHERE id=?", (title, task_id))
+
+    def set_duration(self, task_id, seconds, conn=None):
+        with self.transaction(conn) as conn:
+            conn.execute("UPDATE tasks SET duration=? WHERE id=?", (seconds, task_id))
+
+    # Bulk changes: one transaction each, however many tasks
+
+    def delete_tasks(self, task_ids, conn=None):
+        with self.transaction(conn) as conn:
+            conn.executemany("DELETE FROM tasks WHERE id=?", [(task_id,) for task_id in task_ids])
+
+    def update_tasks(self, task_ids, values, conn=None):
+        # Sets the same {column: value} on every task in `task_ids`; returns the count
+        assignments, params = set_clause(values)
+        with self.transaction(conn) as conn:
+            return conn.executemany(f"UPDATE tasks SET {assignments} WHERE id=?",
+                                    [(*params, task_id) for task_id in task_ids]).rowcount
+
+    def delete_matching(self, conn=None, **filters):
+        # One set-based DELETE for every task matching `filters` (see filter_sql); returns the count
+        where, params = self.filter_sql(**filters)
+        with self.transaction(conn) as conn:
+            return conn.execute(f"DELETE FROM tasks{where}", params).rowcount
+
+    def update_matching(self, values, conn=None, **filters):
+        # One set-based UPDATE, e.g. completing every overdue Low task; returns the count
+        assignments, params = set_clause(values)
+        where, where_params = self.filter_sql(**filters)
+        with self.transaction(conn) as conn:
+            return conn.execute(f"UPDATE tasks SET {assignments}{where}", params + where_params).rowcount
+
+    # Views
+
+    def complete_finished_tasks(self, conn=None):
+        # A sweep over idx_tasks_open_duration; the auto-complete triggers make it
+        # unnecessary after a write, so only the migration runs it
+        with self.transaction(conn) as conn:
+            conn.execute("""
+                UPDATE tasks INDEXED BY idx_tasks_open_duration
+                SET completed = 1
+                WHERE duration IS NOT NULL
+                AND elapsed_time >= duration
+                AND completed = 0
+            """)
+
+    # Pages. Keyset queries continue from the last row a page ended on, so a page
+    # deep in the list costs the same as the first. They rely on every row
+    # having a deadline, priority and completed flag, which add_task and the
+    # importer guarantee.
+
+    def deadline_page(self, after, limit, conn=None, where=None):
+        # Rows in ORDER BY deadline ASC, priority DESC, id ASC (the idx_tasks_deadline
+        # order) following the (deadline, priority, id) key `after`, or from the
+        # start; only those matching the compiled filter `where`, if given
+        conn = conn or self.conn
+        condition, params = named_filter(where) if where else ("1", {})
+        if after is None:
+            return conn.execute(f"""
+                SELECT {TASK_COLUMNS} FROM tasks WHERE {condition}
+                ORDER BY deadline ASC, priority DESC, id ASC LIMIT :limit
+            """, dict(params, limit=limit)).fetchall()
+        deadline, priority, task_id = after
+        return conn.execute(f"""
+            SELECT {TASK_COLUMNS} FROM tasks
+            WHERE deadline >= :deadline
+            AND (deadline > :deadline OR priority < :priority OR priority = :priority AND id > :id)
+            AND {condition}
+            ORDER BY deadline ASC, priority DESC, id ASC LIMIT :limit
+        """, dict(params, deadline=deadline, priority=priority, id=task_id, limit=limit)).fetchall()
+
+    def color_page(self, classifier, after, limit, conn=None, where=None):
+        # Rows in color order (rank, deadline, id) following the key `after`. Each
+        # rank is read separately off the (completed, deadline) index, bounded to
+        # the deadlines that rank can have, so no query sorts the whole table.
+        conn = conn or self.conn
+        rank_sql, params = classifier.rank_sql()
+        condition, filter_params = named_filter(where) if where else ("1", {})
+        params.update(filter_params)
+        rank, deadline, task_id = after or (0, "", 0)
+        rows = []
+        while rank < len(COLORS) and len(rows) < limit:
+            rows += conn.execute(f"""
+                SELECT {TASK_COLUMNS} FROM tasks
+                WHERE completed = :completed AND {COLOR_RANK_BOUNDS.get(rank, "1")}
+                AND deadline >= :deadline AND (deadline > :deadline OR id > :id)
+                AND {rank_sql} = :rank AND {condition}
+                ORDER BY deadline ASC, id ASC LIMIT :limit
+            """, dict(params, completed=int(rank == COMPLETED_RANK), deadline=deadline, id=task_id,
+                      rank=rank, limit=limit - len(rows))).fetchall()
+            rank, deadline, task_id = rank + 1, "", 0
+        return rows
+
+    def task_count(self, conn=None, completed=None):
+        # From the trigger-maintained totals: one or two rows read, whatever the table size
+        if completed is None:
+            row = (conn or self.conn).execute("SELECT SUM(count) FROM task_counts").fetchone()
+        else:
+            row = (conn or self.conn).execute("SELECT count FROM task_counts WHERE completed=?",
+                                              (int(bool(completed)),)).fetchone()
+        return (row[0] or 0) if row else 0
+
+    def search_tasks(self, term, conn=None, archived=False, limit=None):
+        # Without a connection it runs on a pooled one
+        with self.pooled(conn) as conn:
+            return self.run_search(conn, term, archived, limit)
+
+    def run_search(self, conn, term, archived=False, limit=None):
+        # With `archived`, matching archived tasks follow the working set's
+        # matches; `limit` caps the rows of both together
+        limit = -1 if limit is None else limit
+        pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        if self.has_fts and len(term) >= 3:
+            match = '"' + term.replace('"', '""') + '"'
+            rows = conn.execute(f"""
+                SELECT {TASK_COLUMNS} FROM tasks
+                WHERE id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)
+                ORDER BY deadline ASC, priority DESC, id ASC LIMIT ?
+            """, (match, limit)).fetchall()
+        else:
+            # Trigrams need at least three characters
+            rows = conn.execute(f"""
+                SELECT {TASK_COLUMNS} FROM tasks
+                WHERE title LIKE ? ESCAPE '\\'
+                ORDER BY deadline ASC, priority DESC, id ASC LIMIT ?
+            """, (pattern, limit)).fetchall()
+        if archived and len(rows) != limit:
+            # Archived titles aren't indexed: this scan only runs when asked for
+            rows += conn.execute(f"""
+                SELECT {TASK_COLUMNS} FROM archived_tasks
+                WHERE title LIKE ? ESCAPE '\\'
+                ORDER BY deadline DESC, id DESC LIMIT ?
+            """, (pattern, limit if limit < 0 else limit - len(rows))).fetchall()
+        return rows
+
+    def calendar_summary(self, first_day, last_day, conn=None):
+        # One pass over the deadline index for the date range: per date, the
+        # highest open priority (None when every task is completed) and the titles
+        rows = (conn or self.conn).execute("""
+            SELECT deadline,
+                MAX(CASE WHEN completed THEN 0
+                         WHEN priority = 'High' THEN 3
+                         WHEN priority = 'Medium' THEN 2
+                         ELSE 1 END),
+                GROUP_CONCAT(title, '; ')
+            FROM tasks
+            WHERE deadline BETWEEN ? AND ?
+            GROUP BY deadline
+        """, (first_day, last_day))
+        return [(deadline, OPEN_PRIORITIES[rank], titles) for deadline, rank, titles in rows]
+
+    def open_deadline_days(self, since, conn=None):
+        # Distinct deadlines of open tasks from `since` on. Each step is one seek on
+        # (completed, deadline), so the cost follows the number of days, not tasks.
+        return [deadline for deadline, in (conn or self.conn).execute("""
+            WITH RECURSIVE days(deadline) AS (
+                SELECT MIN(deadline) FROM tasks WHERE completed=0 AND deadline >= ?
+                UNION ALL
+                SELECT (SELECT MIN(deadline) FROM tasks WHERE completed=0 AND deadline > days.deadline)
+                FROM days WHERE days.deadline IS NOT NULL
+            )
+            SELECT deadline FROM days WHERE deadline IS NOT NULL
+        """, (since,))]
+
+    def open_tasks_due(self, first, last, limit, conn=None):
+        # (count, first `limit` titles) of open tasks due between `first` and `last`;
+        # a `first` of None means every deadline up to `last`
+        conn = conn or self.conn
+        first = first or ""
+        count, = conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE completed=0 AND deadline BETWEEN ? AND ?", (first, last)
+        ).fetchone()
+        titles = [title for title, in conn.execute(
+            "SELECT title FROM tasks WHERE completed=0 AND deadline BETWEEN ? AND ? ORDER BY deadline LIMIT ?",
+            (first, last, limit)
+        )] if count else []
+        return count, titles
+
+    # Timer
+
+    def timer_task(self, task_id, conn=None):
+        task = (conn or self.conn).execute(
+            "SELECT title, duration, elapsed_time FROM tasks WHERE id=?", (task_id,)
+        ).fetchone()
+        if task is None:
+            return None
+        title, duration, elapsed = task
+        return title, duration, elapsed or 0
+
+    def mark_timer_running(self, task_id, elapsed, conn=None):
+        # Marks the session as running, by this process, so a crash can be
+        # detected later; when it started and from what elapsed time make its
+        # session row
+        now = time.time()
+        with self.transaction(conn) as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO active_timers
+                (task_id, elapsed, checkpointed_at, started_at, started_elapsed, owner_pid, owner_host)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (task_id, elapsed, now, now, elapsed, os.getpid(), host_name())
+            )
+
+    def checkpoint_timers(self, checkpoints, conn=None):
+        # checkpoints: (task_id, elapsed) pairs, written in one transaction
+        checkpoints = list(checkpoints)
+        now = time.time()
+        with self.transaction(conn) as conn:
+            conn.executemany("UPDATE tasks SET elapsed_time=? WHERE id=?",
+                             [(elapsed, task_id) for task_id, elapsed in checkpoints])
+            conn.executemany("UPDATE active_timers SET elapsed=?, checkpointed_at=? WHERE task_id=?",
+                             [(elapsed, now, task_id) for task_id, elapsed in checkpoints])
+
+    def stop_timers(self, stops, conn=None):
+        # stops: (task_id, elapsed, completed) triples, written in one transaction
+        stops = list(stops)
+        with self.transaction(conn) as conn:
+            self.close_sessions([(task_id, elapsed) for task_id, elapsed, completed in stops], conn)
+            conn.executemany("UPDATE tasks SET elapsed_time=?, completed=MAX(completed, ?) WHERE id=?",
+                             [(elapsed, int(completed), task_id) for task_id, elapsed, completed in stops])
+            conn.executemany("DELETE FROM active_timers WHERE task_id=?",
+                             [(task_id,) for task_id, elapsed, completed in stops])
+
+    def recover_timers(self, conn=None):
+        # Closes the timers whose owner is gone: a process on this machine that
+        # no longer runs, or any whose lease ran out. Timers of a window or
+        # server still running on this database are left to it.
+        if (conn or self.conn).execute("SELECT 1 FROM active_timers LIMIT 1").fetchone() is None:
+            return []
+        expired = time.time() - TIMER_LEASE
+        host = host_name()
+        recovered = []
+        with self.transaction(conn) as conn:
+            orphaned = [task_id for task_id, pid, owner_host, checkpointed_at in conn.execute(
+                "SELECT task_id, owner_pid, owner_host, checkpointed_at FROM active_timers"
+            ) if pid is None or checkpointed_at < expired or owner_host == host and not process_alive(pid)]
+            for i in range(0, len(orphaned), ID_CHUNK):
+                chunk = orphaned[i:i + ID_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                timers = conn.execute(f"""
+                    SELECT a.task_id, t.title, a.elapsed FROM active_timers a
+                    JOIN tasks t ON t.id = a.task_id WHERE a.task_id IN ({marks})
+                """, chunk).fetchall()
+                # Each session ends at its last checkpoint
+                self.close_sessions([(task_id, elapsed) for task_id, title, elapsed in timers], conn)
+                conn.execute(f"""
+                    UPDATE tasks SET elapsed_time = (SELECT elapsed FROM active_timers WHERE task_id = tasks.id)
+                    WHERE id IN ({marks})
+                    AND COALESCE(elapsed_time, 0) < (SELECT elapsed FROM active_timers WHERE task_id = tasks.id)
+                """, chunk)
+                conn.execute(f"DELETE FROM active_timers WHERE task_id IN ({marks})", chunk)
+                recovered += timers
+        return recovered
+
+    def close_sessions(self, ends, conn):
+        # ends: (task_id, elapsed at the end) for running timers, inside the
+        # transaction that clears their active_timers rows
+        ends = list(ends)
+        sessions = []
+        for i in range(0, len(ends), ID_CHUNK):
+            chunk = dict(ends[i:i + ID_CHUNK])
+            sessions += [(task_id, priority, started_at, chunk[task_id] - started_elapsed)
+                         for task_id, priority, started_at, started_elapsed in conn.execute(f"""
+                             SELECT a.task_id, t.priority, a.started_at, a.started_elapsed
+                             FROM active_timers a LEFT JOIN tasks t ON t.id = a.task_id
+                             WHERE a.task_id IN ({','.join('?' * len(chunk))}) AND a.started_at IS NOT NULL
+                         """, list(chunk))]
+        self.record_sessions([session for session in sessions if session[3] > 0], conn)
+
+    def record_sessions(self, sessions, conn=None):
+        # sessions: (task_id, priority, started_at, seconds). Appends them and
+        # adds them to the day, week and priority rollups in one transaction.
+        sessions = list(sessions)
+        with self.transaction(conn) as conn:
+            conn.executemany("INSERT INTO timer_sessions (task_id, priority, started_at, seconds) VALUES (?, ?, ?, ?)",
+                             [(task_id, priority or "", started_at, seconds)
+                              for task_id, priority, started_at, seconds in sessions])
+            self.add_rollups(sessions, conn)
+
+    def add_rollups(self, sessions, conn):
+        # Splits each session at local midnight. A day or week counts every
+        # session that ran in it, and a day also the ones that started in it,
+        # which time_report adds up so that a session across midnight is one
+        # session in a period however many days it spans.
+        days, weeks, priorities = {}, {}, {}
+        for task_id, priority, started_at, seconds in sessions:
+            priority = priority or ""
+            start = datetime.fromtimestamp(started_at)
+            end = start + timedelta(seconds=seconds)
+            started, seen_weeks = 1, set()
+            while True:
+                midnight = datetime.combine(start.date() + timedelta(days=1), datetime.min.time())
+                piece = int((min(end, midnight) - start).total_seconds())
+                totals = days.setdefault((start.date().isoformat(), priority), [0, 0, 0])
+                totals[0] += piece
+                totals[1] += 1
+                totals[2] += started
+                week = week_start(start.date()).isoformat()
+                totals = weeks.setdefault((week, priority), [0, 0])
+                totals[0] += piece
+                if week not in seen_weeks:
+                    seen_weeks.add(week)
+                    totals[1] += 1
+                if end <= midnight:
+                    break
+                start, started = midnight, 0
+            totals = priorities.setdefault(priority, [0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+        conn.executemany("""
+            INSERT INTO time_by_day (day, priority, seconds, sessions, started) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(day, priority) DO UPDATE SET seconds = seconds + excluded.seconds,
+            sessions = sessions + excluded.sessions, started = started + excluded.started
+        """, [(key, priority, *totals) for (key, priority), totals in days.items()])
+        conn.executemany("""
+            INSERT INTO time_by_week (week, priority, seconds, sessions) VALUES (?, ?, ?, ?)
+            ON CONFLICT(week, priority) DO UPDATE
+            SET seconds = seconds + excluded.seconds, sessions = sessions + excluded.sessions
+        """, [(key, priority, *totals) for (key, priority), totals in weeks.items()])
+        conn.executemany("""
+            INSERT INTO time_by_priority (priority, seconds, sessions) VALUES (?, ?, ?)
+            ON CONFLICT(priority) DO UPDATE
+            SET seconds = seconds + excluded.seconds, sessions = sessions + excluded.sessions
+        """, [(priority, *totals) for priority, totals in priorities.items()])
+
+    def time_report(self, group="priority", first=None, last=None, conn=None):
+        # [(day or week, priority, seconds, sessions)] between the ISO dates first
+        # and last (inclusive; None is open-ended), the day or week None when
+        # grouped by priority. Only the rollups are read: a month by priority
+        # sums at most 31 days x 3 priorities, however many sessions there were.
+        conn = conn or self.conn
+        if group not in REPORT_GROUPS:
+            raise ValueError(f"invalid grouping {group!r} ({', '.join(REPORT_GROUPS)})")
+        if group == "priority" and first is None and last is None:
+            return conn.execute("""
+                SELECT NULL, priority, seconds, sessions FROM time_by_priority ORDER BY seconds DESC
+            """).fetchall()
+        table, bucket = ("time_by_week", "week") if group == "week" else ("time_by_day", "day")
+        if group == "week" and first is not None:
+            # The week the first day falls in
+            first = week_start(date.fromisoformat(first)).isoformat()
+        where = f"{bucket} BETWEEN ? AND ?"
+        params = (first or "", last or "9999-12-31")
+        if group == "priority":
+            # Sessions that started in the period, plus those carried into its first day
+            return conn.execute(f"""
+                SELECT NULL, priority, SUM(seconds),
+                       SUM(started) + SUM(CASE WHEN day = ? THEN sessions - started ELSE 0 END)
+                FROM {table} WHERE {where} GROUP BY priority ORDER BY SUM(seconds) DESC
+            """, (params[0], *params)).fetchall()
+        return conn.execute(f"""
+            SELECT {bucket}, priority, seconds, sessions FROM {table}
+            WHERE {where} ORDER BY {bucket}, priority
+        """, params).fetchall()
+
+    # Import / export
+
+    def filter_sql(self, status=None, start=None, end=None, priorities=None, where=None):
+        # status: "open" / "overdue" / "completed"; start/end: ISO dates, inclusive;
+        # where: a compiled filter expression (see compile_filter).
+        # Laid out to match the (completed, deadline, priority) index.
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("completed = ?")
+            params.append(1 if status == "completed" else 0)
+        if status == "overdue":
+            clauses.append("deadline < ?")
+            params.append(date.today().isoformat())
+        if start is not None:
+            clauses.append("deadline >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("deadline <= ?")
+            params.append(end)
+        if priorities:
+            clauses.append(f"priority IN ({','.join('?' * len(priorities))})")
+            params.extend(priorities)
+        if where is not None:
+            clauses.append(f"({where[0]})")
+            params.extend(where[1])
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def compile_filter(self, text):
+        # (condition, params) for a filter expression, for filter_sql's `where`
+        # and the page queries; raises task_filter.FilterError
+        from task_filter import compile_filter
+        return compile_filter(text, self.has_fts)
+
+    def count_stamp(self, conn=None):
+        # Moves on whenever the tasks that any filter matches may have changed:
+        # every task write is in the change log, and relative dates move at midnight
+        seq, moves = (conn or self.conn).execute(
+            "SELECT (SELECT MAX(seq) FROM change_log), (SELECT count FROM archive_moves)").fetchone()
+        return f"{seq or 0}:{moves}:{date.today().isoformat()}"
+
+    def count_tasks(self, conn=None, **filters):
+        # Filtered counts are cached until count_stamp moves, so re-reading the
+        # same view costs two index lookups
+        if not any(filters.values()):
+            return self.task_count(conn)
+        conn = conn or self.conn
+        where, params = self.filter_sql(**filters)
+        key = (where, tuple(params))
+        stamp = self.count_stamp(conn)
+        cached = self._counts.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        count = conn.execute(f"SELECT COUNT(*) FROM tasks{where}", params).fetchone()[0]
+        with self._counts_lock:
+            self._counts.pop(key, None)
+            self._counts[key] = (stamp, count)
+            while len(self._counts) > COUNT_CACHE_SIZE:
+                self._counts.pop(next(iter(self._counts)))
+        return count
+
+    def matching_ids(self, task_ids, where, conn=None):
+        # The ids among `task_ids` of tasks the compiled filter `where` matches
+        conn = conn or self.conn
+        condition, params = where
+        matched = set()
+        ids = list(task_ids)
+        for i in range(0, len(ids), ID_CHUNK):
+            chunk = ids[i:i + ID_CHUNK]
+            matched.update(task_id for task_id, in conn.execute(
+                f"SELECT id FROM tasks WHERE id IN ({','.join('?' * len(chunk))}) AND ({condition})",
+                chunk + list(params)))
+        return matched
+
+    def iter_tasks(self, conn=None, chunk_size=5000, **filters):
+        # Yields lists of at most chunk_size rows, so memory doesn't grow with the table
+        where, params = self.filter_sql(**filters)
+        cur = (conn or self.conn).execute(f"SELECT {TASK_COLUMNS} FROM tasks{where}", params)
+        try:
+            while True:
+                chunk = cur.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            cur.close()
+
+    def list_tasks(self, limit=None, conn=None, **filters):
+        # A cursor over the matching tasks in the list's deadline order
+        where, params = self.filter_sql(**filters)
+        return (conn or self.conn).execute(f"""
+            SELECT {TASK_COLUMNS} FROM tasks{where}
+            ORDER BY deadline ASC, priority DESC, id ASC LIMIT ?
+        """, params + [-1 if limit is None else limit])
+
+    def insert_tasks(self, tasks, conn=None):
+        # tasks: (title, deadline, priority, completed, duration, elapsed_time) tuples, one transaction
+        with self.transaction(conn) as conn:
+            cur = conn.executemany(f"""
+                INSERT INTO tasks (title, deadline, priority, completed, duration, elapsed_time, uid)
+                VALUES (?, ?, ?, ?, ?, ?, {NEW_UID})
+            """, tasks)
+            return cur.rowcount
+
+    # Saved views: named filter expressions
+
+    def save_view(self, name, query, conn=None):
+        self.compile_filter(query)  # raises on an invalid expression
+        with self.transaction(conn) as conn:
+            conn.execute("INSERT OR REPLACE INTO views (name, query) VALUES (?, ?)", (name, query))
+
+    def delete_view(self, name, conn=None):
+        with self.transaction(conn) as conn:
+            return conn.execute("DELETE FROM views WHERE name=?", (name,)).rowcount
+
+    def views(self, conn=None):
+        # [(name, query)] by name
+        return (conn or self.conn).execute("SELECT name, query FROM views ORDER BY name").fetchall()
+
+    def view_query(self, name, conn=None):
+        row = (conn or self.conn).execute("SELECT query FROM views WHERE name=?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def view_count(self, name, conn=None):
+        # The view's count, stored with the count_stamp it was taken at, so other
+        # processes (the command line) reuse it until the tasks change; None
+        # if there is no such view
+        conn = conn or self.conn
+        row = conn.execute("SELECT query, count, stamp FROM views WHERE name=?", (name,)).fetchone()
+        if row is None:
+            return None
+        query, count, stamp = row
+        current = self.count_stamp(conn)
+        if stamp != current:
+            count = self.count_tasks(conn, where=self.compile_filter(query))
+            with self.transaction(conn) as conn:
+                conn.execute("UPDATE views SET count=?, stamp=? WHERE name=?", (count, current, name))
+        return count
+
+    # Archive
+
+    @contextmanager
+    def change_log_suspended(self, conn):
+        # Inside a transaction: the moves made here aren't logged for sync
+        conn.execute("INSERT INTO change_log_suspended (since) VALUES (0)")
+        try:
+            yield conn
+        finally:
+            conn.execute("DELETE FROM change_log_suspended")
+
+    def archive_completed(self, before, limit=ARCHIVE_BATCH, conn=None):
+        # Moves up to `limit` tasks completed before the ISO date `before` into
+        # archived_tasks, in one transaction; returns how many moved
+        with self.transaction(conn) as conn, self.change_log_suspended(conn):
+            conn.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS archive_batch (id INTEGER PRIMARY KEY)
+            """)
+            conn.execute("DELETE FROM archive_batch")
+            conn.execute("""
+                INSERT INTO archive_batch SELECT id FROM tasks INDEXED BY idx_tasks_archivable
+                WHERE completed = 1 AND COALESCE(completed_at, deadline) < ? LIMIT ?
+            """, (before, limit))
+            conn.execute(f"""
+                INSERT OR REPLACE INTO archived_tasks ({ARCHIVE_COLUMNS})
+                SELECT {ARCHIVE_COLUMNS} FROM tasks WHERE id IN (SELECT id FROM archive_batch)
+            """)
+            moved = conn.execute("DELETE FROM tasks WHERE id IN (SELECT id FROM archive_batch)").rowcount
+            if moved:
+                conn.execute("UPDATE archive_moves SET count = count + 1")
+            return moved
+
+    def restore_tasks(self, task_ids, conn=None):
+        # Moves archived tasks among `task_ids` back into tasks, keeping their
+        # ids; the others are left alone. Returns how many moved. A restored
+        # task counts as completed today, so the next idle pass doesn't archive
+        # it again while it is being looked at.
+        restored = 0
+        task_ids = list(task_ids)
+        with self.transaction(conn) as conn, self.change_log_suspended(conn):
+            for i in range(0, len(task_ids), ID_CHUNK):
+                chunk = task_ids[i:i + ID_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                conn.execute(f"""
+                    INSERT INTO tasks ({ARCHIVE_COLUMNS})
+                    SELECT {TASK_COLUMNS}, uid, CASE WHEN completed THEN date('now', 'localtime') END
+                    FROM archived_tasks WHERE id IN ({marks})
+                """, chunk)
+                restored += conn.execute(f"DELETE FROM archived_tasks WHERE id IN ({marks})", chunk).rowcount
+            if restored:
+                conn.execute("UPDATE archive_moves SET count = count + 1")
+        return restored
+
+    def archived_count(self, conn=None):
+        return (conn or self.conn).execute("SELECT COUNT(*) FROM archived_tasks").fetchone()[0]
+
+    def compact(self, pages=VACUUM_PAGES, conn=None):
+        # Idle-time upkeep, outside any transaction: returns up to `pages` free
+        # pages to the file system (databases created with auto_vacuum=INCREMENTAL,
+        # or converted by a VACUUM) and refreshes the planner's statistics.
+        # Returns the free pages left.
+        conn = conn or self.conn
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+        conn.execute("PRAGMA optimize")
+        return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    # Sync
+
+    def replica_id(self, conn=None):
+        return (conn or self.conn).execute("SELECT id FROM replica").fetchone()[0]
+
+    def renew_replica_id(self, conn=None):
+        # For a database file copied from another: the two must not share an id
+        with self.transaction(conn) as conn:
+            conn.execute(f"UPDATE replica SET id = {NEW_REPLICA}")
+            return self.replica_id(conn)
+
+    def last_change(self, conn=None):
+        row = (conn or self.conn).execute("SELECT MAX(seq) FROM change_log").fetchone()
+        return row[0] or 0
+
+    def peer_seq(self, peer, conn=None):
+        # The last of `peer`'s changes this database has; None if they never synced
+        row = (conn or self.conn).execute("SELECT seq FROM sync_peers WHERE peer=?", (peer,)).fetchone()
+        return row[0] if row else None
+
+    def set_peer_seq(self, peer, seq, conn=None):
+        # Called once a sync's changes are applied, so synced_seq covers them
+        with self.transaction(conn) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO sync_peers (peer, seq, synced_seq)
+                VALUES (?, ?, (SELECT COALESCE(MAX(seq), 0) FROM change_log))
+            """, (peer, seq))
+
+    def synced_seq(self, peer, conn=None):
+        # This database's last seq as of its last sync with `peer`; 0 if none is recorded
+        row = (conn or self.conn).execute("SELECT synced_seq FROM sync_peers WHERE peer=?", (peer,)).fetchone()
+        return (row[0] or 0) if row else 0
+
+    def changed_uids(self, since, conn=None):
+        # The uids of the tasks logged after seq `since`
+        return {uid for uid, in (conn or self.conn).execute("SELECT uid FROM change_log WHERE seq > ?", (since,))}
+
+    def changes_since(self, since, conn=None):
+        # (uid, updated_at, origin, deleted, title, deadline, priority, completed, duration,
+        # elapsed_time) for every task changed after `since`. From None that is every
+        # task and tombstone, including tasks with no change_log row, stamped (0, "").
+        # Archived tasks are still tasks to sync; a uid is in one table or the other.
+        conn = conn or self.conn
+        if since is not None:
+            return conn.execute("""
+                SELECT c.uid, c.updated_at, c.origin, c.deleted,
+                       COALESCE(t.title, a.title), COALESCE(t.deadline, a.deadline),
+                       COALESCE(t.priority, a.priority), COALESCE(t.completed, a.completed),
+                       COALESCE(t.duration, a.duration), COALESCE(t.elapsed_time, a.elapsed_time)
+                FROM change_log c
+                LEFT JOIN tasks t ON t.uid = c.uid
+                LEFT JOIN archived_tasks a ON a.uid = c.uid
+                WHERE c.seq > ? ORDER BY c.seq
+            """, (since,)).fetchall()
+        return conn.execute("""
+            SELECT t.uid, COALESCE(c.updated_at, 0), COALESCE(c.origin, ''), 0, t.title, t.deadline,
+                   t.priority, t.completed, t.duration, t.elapsed_time
+            FROM tasks t LEFT JOIN change_log c ON c.uid = t.uid
+            UNION ALL
+            SELECT a.uid, COALESCE(c.updated_at, 0), COALESCE(c.origin, ''), 0, a.title, a.deadline,
+                   a.priority, a.completed, a.duration, a.elapsed_time
+            FROM archived_tasks a LEFT JOIN change_log c ON c.uid = a.uid
+            UNION ALL
+            SELECT uid, updated_at, origin, 1, NULL, NULL, NULL, NULL, NULL, NULL
+            FROM change_log WHERE deleted = 1
+        """).fetchall()
+
+    def change_stamps(self, uids, conn=None):
+        # {uid: (updated_at, origin)} for the uids this database knows; tasks
+        # with no change_log row are stamped (0, "")
+        conn = conn or self.conn
+        stamps = {}
+        uids = list(uids)
+        for i in range(0, len(uids), ID_CHUNK):
+            chunk = uids[i:i + ID_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            stamps.update((uid, (0, "")) for uid, in conn.execute(
+                f"SELECT uid FROM tasks WHERE uid IN ({marks})"
+                f" UNION ALL SELECT uid FROM archived_tasks WHERE uid IN ({marks})", chunk + chunk))
+            stamps.update((uid, (updated_at, origin)) for uid, updated_at, origin in conn.execute(
+                f"SELECT uid, updated_at, origin FROM change_log WHERE uid IN ({marks})", chunk))
+        return stamps
+
+    def apply_changes(self, changes, conn=None):
+        # Writes another replica's changes (rows as from changes_since) as they
+        # are, then restamps them with their original time and origin, so they
+        # keep winning or losing against other replicas' edits the same way. A
+        # change to an archived task brings it back into the working set.
+        changes = list(changes)
+        with self.transaction(conn) as conn:
+            conn.executemany("DELETE FROM archived_tasks WHERE uid=?", [(c[0],) for c in changes])
+            conn.executemany("DELETE FROM tasks WHERE uid=?", [(c[0],) for c in changes if c[3]])
+            conn.executemany(f"""
+                INSERT INTO tasks ({SYNC_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(uid) DO UPDATE SET title=excluded.title, deadline=excluded.deadline,
+                    priority=excluded.priority, completed=excluded.completed, duration=excluded.duration,
+                    elapsed_time=excluded.elapsed_time
+            """, [(c[0], *c[4:]) for c in changes if not c[3]])
+            conn.executemany("INSERT OR REPLACE INTO change_log (uid, updated_at, origin, deleted) VALUES (?, ?, ?, ?)",
+                             [c[:4] for c in changes])
+        return len(changes)
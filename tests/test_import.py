@@ -0,0 +1,97 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from task_io import RowError, RowNormalizer, import_csv
+from task_store import TaskStore
+
+COLUMNS = ["title", "deadline", "priority", "completed", "duration", "elapsed_time"]
+
+
+class RowNormalizerTest(unittest.TestCase):
+    def setUp(self):
+        self.normalizer = RowNormalizer()
+
+    def test_valid_row(self):
+        self.assertEqual(self.normalizer.normalize(COLUMNS, [" Write report ", "24-12-2026", "high", "yes", "3600", ""]),
+                         ("Write report", "2026-12-24", "High", 1, 3600, 0))
+        self.assertEqual(self.normalizer.normalize(COLUMNS[:4], ["Send invoice", "2026-12-24", "Low", ""]),
+                         ("Send invoice", "2026-12-24", "Low", 0, None, 0))
+
+    def test_invalid_rows(self):
+        for row, message in [
+            (["Write report", "24-12-2026"], "expected 6 fields, got 2"),
+            ([" ", "24-12-2026", "High", "0", "", ""], "missing title"),
+            (["Write report", "2026/12/24", "High", "0", "", ""], "invalid deadline '2026/12/24'"),
+            (["Write report", "31-02-2026", "High", "0", "", ""], "invalid deadline '31-02-2026'"),
+            (["Write report", "24-12-2026", "Urgent", "0", "", ""], "invalid priority 'Urgent'"),
+            (["Write report", "24-12-2026", "High", "maybe", "", ""], "invalid completed flag 'maybe'"),
+            (["Write report", "24-12-2026", "High", "0", "1h", ""], "invalid duration '1h'"),
+            (["Write report", "24-12-2026", "High", "0", "", "-5"], "negative elapsed time"),
+        ]:
+            with self.subTest(row=row):
+                with self.assertRaises(RowError) as raised:
+                    self.normalizer.normalize(COLUMNS, row)
+                self.assertEqual(str(raised.exception), message)
+
+
+class ImportRejectsTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.store = TaskStore(os.path.join(self.dir.name, "todo.db"))
+        self.path = os.path.join(self.dir.name, "tasks.csv")
+
+    def tearDown(self):
+        self.store.close()
+        self.dir.cleanup()
+
+    def write_csv(self, rows):
+        with open(self.path, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(rows)
+
+    def test_invalid_rows_go_to_the_rejects_file(self):
+        self.write_csv([
+            ["Title", "Deadline", "Priority", "Completed"],
+            ["Write report", "24-12-2026", "High", "✘"],
+            ["", "24-12-2026", "High", "0"],
+            ["Send invoice", "tomorrow", "Low", "0"],
+            [],
+            ["Book dentist", "2026-11-05", "Medium", "✔"],
+        ])
+        result = import_csv(self.store, self.path, batch_size=1)
+        self.assertEqual((result.imported, result.rejected), (2, 2))
+        self.assertEqual(result.reject_path, self.path + ".rejected.csv")
+        with open(result.reject_path, newline="", encoding="utf-8") as f:
+            self.assertEqual(list(csv.reader(f)), [
+                ["", "24-12-2026", "High", "0", "missing title"],
+                ["Send invoice", "tomorrow", "Low", "0", "invalid deadline 'tomorrow'"],
+            ])
+        self.assertEqual(self.store.conn.execute("SELECT title, deadline, completed FROM tasks ORDER BY id").fetchall(),
+                         [("Write report", "2026-12-24", 0), ("Book dentist", "2026-11-05", 1)])
+
+    def test_no_rejects_file_without_rejects(self):
+        self.write_csv([["Write report", "24-12-2026", "High", "0"]])  # no header: the old column order
+        result = import_csv(self.store, self.path)
+        self.assertEqual((result.imported, result.rejected, result.reject_path), (1, 0, None))
+        self.assertFalse(os.path.exists(self.path + ".rejected.csv"))
+
+    def test_custom_rejects_path(self):
+        reject_path = os.path.join(self.dir.name, "bad.csv")
+        self.write_csv([["Title", "Deadline"], ["Write report", "someday"]])
+        result = import_csv(self.store, self.path, reject_path=reject_path)
+        self.assertEqual((result.imported, result.rejected, result.reject_path), (0, 1, reject_path))
+        self.assertEqual(self.store.task_count(), 0)
+
+    def test_imported_tasks_are_counted_and_logged(self):
+        # The bulk load defers the counts, search index and change log to its end
+        self.write_csv([["Title", "Deadline", "Priority"]] +
+                       [[f"Task {i}", "2026-11-05", "Low"] for i in range(25)])
+        self.assertEqual(import_csv(self.store, self.path, batch_size=10).imported, 25)
+        self.assertEqual(self.store.task_count(), 25)
+        self.assertEqual(len(self.store.search_tasks("Task 1")), 11)
+        self.assertEqual(self.store.conn.execute("SELECT COUNT(*) FROM change_log").fetchone()[0], 25)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from task_store import TaskStore
+
+
+def baseline_db(path, rows):
+    # todo.db as the original single-file app left it: no user_version, no
+    # indexes, DD-MM-YYYY deadlines and the two columns it added later
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT,
+        deadline TEXT,
+        priority TEXT,
+        completed BOOLEAN
+    )""")
+    conn.execute("ALTER TABLE tasks ADD COLUMN duration INTEGER DEFAULT NULL")
+    conn.execute("ALTER TABLE tasks ADD COLUMN elapsed_time INTEGER DEFAULT 0")
+    conn.executemany("INSERT INTO tasks (title, deadline, priority, completed) VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def migrate_partly(path, steps):
+    # The first `steps` migrations only, as an older release would have left the file
+    migrations = TaskStore.__new__(TaskStore).migrations()[:steps]
+    conn = sqlite3.connect(path)
+    for number, migrate in enumerate(migrations, 1):
+        migrate(conn)
+        conn.execute(f"PRAGMA user_version={number}")
+    conn.execute("INSERT INTO tasks (title, deadline, priority, completed) VALUES (?, ?, ?, ?)",
+                 ("Book dentist", "2026-10-30", "Low", 0))
+    conn.commit()
+    conn.close()
+
+
+class BaselineMigrationTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "todo.db")
+        baseline_db(self.path, [
+            ("Write report", "24-12-2026", "High", 0),
+            ("Send invoice", "01-02-2027", "Medium", 1),
+            ("Fix the budget", "2026-11-05", "Low", False),
+        ])
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def user_version(self, store):
+        return store.conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def test_migrates_to_the_latest_version(self):
+        store = TaskStore(self.path)
+        try:
+            self.assertEqual(self.user_version(store), len(store.migrations()))
+            self.assertEqual(
+                store.conn.execute("SELECT title, deadline FROM tasks ORDER BY id").fetchall(),
+                [("Write report", "2026-12-24"), ("Send invoice", "2027-02-01"), ("Fix the budget", "2026-11-05")])
+            # What the later steps build from the existing rows
+            self.assertEqual(store.task_count(), 3)
+            self.assertEqual([row[1] for row in store.search_tasks("budget")], ["Fix the budget"])
+            self.assertEqual(store.conn.execute("SELECT COUNT(DISTINCT uid) FROM tasks").fetchone()[0], 3)
+        finally:
+            store.close()
+
+    def test_deadlines_sort_by_date_after_conversion(self):
+        store = TaskStore(self.path)
+        try:
+            titles = [row[1] for row in store.list_tasks()]
+        finally:
+            store.close()
+        self.assertEqual(titles, ["Fix the budget", "Write report", "Send invoice"])
+
+    def test_resumes_from_an_older_version(self):
+        migrate_partly(self.path, 3)
+        conn = sqlite3.connect(self.path)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], 3)
+        conn.close()
+
+        store = TaskStore(self.path)
+        try:
+            self.assertEqual(self.user_version(store), len(store.migrations()))
+            self.assertEqual(store.task_count(), 4)
+            self.assertEqual(store.conn.execute("SELECT COUNT(*) FROM tasks WHERE uid IS NULL").fetchone()[0], 0)
+        finally:
+            store.close()
+
+    def test_reopening_a_migrated_database_changes_nothing(self):
+        TaskStore(self.path).close()
+        mtime = os.stat(self.path).st_mtime_ns
+        store = TaskStore(self.path)
+        try:
+            self.assertEqual(self.user_version(store), len(store.migrations()))
+            self.assertEqual(store.conn.execute("SELECT deadline FROM tasks ORDER BY id").fetchone(), ("2026-12-24",))
+        finally:
+            store.close()
+        self.assertEqual(os.stat(self.path).st_mtime_ns, mtime)
+
+
+if __name__ == "__main__":
+    unittest.main()
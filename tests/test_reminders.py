@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, time, timedelta
+
+from reminders import ReminderScheduler
+from task_store import TaskStore
+
+TODAY = date(2026, 10, 17)
+NOON = datetime.combine(TODAY, time(12))
+
+
+class LateTaskTest(unittest.TestCase):
+    # Tasks that are already due or overdue when they appear, after the day's check
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.store = TaskStore(os.path.join(self.dir.name, "todo.db"))
+        self.store.add_task("Plan sprint", (TODAY + timedelta(days=3)).isoformat(), "Medium")
+        self.reminders = ReminderScheduler(self.store, today=lambda: TODAY)
+        self.reminders.seed()
+        self.assertIsNone(self.reminders.collect())
+
+    def tearDown(self):
+        self.store.close()
+        self.dir.cleanup()
+
+    def add(self, title, days):
+        task_id = self.store.add_task(title, (TODAY + timedelta(days=days)).isoformat(), "High")
+        return self.reminders.task_changed(self.store.get_task(task_id))
+
+    def test_task_due_today_is_reported_at_once(self):
+        self.assertTrue(self.add("Send invoice", 0))
+        self.assertEqual(self.reminders.seconds_until_next(NOON), 0)
+        self.assertEqual(self.reminders.collect().message(), "Task 'Send invoice' is due today!")
+        self.assertIsNone(self.reminders.collect())
+
+    def test_overdue_task_is_reported(self):
+        self.add("File taxes", -5)
+        notice = self.reminders.collect()
+        self.assertEqual((notice.due_count, notice.missed_titles), (0, ["File taxes"]))
+
+    def test_future_task_waits_for_its_day(self):
+        self.assertFalse(self.add("Book dentist", 5))
+        self.assertIsNone(self.reminders.collect())
+        self.assertGreater(self.reminders.seconds_until_next(NOON), 0)
+
+    def test_recheck_reports_every_overdue_task(self):
+        # What an import does: its tasks never pass through task_changed
+        self.store.insert_tasks([("Old bill", (TODAY - timedelta(days=9)).isoformat(), "Low", 0, None, 0)])
+        self.assertIsNone(self.reminders.collect())
+        self.assertTrue(self.reminders.recheck())
+        self.assertEqual(self.reminders.collect().missed_titles, ["Old bill"])
+
+
+if __name__ == "__main__":
+    unittest.main()
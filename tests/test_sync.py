@@ -0,0 +1,69 @@
+import os
+import tempfile
+import time
+import unittest
+
+from sync import sync
+from task_store import TaskStore
+
+
+class SyncConflictTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.laptop = TaskStore(os.path.join(self.dir.name, "laptop.db"))
+        self.stick = TaskStore(os.path.join(self.dir.name, "stick.db"))
+        task_id = self.laptop.add_task("Write report", "2026-10-20", "High")
+        self.uid = self.laptop.conn.execute("SELECT uid FROM tasks WHERE id=?", (task_id,)).fetchone()[0]
+        sync(self.laptop, self.stick)
+
+    def tearDown(self):
+        self.laptop.close()
+        self.stick.close()
+        self.dir.cleanup()
+
+    def edit(self, store, title):
+        # Stamps are in milliseconds; keep successive edits apart
+        time.sleep(0.002)
+        task_id = store.conn.execute("SELECT id FROM tasks WHERE uid=?", (self.uid,)).fetchone()[0]
+        store.update_title(task_id, title)
+
+    def titles(self, store):
+        return [title for title, in store.conn.execute("SELECT title FROM tasks")]
+
+    def test_echo_of_own_change_is_not_a_conflict(self):
+        # The stick gets the laptop's edit, then only the laptop edits again
+        self.edit(self.laptop, "Write the report")
+        self.assertEqual(sync(self.laptop, self.stick).conflicts, 0)
+        self.edit(self.laptop, "Write the final report")
+        result = sync(self.laptop, self.stick)
+        self.assertEqual(result.conflicts, 0)
+        self.assertEqual(self.titles(self.stick), ["Write the final report"])
+
+    def test_echo_of_peer_change_is_not_a_conflict(self):
+        self.edit(self.stick, "Write the report")
+        self.assertEqual(sync(self.laptop, self.stick).conflicts, 0)
+        self.edit(self.stick, "Write the final report")
+        self.assertEqual(sync(self.laptop, self.stick).conflicts, 0)
+        self.assertEqual(self.titles(self.laptop), ["Write the final report"])
+
+    def test_echo_of_delete_is_not_a_conflict(self):
+        other_id = self.laptop.add_task("Send invoice", "2026-10-21", "Low")
+        sync(self.laptop, self.stick)
+        self.laptop.delete_tasks([other_id])
+        self.assertEqual(sync(self.laptop, self.stick).conflicts, 0)
+        self.edit(self.laptop, "Write the report")
+        self.assertEqual(sync(self.laptop, self.stick).conflicts, 0)
+
+    def test_both_sides_changed(self):
+        self.edit(self.stick, "Write the report")
+        self.edit(self.laptop, "Write the final report")
+        result = sync(self.laptop, self.stick)
+        self.assertEqual(result.conflicts, 1)
+        # The later edit wins on both sides
+        self.assertEqual(self.titles(self.laptop), ["Write the final report"])
+        self.assertEqual(self.titles(self.stick), ["Write the final report"])
+        self.assertEqual(sync(self.laptop, self.stick).conflicts, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
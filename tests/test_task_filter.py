@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+from task_filter import FilterError, compile_filter
+from task_store import TaskStore
+
+
+class CompileFilterTest(unittest.TestCase):
+    # Expressions are compiled and run against a small table, so the tests
+    # check which tasks match rather than the SQL text
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.store = TaskStore(os.path.join(self.dir.name, "todo.db"))
+        today = date.today()
+        self.store.insert_tasks([
+            ("Write report", (today - timedelta(days=2)).isoformat(), "High", 0, 3600, 1800),
+            ("Send invoice", today.isoformat(), "Medium", 0, None, 0),
+            ("Weekly report", (today + timedelta(days=5)).isoformat(), "Low", 1, 600, 600),
+            ("Book dentist", (today + timedelta(days=30)).isoformat(), "Low", 0, None, 0),
+        ])
+
+    def tearDown(self):
+        self.store.close()
+        self.dir.cleanup()
+
+    def matches(self, text, has_fts=True):
+        sql, params = compile_filter(text, has_fts)
+        return sorted(title for title, in self.store.conn.execute(f"SELECT title FROM tasks WHERE {sql}", params))
+
+    def test_empty_expression_matches_everything(self):
+        self.assertEqual(compile_filter("  "), ("1", []))
+        self.assertEqual(len(self.matches("")), 4)
+
+    def test_fields(self):
+        self.assertEqual(self.matches("priority:high"), ["Write report"])
+        self.assertEqual(self.matches("priority>=medium"), ["Send invoice", "Write report"])
+        self.assertEqual(self.matches("p:low,medium"), ["Book dentist", "Send invoice", "Weekly report"])
+        self.assertEqual(self.matches("status:overdue"), ["Write report"])
+        self.assertEqual(self.matches("status:done"), ["Weekly report"])
+        self.assertEqual(self.matches("due:today..+7d"), ["Send invoice", "Weekly report"])
+        self.assertEqual(self.matches("due<today"), ["Write report"])
+        self.assertEqual(self.matches("duration:none"), ["Book dentist", "Send invoice"])
+        self.assertEqual(self.matches("elapsed>15m"), ["Write report"])
+        self.assertEqual(self.matches("progress>=100%"), ["Weekly report"])
+
+    def test_titles_with_and_without_the_search_index(self):
+        for has_fts in (True, False):
+            self.assertEqual(self.matches("report", has_fts), ["Weekly report", "Write report"])
+            self.assertEqual(self.matches('title:"weekly report"', has_fts), ["Weekly report"])
+            self.assertEqual(self.matches("title!=report", has_fts), ["Book dentist", "Send invoice"])
+
+    def test_and_binds_tighter_than_or(self):
+        # priority:low or (status:open and report)
+        self.assertEqual(self.matches("priority:low or status:open report"),
+                         ["Book dentist", "Weekly report", "Write report"])
+        self.assertEqual(self.matches("(priority:low or status:open) report"), ["Weekly report", "Write report"])
+        self.assertEqual(self.matches("priority:low and status:open or priority:high"),
+                         ["Book dentist", "Write report"])
+
+    def test_not_applies_to_the_next_term(self):
+        self.assertEqual(self.matches("not status:completed report"), ["Write report"])
+        self.assertEqual(self.matches("not (status:completed or priority:high)"), ["Book dentist", "Send invoice"])
+        self.assertEqual(self.matches("not not priority:high"), ["Write report"])
+
+    def test_keywords_and_values_ignore_case(self):
+        self.assertEqual(self.matches("PRIORITY:High OR Status:Done"), ["Weekly report", "Write report"])
+
+    def test_errors(self):
+        for text, message in [
+            ("priority:urgent", "invalid priority 'urgent'"),
+            ("status:later", "invalid status 'later'"),
+            ("status>open", "status takes ':' or '!='"),
+            ("due:31-02-2026", "invalid date '31-02-2026'"),
+            ("due>today..+7d", "a range needs ':', not '>'"),
+            ("elapsed>soon", "invalid time 'soon'"),
+            ("progress>half", "invalid percentage 'half'"),
+            ("title>report", "title takes ':' or '!='"),
+            ("priority:", "priority: needs a value"),
+            ("(priority:high", "missing ')'"),
+            ("priority:high)", "unexpected ')'"),
+            ("priority:high or", "expected a term"),
+            ("not", "expected a term"),
+        ]:
+            with self.subTest(text=text):
+                with self.assertRaises(FilterError) as raised:
+                    compile_filter(text)
+                self.assertIn(message, str(raised.exception))
+
+    def test_filter_error_is_a_value_error(self):
+        self.assertRaises(ValueError, compile_filter, "priority:urgent")
+
+
+if __name__ == "__main__":
+    unittest.main()
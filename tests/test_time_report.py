@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from task_store import TaskStore
+
+
+class TimeReportTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.store = TaskStore(os.path.join(self.dir.name, "todo.db"))
+
+    def tearDown(self):
+        self.store.close()
+        self.dir.cleanup()
+
+    def test_session_across_midnight_is_one_session(self):
+        # Two hours from Wednesday 23:00, one in each day of the same week
+        started = datetime(2026, 10, 14, 23, 0).timestamp()
+        self.store.record_sessions([(1, "High", started, 7200)])
+
+        days = self.store.time_report("day", "2026-10-14", "2026-10-15")
+        self.assertEqual([(day, seconds, sessions) for day, _, seconds, sessions in days],
+                         [("2026-10-14", 3600, 1), ("2026-10-15", 3600, 1)])
+        self.assertEqual(self.store.time_report("week"), [("2026-10-12", "High", 7200, 1)])
+        self.assertEqual(self.store.time_report("priority"), [(None, "High", 7200, 1)])
+        self.assertEqual(self.store.time_report("priority", "2026-10-01", "2026-10-31"),
+                         [(None, "High", 7200, 1)])
+        # A period that starts after midnight still counts the session carried into it
+        self.assertEqual(self.store.time_report("priority", "2026-10-15", "2026-10-15"),
+                         [(None, "High", 3600, 1)])
+
+    def test_session_across_weeks_counts_in_each_week(self):
+        # Sunday 23:30 to Monday 00:30
+        started = datetime(2026, 10, 18, 23, 30).timestamp()
+        self.store.record_sessions([(1, "Low", started, 3600)])
+
+        self.assertEqual(self.store.time_report("week"),
+                         [("2026-10-12", "Low", 1800, 1), ("2026-10-19", "Low", 1800, 1)])
+        self.assertEqual(self.store.time_report("priority", "2026-10-12", "2026-10-25"),
+                         [(None, "Low", 3600, 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
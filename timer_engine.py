@@ -0,0 +1,137 @@
+import heapq
+import time
+
+CHECKPOINT_INTERVAL = 30  # seconds between elapsed_time writes while timers run
+
+
+class TimerSession:
+    __slots__ = ("task_id", "title", "duration", "base_elapsed", "started")
+
+    def __init__(self, task_id, title, duration, base_elapsed, started):
+        self.task_id = task_id
+        self.title = title
+        self.duration = duration
+        self.base_elapsed = base_elapsed  # seconds already tracked when the session started
+        self.started = started            # time.monotonic() at start
+
+    def elapsed(self, now):
+        return self.base_elapsed + int(now - self.started)
+
+    def finished(self, now):
+        return bool(self.duration) and self.elapsed(now) >= self.duration
+
+    def completes_at(self):
+        # Monotonic time at which elapsed reaches duration
+        return self.started + self.duration - self.base_elapsed
+
+
+class TimerEngine:
+    """Runs any number of task timers in memory and writes them behind to the store.
+
+    Elapsed time comes from time.monotonic(), so wall-clock changes can't
+    corrupt it. Each task's title and duration are read once at start. A
+    min-heap keyed by projected completion time makes each tick O(log n)
+    however many timers run. Checkpoints and completions are written in
+    one batched transaction, and stopping or shutting down always persists.
+    The store logs each stopped session and adds it to the time rollups.
+
+    Writes go through `write(fn, task_ids)`, which runs `fn(conn)` and may do so
+    later on another thread; `task_ids` are the tasks whose rows it changes.
+    By default they run at once on the store's own connection.
+    """
+
+    def __init__(self, store, checkpoint_interval=CHECKPOINT_INTERVAL, clock=time.monotonic, write=None):
+        self.store = store
+        self.write = write or (lambda fn, task_ids: fn(store.conn))
+        self.checkpoint_interval = checkpoint_interval
+        self.clock = clock
+        self.sessions = {}
+        self.completions = []  # (completes_at, task_id), stale entries skipped lazily
+        self.last_checkpoint = clock()
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def is_running(self, task_id):
+        return task_id in self.sessions
+
+    def start(self, task_id, task=False):
+        # `task` is the store's timer_task row when the caller already read it
+        if task_id in self.sessions:
+            return self.sessions[task_id]
+        if task is False:
+            task = self.store.timer_task(task_id)
+        if task is None:
+            return None
+        title, duration, elapsed = task
+        self.write(lambda conn: self.store.mark_timer_running(task_id, elapsed, conn), ())
+        if not self.sessions:
+            self.last_checkpoint = self.clock()
+        session = TimerSession(task_id, title, duration, elapsed, self.clock())
+        self.sessions[task_id] = session
+        if duration:
+            heapq.heappush(self.completions, (session.completes_at(), task_id))
+        return session
+
+    def elapsed(self, task_id):
+        session = self.sessions.get(task_id)
+        return session.elapsed(self.clock()) if session else 0
+
+    def tick(self):
+        # Returns the sessions that reached their duration; they are closed in one batch
+        now = self.clock()
+        completed = []
+        while self.completions and self.completions[0][0] <= now:
+            completes_at, task_id = heapq.heappop(self.completions)
+            session = self.sessions.get(task_id)
+            if session and session.duration and session.completes_at() == completes_at:
+                completed.append(self.sessions.pop(task_id))
+        if completed:
+            stops = [(s.task_id, s.elapsed(now), True) for s in completed]
+            self.write(lambda conn: self.store.stop_timers(stops, conn), [s.task_id for s in completed])
+        if self.sessions and now - self.last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint(now)
+        return completed
+
+    def checkpoint(self, now=None):
+        now = self.clock() if now is None else now
+        checkpoints = [(s.task_id, s.elapsed(now)) for s in self.sessions.values()]
+        self.write(lambda conn: self.store.checkpoint_timers(checkpoints, conn), ())
+        self.last_checkpoint = now
+
+    def stop(self, task_id):
+        # Returns (session, total elapsed, finished) for the stopped timer
+        stopped = self.stop_many([task_id])
+        return stopped[0] if stopped else None
+
+    def stop_many(self, task_ids):
+        # Stops every running timer among `task_ids` with one write; returns
+        # (session, total elapsed, finished) for each
+        now = self.clock()
+        stopped = []
+        for task_id in task_ids:
+            session = self.sessions.pop(task_id, None)
+            if session is not None:
+                stopped.append((session, session.elapsed(now), session.finished(now)))
+        if not stopped:
+            return stopped
+        stops = [(session.task_id, elapsed, finished) for session, elapsed, finished in stopped]
+        self.write(lambda conn: self.store.stop_timers(stops, conn), [task_id for task_id, _, _ in stops])
+        # Drop stale heap entries once they outnumber the live ones
+        if len(self.completions) > 2 * len(self.sessions) + 64:
+            self.completions = [(s.completes_at(), s.task_id) for s in self.sessions.values() if s.duration]
+            heapq.heapify(self.completions)
+        return stopped
+
+    def shutdown(self):
+        now = self.clock()
+        stops = [(s.task_id, s.elapsed(now), s.finished(now)) for s in self.sessions.values()]
+        self.write(lambda conn: self.store.stop_timers(stops, conn), ())
+        self.sessions.clear()
+        self.completions.clear()
+
+    def recover(self):
+        # Sessions still marked running by a process that is gone were cut off
+        # by a crash. Their last checkpoint is already in elapsed_time; report
+        # them and clear the marks.
+        return self.store.recover_timers()
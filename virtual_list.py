@@ -0,0 +1,198 @@
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+
+class RowIds:
+    """Index -> task id mapping over a VirtualList's rows, without copying them."""
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def __len__(self):
+        return len(self.owner.rows)
+
+    def __getitem__(self, index):
+        return self.owner.rows[index][0]
+
+
+class VirtualList(ttk.Frame):
+    """A Listbox that only materializes the visible window of rows plus overscan.
+
+    `rows` is any indexable sequence of task tuples (id first). `render` turns a
+    slice of rows into (text, color) pairs and is only called for rows that are
+    about to be shown. Selection is tracked by task id, so it survives
+    scrolling, reloads and row patches.
+    """
+
+    def __init__(self, master, render, overscan=50, **listbox_options):
+        super().__init__(master)
+        self.render = render
+        self.overscan = overscan
+        self.rows = []
+        self.positions = None
+        self.start = 0  # global index of the first materialized row
+        self.end = 0
+        self.top = 0    # global index of the first visible row
+        self.selected = set()
+        self.refresh_pending = False
+        self.ids = RowIds(self)
+
+        self.listbox = tk.Listbox(self, exportselection=False, yscrollcommand=self.on_listbox_scroll,
+                                  **listbox_options)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.listbox.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.line_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<Configure>", lambda e: self.schedule_refresh())
+
+    def visible_count(self):
+        return max(1, self.listbox.winfo_height() // self.line_height)
+
+    # Full loads
+
+    def set_rows(self, rows):
+        # Keeps the scroll position and the selected ids
+        self.rows = rows
+        self.positions = None
+        self.start = self.end = 0
+        self.show(self.top, force=True)
+
+    def show(self, top, force=False):
+        total = len(self.rows)
+        visible = self.visible_count()
+        top = max(0, min(top, total - visible))
+        if force or top < self.start or top + visible > self.end or self.near_edge(top, visible):
+            self.fill(max(0, top - self.overscan), min(total, top + visible + self.overscan))
+        self.top = top
+        self.listbox.yview(top - self.start)
+        self.update_scrollbar()
+
+    def fill(self, start, end):
+        self.listbox.delete(0, tk.END)
+        self.start, self.end = start, end
+        if start == end:
+            return
+        window = self.rows[start:end]
+        rendered = self.render(window)
+        self.listbox.insert(tk.END, *[text for text, color in rendered])
+        for i, (row, (text, color)) in enumerate(zip(window, rendered)):
+            self.listbox.itemconfig(i, fg=color)
+            if row[0] in self.selected:
+                self.listbox.selection_set(i)
+
+    def schedule_refresh(self):
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.after_idle(self.refresh)
+
+    def refresh(self):
+        self.refresh_pending = False
+        self.show(self.top)
+
+    # Scrolling
+
+    def on_listbox_scroll(self, lo, hi):
+        # Native scrolling (wheel, arrow keys) moves inside the materialized window
+        count = self.end - self.start
+        self.top = self.start + int(round(float(lo) * count))
+        self.update_scrollbar()
+        if self.near_edge(self.top, self.visible_count()):
+            self.schedule_refresh()
+
+    def near_edge(self, top, visible):
+        # True when the view is within half the overscan of an edge that has more rows past it
+        margin = self.overscan // 2
+        return top - self.start < margin and self.start > 0 or \
+            self.end - (top + visible) < margin and self.end < len(self.rows)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.show(int(float(amount) * len(self.rows)))
+        elif unit == "pages":
+            self.show(self.top + int(amount) * self.visible_count())
+        else:
+            self.show(self.top + int(amount))
+
+    def update_scrollbar(self):
+        total = len(self.rows)
+        if not total:
+            self.scrollbar.set(0, 1)
+            return
+        self.scrollbar.set(self.top / total, min(1, (self.top + self.visible_count()) / total))
+
+    def see(self, index):
+        visible = self.visible_count()
+        if not self.top <= index < self.top + visible:
+            self.show(index - visible // 2)
+
+    # Selection
+
+    def on_select(self, event=None):
+        window_ids = {row[0] for row in self.rows[self.start:self.end]}
+        picked = {self.rows[self.start + i][0] for i in self.listbox.curselection()}
+        if self.listbox.cget("selectmode") in (tk.BROWSE, tk.SINGLE):
+            self.selected = picked
+        else:
+            self.selected = (self.selected - window_ids) | picked
+
+    def curselection(self):
+        indexes = (self.index_of(task_id) for task_id in self.selected)
+        return sorted(index for index in indexes if index is not None)
+
+    def index_of(self, task_id):
+        if self.positions is None:
+            self.positions = {row[0]: i for i, row in enumerate(self.rows)}
+        return self.positions.get(task_id)
+
+    # Diff updates: each touches only the affected row
+
+    def update_row(self, index, row):
+        self.rows[index] = row
+        if self.positions is not None:
+            self.positions[row[0]] = index
+        if self.start <= index < self.end:
+            local = index - self.start
+            (text, color), = self.render([row])
+            self.listbox.delete(local)
+            self.listbox.insert(local, text)
+            self.listbox.itemconfig(local, fg=color)
+            if row[0] in self.selected:
+                self.listbox.selection_set(local)
+            self.listbox.yview(self.top - self.start)
+
+    def insert_row(self, index, row):
+        self.rows.insert(index, row)
+        self.positions = None
+        if index < self.start:
+            self.start += 1
+            self.end += 1
+            self.top += 1
+        elif index <= self.end:
+            local = index - self.start
+            (text, color), = self.render([row])
+            self.listbox.insert(local, text)
+            self.listbox.itemconfig(local, fg=color)
+            self.end += 1
+            if index < self.top:
+                self.top += 1
+        self.show(self.top)
+
+    def delete_row(self, index):
+        row = self.rows.pop(index)
+        self.positions = None
+        self.selected.discard(row[0])
+        if index < self.start:
+            self.start -= 1
+            self.end -= 1
+            self.top -= 1
+        elif index < self.end:
+            self.listbox.delete(index - self.start)
+            self.end -= 1
+            if index < self.top:
+                self.top -= 1
+        self.show(self.top)